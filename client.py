@@ -3,14 +3,89 @@ import socket
 import json
 import time
 import random
+import math
 import multiprocessing
+import os
+import select
+import threading
+from collections import deque
 from typing import Dict, List, Tuple, Optional
 from enum import Enum, auto
 import sys
+from src.core.game.systems.session_manager import SessionTable
+from src.core.game.systems.rate_limiter import RateLimiter, TokenBucket
+from src.core.game.systems import room_migration
+from src.core.engine.physics.timestep import FixedTimestep, TICK_RATE
+from src.core.engine.physics.collision import SweepAndPrune, swept_rect, time_of_impact
+from src.core.engine.physics.pixel_mask import (COLOR_KEY_GRAY, SpriteSheet, frame_masks, load_shape,
+                                                masks_overlap, union_bounds)
+from src.core.game.systems.transport import LOCAL_ADDRESS, LocalTransport, UdpTransport
+from src.core.game.systems import lockstep
+from src.core.game.systems.lockstep import INPUT_JUMP, LockstepSession, LockstepSimulation
+from src.core.game.systems.rollback import RollbackSession
+from src.core.game.entities import obstacle_types
+from src.core.engine.world.column_ring import ColumnRing
+from src.core.engine.world.map_view import visible_range
+from src.core.engine.world.background_cache import BackgroundCache
+from src.core.game.levels.chunk_generator import GROUND_TILE, ChunkGenerator
+from src.core.game.entities.obstacle_types import DIABRETE, OBSTACLE_TYPES, SKELETON
+from src.core.game.entities.records import FLAG_DOUBLE_JUMP, FLAG_DUCKING, FLAG_JUMPING, ObstacleRecord, PlayerRecord
 
 # Constantes
 PORT = 5600
 BUFFER_SIZE = 4096
+SUBSCRIBE_INTERVAL = 2.0  # Renovação da inscrição do espectador no relay
+SNAPSHOT_BUFFER_SIZE = 65507  # Snapshots do relay podem passar de 4 KB (mesmo limite do relay.py)
+MAX_PLAYERS = 2
+SESSION_FILE = ".castelo_session.json"  # Token salvo para retomar após reiniciar o cliente
+SESSION_EXPIRED = "Sessão expirada"
+SPEED_RAMP_SECONDS = 10       # A velocidade aumenta 0.05 a cada intervalo
+NETCODES = ('server', 'lockstep', 'rollback')  # Servidor autoritativo ou só troca de inputs
+
+# Mapa do cliente: colunas guardadas antes e depois do scroll
+MAP_BEHIND_COLUMNS = 30
+MAP_AHEAD_COLUMNS = 40
+MAP_BUFFER_COLUMNS = MAP_BEHIND_COLUMNS + MAP_AHEAD_COLUMNS + 16
+GROUND_COLUMN = bytes([GROUND_TILE])
+
+# Controle de admissão do socket do servidor
+MAX_PACKET_SIZE = 1024        # Requisições legítimas têm poucas centenas de bytes
+ADDRESS_RATE = (200, 16)      # (pacotes/s, rajada) por endereço; rajada < orçamento do tick
+SESSION_RATE = (150, 75)      # (pacotes/s, rajada) por sessão
+JOIN_RATE = (2, 4)            # (joins/s, rajada) global para novos jogadores
+MAX_PACKETS_PER_TICK = 64     # Orçamento de pacotes tratados entre dois ticks
+SPRITE_SHEET = "./assets/animations/player/banco_0.png"
+SHAPE_PATH = "./assets/animations/player/{}_sprite.shape"
+
+_player_masks = None  # Máscaras dos jogadores, decodificadas uma vez por processo
+
+def load_player_masks() -> dict:
+    """Gera as máscaras de pixel dos sprites uma vez, ao carregar os assets.
+    
+    Cada tipo ganha também a caixa que contém todos os seus frames, usada
+    como AABB antes do teste por pixel. O resultado fica no módulo e as
+    máscaras dos obstáculos na tabela de tipos, então a imagem é decodificada
+    uma vez por processo e compartilhada por todas as salas. Sem os assets a
+    colisão continua só com os retângulos."""
+    global _player_masks
+    if _player_masks is not None:
+        return _player_masks
+    player_masks = {}
+    try:
+        sheet = SpriteSheet(SPRITE_SHEET)
+        for char_type in ('knight', 'mage'):
+            frames = load_shape(SHAPE_PATH.format(char_type), "move")
+            masks = frame_masks(sheet, frames, COLOR_KEY_GRAY, PlayerRecord.height)
+            # Agachado, só as linhas dentro da hitbox baixa contam
+            cut = PlayerRecord.height - PlayerRecord.duck_height
+            ducked = [mask.clipped(cut) for mask in masks]
+            player_masks[char_type] = (masks, union_bounds(masks), ducked, union_bounds(ducked))
+        obstacle_types.load_masks(sheet)
+    except (OSError, ValueError) as e:
+        print(f"Máscaras de colisão indisponíveis ({e}), usando retângulos")
+        return {}
+    _player_masks = player_masks
+    return player_masks
 
 class GameState(Enum):
     LOBBY = auto()
@@ -18,11 +93,35 @@ class GameState(Enum):
     GAME_OVER = auto()
 
 class GameServer(multiprocessing.Process):
-    def __init__(self):
+    def __init__(self, port=PORT, tick_rate=TICK_RATE, netcode='server'):
         super().__init__()
+        if netcode not in NETCODES:
+            raise ValueError(f"Netcode desconhecido: {netcode}")
+        self.port = port
+        self.netcode = netcode
+        self.sock = None
+        self.local_inputs = deque()  # Inputs do lockstep destinados ao jogador do host
         self.players = {}
+        self.sessions = SessionTable()
+        
+        # Limites de taxa e contadores de pacotes descartados
+        self.address_limiter = RateLimiter(*ADDRESS_RATE)
+        self.session_limiter = RateLimiter(*SESSION_RATE)
+        self.join_bucket = TokenBucket(*JOIN_RATE)
+        self.budget = MAX_PACKETS_PER_TICK  # Pacotes que ainda cabem no tick atual
+        self.stats = {
+            'received': 0,
+            'oversize': 0,
+            'throttled_address': 0,
+            'throttled_session': 0,
+            'over_budget': 0,
+            'malformed': 0,
+            'joins_rejected': 0,
+            'errors': 0
+        }
         self.game_state = GameState.LOBBY
         self.lock = multiprocessing.Lock()
+        self.request_lock = multiprocessing.Lock()  # Socket e transporte local tratam requisições em paralelo
         
         # Configurações do jogo
         self.screen_width = 320
@@ -30,14 +129,21 @@ class GameServer(multiprocessing.Process):
         self.tile_size = 16
         self.ground_level = 14
         
-        # Estado do jogo
+        # Estado do jogo (todo o tempo da simulação é contado em ticks)
         self.game_speed = 2.0
         self.speed_multiplier = 1.0
         self.score = 0
-        self.start_time = time.time()
+        self.timestep = FixedTimestep(tick_rate)
+        self.ramp_ticks = 0
         
         # Seed compartilhada para geração do mapa
         self.map_seed = random.randint(0, 999999)
+        self.rng = random.Random(self.map_seed)  # RNG da sala (migra junto com ela)
+        
+        # Migração: chave de administração e destino após a sala ser transferida
+        self.admin_key = os.environ.get('CASTELO_ADMIN_KEY')
+        self.redirect = None
+        self.migrating = False
         
         # Frames de animação aleatorios
         self.animation_frames = [
@@ -49,59 +155,66 @@ class GameServer(multiprocessing.Process):
         
         # Obstáculos
         self.scroll_x = 0.0
-        self.obstacles = []
+        self.obstacles: List[ObstacleRecord] = []
+        self.next_obstacle_id = 0
         self.spawn_timer = 0
         self.spawn_interval = 2.5
         
-        self.obstacle_types = {
-            'skeleton': {
-                'width': 10,
-                'height': 12,
-                'animation_frames': [
-                    (0, 96, 10, 12),  # Frame 1
-                    (17, 94, 10, 14)   # Frame 2
-                ],
-                'animation_speed': 0.2
-            },
-            'diabrete': {
-                'width': 65,
-                'height': 12,
-                'animation_frames': [
-                    (0, 114, 10, 11),  # Frame 1
-                    (17, 113, 10, 12)   # Frame 2
-                ],
-                'animation_speed': 0.2
-            }
-        }
+        self.player_masks = load_player_masks()
     
     def add_player(self, player_id: str):
         """Adiciona um novo jogador com todas as chaves necessárias"""
         with self.lock:
-            if len(self.players) >= 2:
+            if len(self.players) >= MAX_PLAYERS:
                 raise Exception("O jogo já atingiu o número máximo de jogadores (2)")
-            char_type = 'knight' if len(self.players) == 0 else 'mage'
-        
-            self.players[player_id] = {
-                'x': 100 - 50*(int(player_id) -1),
-                'y': (self.ground_level * self.tile_size) - 20,
-                'width': 15,
-                'height': 20,
-                'duck_height': 10,
-                'is_ducking': False,
-                'is_jumping': False,
-                'has_double_jump': True,
-                'jump_velocity': 0,
-                'current_frame': 0,
-                'animation_time': 0,
-                'color': pyxel.COLOR_GRAY,
-                'ready': False,
-                'sprite_frame': 0,
-                'sprite_x': 0,
-                'sprite_y': 0,
-                'sprite_w': 16,
-                'sprite_h': 16,
-                'char_type': char_type  # Adiciona o tipo de personagem
-            }
+            char_type = 'knight' if player_id == '1' else 'mage'
+        
+            self.players[player_id] = PlayerRecord(
+                int(player_id),
+                100 - 50*(int(player_id) -1),
+                (self.ground_level * self.tile_size) - PlayerRecord.height,
+                pyxel.COLOR_GRAY,
+                char_type
+            )
+    
+    def _free_player_id(self) -> str:
+        """Menor ID livre, sem reaproveitar slots de sessões suspensas"""
+        taken = self.sessions.player_ids()
+        player_id = 1
+        while str(player_id) in taken:
+            player_id += 1
+        return str(player_id)
+    
+    def _reap_sessions(self):
+        """Tira da simulação jogadores sem heartbeat e descarta sessões vencidas"""
+        suspended, expired = self.sessions.reap()
+        with self.lock:
+            for session in suspended:
+                session.player = self.players.pop(session.player_id, None)
+                print(f"Jogador {session.player_id} sem resposta, sessão suspensa")
+        for session in expired:
+            self.session_limiter.forget(session.token)
+            print(f"Sessão do jogador {session.player_id} expirou")
+    
+    def _resume_session(self, session, addr) -> Dict:
+        """Reassocia a sessão ao endereço e devolve o slot do jogador com um keyframe"""
+        self.sessions.bind(session, addr)
+        self.sessions.touch(session)
+        if not session.active:
+            with self.lock:
+                if session.player is not None:
+                    self.players[session.player_id] = session.player
+                    session.player = None
+            session.active = True
+            print(f"Jogador {session.player_id} retomou a sessão")
+        
+        return {
+            'status': 'ok',
+            'player_id': session.player_id,
+            'token': session.token,
+            'game_state': self.game_state.name,
+            'data': self.get_game_state()
+        }
     
     def update_player_action(self, player_id: str, action: str, value: bool):
         """Atualiza o estado de uma ação do jogador"""
@@ -110,172 +223,199 @@ class GameServer(multiprocessing.Process):
                 return
                 
             player = self.players[player_id]
-            ground_y = self.ground_level * self.tile_size
-            
-            # Garante que as chaves essenciais existam
-            if 'is_ducking' not in player:
-                player['is_ducking'] = False
-            if 'is_jumping' not in player:
-                player['is_jumping'] = False
-            if 'has_double_jump' not in player:
-                player['has_double_jump'] = True
-            
 
             if action == 'jump':
-                if not player['is_jumping'] and not player['is_ducking']:
-                    player['is_jumping'] = True
-                    player['jump_velocity'] = -10 * self.speed_multiplier
-                elif player['has_double_jump']:
-                    player['jump_velocity'] = -10 * self.speed_multiplier
-                    player['has_double_jump'] = False
+                if not player.is_jumping and not player.is_ducking:
+                    player.is_jumping = True
+                    player.jump_velocity = -10 * self.speed_multiplier
+                elif player.has_double_jump:
+                    player.jump_velocity = -10 * self.speed_multiplier
+                    player.has_double_jump = False
                     
             elif action == 'duck':
-                if value == player['is_ducking']:
+                if value == player.is_ducking:
                     return
                     
-                if not player['is_jumping']:
+                if not player.is_jumping:
                     if value:
-                        player['y'] += (player['height'] - player['duck_height'])
+                        player.y += (player.height - player.duck_height)
                     else:
-                        player['y'] -= (player['height'] - player['duck_height'])
+                        player.y -= (player.height - player.duck_height)
                 
-                player['is_ducking'] = value
+                player.is_ducking = value
     
-    def update_game_state(self, dt: float):
-        """Atualiza o estado do jogo"""
-        if self.game_state != GameState.PLAYING:
+    def update_game_state(self, elapsed: float):
+        """Converte o tempo real decorrido em ticks fixos e executa a simulação"""
+        # Em lockstep cada cliente simula a partida; o servidor só repassa inputs
+        if self.game_state != GameState.PLAYING or self.netcode != 'server':
             return
-            
+        
+        steps = self.timestep.advance(elapsed)
         with self.lock:
-            # Ajusta o dt para evitar saltos grandes
-            dt = min(dt, 0.033)
-            adjusted_dt = dt * self.speed_multiplier
-            
-            # Atualiza velocidade e pontuação
-            current_time = time.time()
-            if current_time - self.start_time > 10:
-                self.speed_multiplier += 0.05
-                self.start_time = current_time
-            
-            self.score += 2 * adjusted_dt
-            
-            # Atualiza scroll do jogo
-            self.scroll_x += self.game_speed * self.speed_multiplier * dt * 60
-            
-            # Atualiza jogadores
-            ground_y = self.ground_level * self.tile_size
-            for player in self.players.values():
-                if player['is_jumping']:
-                    player['y'] += player['jump_velocity'] * dt * 60
-                    player['jump_velocity'] += 0.6 * self.speed_multiplier * dt * 60
-                    
-                    if player['y'] + (player['duck_height'] if player['is_ducking'] else player['height']) >= ground_y:
-                        player['y'] = ground_y - (player['duck_height'] if player['is_ducking'] else player['height'])
-                        player['is_jumping'] = False
-                        player['jump_velocity'] = 0
-                        player['has_double_jump'] = True
+            for _ in range(steps):
+                self.step()
+                if self.game_state != GameState.PLAYING:
+                    break
+    
+    def step(self):
+        """Avança a simulação exatamente um tick (determinístico, sem relógio)"""
+        scale = self.timestep.scale
+        tick_rate = self.timestep.tick_rate
+        
+        # Atualiza velocidade e pontuação
+        self.ramp_ticks += 1
+        if self.ramp_ticks >= SPEED_RAMP_SECONDS * tick_rate:
+            self.speed_multiplier += 0.05
+            self.ramp_ticks = 0
+        
+        self.score += 2 * self.speed_multiplier / tick_rate
+        
+        # Atualiza scroll do jogo
+        self.scroll_x += self.game_speed * self.speed_multiplier * scale
+        
+        # Atualiza jogadores
+        ground_y = self.ground_level * self.tile_size
+        frame_ticks = 0.1 * tick_rate / self.speed_multiplier
+        frame_count = len(self.animation_frames)
+        gravity = 0.6 * self.speed_multiplier * scale
+        start_y = [player.y for player in self.players.values()]
+        for player in self.players.values():
+            # Laço quente: testa os bits de flags direto, sem as properties
+            flags = player.flags
+            if flags & FLAG_JUMPING:
+                player.y += player.jump_velocity * scale
+                player.jump_velocity += gravity
                 
-                # Atualiza animação
-                player['animation_time'] += dt
-                if player['animation_time'] >= (0.1 / self.speed_multiplier):
-                    player['animation_time'] = 0
-                    player['current_frame'] = (player['current_frame'] + 1) % len(self.animation_frames)
-                    
-                    # Atualiza o frame do sprite
-                    frame = player['current_frame']
-                    player['sprite_x'], player['sprite_y'], player['sprite_w'], player['sprite_h'] = self.animation_frames[frame]
+                hitbox_height = player.duck_height if flags & FLAG_DUCKING else player.height
+                if player.y + hitbox_height >= ground_y:
+                    player.y = ground_y - hitbox_height
+                    player.flags = (flags & ~FLAG_JUMPING) | FLAG_DOUBLE_JUMP
+                    player.jump_velocity = 0
             
-            # Atualiza obstáculos
-            self._update_obstacles(adjusted_dt)
-            
-            # Verifica colisões
-            if self._check_collisions():
-                self.game_state = GameState.GAME_OVER
+            # Atualiza animação (o sprite é derivado do frame no snapshot)
+            player.animation_ticks += 1
+            if player.animation_ticks >= frame_ticks:
+                player.animation_ticks = 0
+                player.current_frame = (player.current_frame + 1) % frame_count
+        
+        # Atualiza obstáculos
+        move = self._update_obstacles()
+        
+        # Verifica colisões ao longo de todo o movimento do tick
+        if self._check_collisions(start_y, move):
+            self.game_state = GameState.GAME_OVER
     
-    def _update_obstacles(self, dt: float):
-        """Atualiza obstáculos existentes e gera novos"""
+    def _update_obstacles(self) -> float:
+        """Atualiza obstáculos existentes e gera novos; retorna o deslocamento do tick"""
+        # Obstáculos e spawn correm em "ticks ajustados" pela velocidade da partida
+        advance = self.speed_multiplier
+        tick_rate = self.timestep.tick_rate
+        
         # Remove obstáculos fora da tela
-        self.obstacles = [obs for obs in self.obstacles if obs['x'] + obs['width'] > -50]
+        self.obstacles = [obs for obs in self.obstacles if obs.x + OBSTACLE_TYPES[obs.type_id].width > -50]
         
         # Atualiza posição e animação dos obstáculos
+        move = self.game_speed * self.speed_multiplier * advance * self.timestep.scale
         for obstacle in self.obstacles:
-            obstacle['x'] -= self.game_speed * self.speed_multiplier * dt * 60
+            obstacle.x -= move
             
-            obstacle['animation_time'] += dt
-            if (obstacle['animation_time'] >= self.obstacle_types[obstacle['type']]['animation_speed']):
-                obstacle['animation_time'] = 0
-                obstacle['current_frame'] = (obstacle['current_frame'] + 1) % len(self.obstacle_types[obstacle['type']]['animation_frames'])
+            obstacle_type = OBSTACLE_TYPES[obstacle.type_id]
+            obstacle.animation_ticks += advance
+            if obstacle.animation_ticks >= obstacle_type.animation_speed * tick_rate:
+                obstacle.animation_ticks = 0
+                obstacle.current_frame = (obstacle.current_frame + 1) % len(obstacle_type.animation_frames)
         
         # Gera novos obstáculos
-        self.spawn_timer += dt
-        if self.spawn_timer >= (self.spawn_interval / (self.speed_multiplier ** 0.8)):
+        self.spawn_timer += advance
+        if self.spawn_timer >= (self.spawn_interval * tick_rate / (self.speed_multiplier ** 0.8)):
             self.spawn_timer = 0
-            if random.random():
-                obstacle_type = 'skeleton' if random.random() > 0.3 else 'diabrete'
-                if obstacle_type == 'skeleton':
-                    self.obstacles.append({
-                        'x': self.screen_width,
-                        'y': (self.ground_level * self.tile_size) - self.obstacle_types['skeleton']['height'],
-                        'width': self.obstacle_types['skeleton']['width'],
-                        'height': self.obstacle_types['skeleton']['height'],
-                        'type': 'skeleton',
-                        'current_frame': 0,
-                        'animation_time': 0,
-                        'animation_frames': self.obstacle_types['skeleton']['animation_frames']
-                    })
-                else:
-                    self.obstacles.append({
-                        'x': self.screen_width,
-                        'y': (self.ground_level * self.tile_size) - self.obstacle_types['diabrete']['height'],
-                        'width': self.obstacle_types['diabrete']['width'],
-                        'height': self.obstacle_types['diabrete']['height'],
-                        'type': 'diabrete',
-                        'current_frame': 0,
-                        'animation_time': 0,
-                        'animation_frames': [self.obstacle_types['diabrete']['animation_frames']]
-                    })
-    
-    def _check_collisions(self) -> bool:
-        """Verifica colisões entre jogadores e obstáculos"""
-        for player in self.players.values():
-            player_rect = (
-                player['x'],
-                player['y'] + (player['height'] - (player['duck_height'] if player['is_ducking'] else player['height'])),
-                player['width'],
-                player['duck_height'] if player['is_ducking'] else player['height']
-            )
+            if self.rng.random():
+                type_id = SKELETON if self.rng.random() > 0.3 else DIABRETE
+                self.obstacles.append(ObstacleRecord(
+                    self.next_obstacle_id,
+                    type_id,
+                    self.screen_width,
+                    (self.ground_level * self.tile_size) - OBSTACLE_TYPES[type_id].height
+                ))
+                self.next_obstacle_id += 1
+        
+        return move
+    
+    def _check_collisions(self, start_y: List[float], move: float) -> bool:
+        """Verifica colisões entre jogadores e obstáculos durante o tick inteiro.
+        
+        Testa o movimento (swept AABB), não só as posições finais: em ticks
+        longos (20-30 Hz) ou em alta velocidade um esqueleto de 10 px anda mais
+        que a largura do jogador por tick e atravessaria sem sobreposição.
+        Quando as caixas se tocam, as máscaras de pixel dos sprites decidem."""
+        obstacle_rects = []
+        for obs in self.obstacles:
+            obstacle_type = OBSTACLE_TYPES[obs.type_id]
+            hitbox = obstacle_type.hitbox
+            if hitbox is None:
+                obstacle_rects.append((obs.x, obs.y, obstacle_type.width, obstacle_type.height))
+            else:
+                obstacle_rects.append((obs.x + hitbox[0], obs.y + hitbox[1], hitbox[2], hitbox[3]))
+        
+        # Broad phase com as caixas que cobrem o deslocamento de cada um no tick
+        broad = SweepAndPrune([swept_rect(rect, move, 0) for rect in obstacle_rects])
+        players = list(self.players.values())
+        player_moves = []
+        player_masks = []
+        swept_players = []
+        for player, y0 in zip(players, start_y):
+            ducking = player.flags & FLAG_DUCKING
+            masks = self.player_masks.get(player.char_type)
+            if masks is None:
+                hitbox_height = player.duck_height if ducking else player.height
+                end_rect = (player.x, player.y + (player.height - hitbox_height), player.width, hitbox_height)
+                player_masks.append(None)
+            else:
+                frames, hitbox = masks[2:] if ducking else masks[:2]
+                end_rect = (player.x + hitbox[0], player.y + hitbox[1], hitbox[2], hitbox[3])
+                player_masks.append(frames[player.current_frame % len(frames)])
+            dy = player.y - y0
+            player_moves.append((end_rect, dy))
+            swept_players.append(swept_rect(end_rect, 0, -dy))
+        
+        # Narrow phase: instante de impacto com o movimento relativo do par
+        for player_index, obstacle_index in broad.query_many(swept_players):
+            (x, y, w, h), dy = player_moves[player_index]
+            ox, oy, ow, oh = obstacle_rects[obstacle_index]
+            impact = time_of_impact((x, y - dy, w, h), (0.0, dy), (ox + move, oy, ow, oh), (-move, 0.0))
+            if impact is None:
+                continue
             
-            for obstacle in self.obstacles:
-                obstacle_rect = (
-                    obstacle['x'],
-                    obstacle['y'],
-                    obstacle['width'],
-                    obstacle['height']
-                )
-                
-                if self._check_rect_collision(player_rect, obstacle_rect):
+            obstacle = self.obstacles[obstacle_index]
+            obstacle_masks = OBSTACLE_TYPES[obstacle.type_id].masks
+            player_mask = player_masks[player_index]
+            if player_mask is None or obstacle_masks is None:
+                return True
+            obstacle_mask = obstacle_masks[obstacle.current_frame % len(obstacle_masks)]
+            
+            # Percorre o resto do tick a passos de no máximo 1 px de movimento relativo
+            player = players[player_index]
+            steps = max(1, math.ceil(max(abs(move), abs(dy)) * (1 - impact)))
+            for step in range(steps + 1):
+                remaining = (1 - impact) * (1 - step / steps)
+                if masks_overlap(player_mask, player.x, player.y - dy * remaining,
+                                 obstacle_mask, obstacle.x + move * remaining, obstacle.y):
                     return True
         return False
     
-    def _check_rect_collision(self, rect1: Tuple, rect2: Tuple) -> bool:
-        """Verifica colisão entre dois retângulos"""
-        return (rect1[0] < rect2[0] + rect2[2] and
-                rect1[0] + rect1[2] > rect2[0] and
-                rect1[1] < rect2[1] + rect2[3] and
-                rect1[1] + rect1[3] > rect2[1])
-    
     def start_game(self):
         """Inicia o jogo"""
         with self.lock:
             if self.game_state == GameState.LOBBY and len(self.players) > 0:
                 self.game_state = GameState.PLAYING
-                self.start_time = time.time()
+                self.timestep.reset()
+                self.ramp_ticks = 0
     
     def set_player_ready(self, player_id: str, ready: bool):
         """Define se um jogador está pronto"""
         with self.lock:
             if player_id in self.players:
-                self.players[player_id]['ready'] = ready
+                self.players[player_id].ready = ready
     
     
     def get_lobby_state(self) -> Dict:
@@ -284,8 +424,8 @@ class GameServer(multiprocessing.Process):
             players_data = {}
             for player_id, player in self.players.items():
                 players_data[player_id] = {
-                    'color': player.get('color', random.randint(1, 15)),
-                    'ready': player.get('ready', False),
+                    'color': player.color,
+                    'ready': player.ready,
                     'name': f"Player {player_id}"  # Nome padrão
                 }
 
@@ -293,6 +433,7 @@ class GameServer(multiprocessing.Process):
                 'players': players_data,
                 'game_state': self.game_state.name,
                 'map_seed': self.map_seed,
+                'netcode': self.netcode,
                 'server_time': time.time(),
                 'player_count': len(self.players)
             }
@@ -300,24 +441,10 @@ class GameServer(multiprocessing.Process):
     def get_game_state(self) -> Dict:
         """Retorna o estado completo do jogo garantindo todas as chaves necessárias"""
         with self.lock:
-            # Garante que todos os jogadores tenham a estrutura mínima necessária
-            players_data = {}
-            for player_id, player in self.players.items():
-                players_data[player_id] = {
-                    'x': player.get('x', 100),
-                    'y': player.get('y', (self.ground_level * self.tile_size) - 20),
-                    'width': player.get('width', 15),
-                    'height': player.get('height', 20),
-                    'duck_height': player.get('duck_height', 10),
-                    'is_ducking': player.get('is_ducking', False),
-                    'is_jumping': player.get('is_jumping', False),
-                    'color': player.get('color', random.randint(1, 15)),
-                    'current_frame': player.get('current_frame', 0),
-                    'sprite_x': player.get('sprite_x', 0),
-                    'sprite_y': player.get('sprite_y', 0),
-                    'sprite_w': player.get('sprite_w', 16),
-                    'sprite_h': player.get('sprite_h', 16)
-                }
+            players_data = {
+                player_id: player.to_snapshot(self.animation_frames)
+                for player_id, player in self.players.items()
+            }
 
             return {
                 'players': players_data,
@@ -329,10 +456,120 @@ class GameServer(multiprocessing.Process):
                 'ground_level': self.ground_level,
                 'screen_width': self.screen_width,
                 'screen_height': self.screen_height,
+                'tick': self.timestep.tick,
                 'timestamp': time.time(),  # Para debug
-                'obstacles': self.obstacles,
+                'obstacles': [obstacle.to_snapshot() for obstacle in self.obstacles],
+            }
+        
+    def export_room(self) -> bytes:
+        """Serializa o estado autoritativo completo da sala para migração"""
+        with self.lock:
+            room = {
+                'game_state': self.game_state.name,
+                'players': {player_id: player.to_list() for player_id, player in self.players.items()},
+                'obstacles': [obstacle.to_list() for obstacle in self.obstacles],
+                'next_obstacle_id': self.next_obstacle_id,
+                'scroll_x': self.scroll_x,
+                'speed_multiplier': self.speed_multiplier,
+                'score': self.score,
+                'spawn_timer': self.spawn_timer,
+                'tick': self.timestep.tick,
+                'ramp_ticks': self.ramp_ticks,
+                'map_seed': self.map_seed,
+                'rng': room_migration.pack_rng_state(self.rng)
             }
+        room['sessions'] = [
+            {
+                'token': session.token,
+                'player_id': session.player_id,
+                'addr': list(session.addr),
+                'active': session.active,
+                'player': session.player.to_list() if session.player is not None else None
+            }
+            for session in self.sessions.by_token.values()
+        ]
+        return room_migration.encode_room(room)
+    
+    def import_room(self, blob: bytes, source_host: str, mac: bytes) -> bool:
+        """Restaura uma sala exportada por outro servidor (apenas em servidor vazio)"""
+        # Autentica antes de descomprimir: blobs de estranhos nem chegam ao zlib
+        if not self._is_migration_authorized(blob, mac, source_host):
+            print(f"Migração recusada de {source_host}: não autorizada")
+            return False
+        room = room_migration.decode_room(blob)
         
+        with self.lock:
+            if self.players or len(self.sessions):
+                print("Migração recusada: servidor já hospeda uma partida")
+                return False
+            
+            self.game_state = GameState[room['game_state']]
+            self.players = {player_id: PlayerRecord.from_list(data)
+                            for player_id, data in room['players'].items()}
+            self.obstacles = [ObstacleRecord.from_list(data) for data in room['obstacles']]
+            self.next_obstacle_id = room['next_obstacle_id']
+            self.scroll_x = room['scroll_x']
+            self.speed_multiplier = room['speed_multiplier']
+            self.score = room['score']
+            self.spawn_timer = room['spawn_timer']
+            self.timestep.tick = room['tick']
+            self.ramp_ticks = room['ramp_ticks']
+            self.map_seed = room['map_seed']
+            self.rng = room_migration.unpack_rng_state(room['rng'])
+        
+        for data in room['sessions']:
+            player = PlayerRecord.from_list(data['player']) if data['player'] is not None else None
+            self.sessions.restore(data['token'], data['player_id'], tuple(data['addr']),
+                                  data['active'], player)
+        print(f"Sala recebida de {source_host} com {len(self.players)} jogador(es)")
+        return True
+    
+    def _is_admin(self, key: Optional[str], host: str) -> bool:
+        """Comandos de administração exigem a chave, ou origem local se não houver chave"""
+        if self.admin_key:
+            return key == self.admin_key
+        return host in ('127.0.0.1', 'localhost')
+    
+    def _is_migration_authorized(self, blob: bytes, mac: bytes, host: str) -> bool:
+        """Blob assinado com a chave de administração, ou origem local se não houver chave"""
+        if not room_migration.verify(self.admin_key, blob, mac):
+            return False
+        return bool(self.admin_key) or host in ('127.0.0.1', 'localhost')
+    
+    def _migrate(self, host: str, port: int) -> bool:
+        """Transfere a sala e passa a redirecionar os clientes para o destino"""
+        with self.request_lock:
+            if self.redirect is not None or self.migrating:
+                return False
+            self.migrating = True
+            blob = self.export_room()
+        
+        # Envio bloqueante fora do lock: o transporte local continua atendendo
+        sent = room_migration.send_room(host, port, blob, self.admin_key)
+        with self.request_lock:
+            self.migrating = False
+            if sent:
+                self.redirect = (host, port)
+        if sent:
+            print(f"Sala migrada para {host}:{port}, redirecionando clientes")
+        return sent
+    
+    def _migration_loop(self, listener: socket.socket):
+        """Recebe salas de outros servidores em uma thread própria, fora do loop de ticks"""
+        while True:
+            try:
+                conn, addr = listener.accept()
+            except OSError:
+                return
+            with conn:
+                try:
+                    mac, blob = room_migration.receive_room(conn)
+                    with self.request_lock:
+                        accepted = self.import_room(blob, addr[0], mac)
+                    room_migration.acknowledge(conn, accepted)
+                except (OSError, ValueError, KeyError, TypeError, IndexError) as e:
+                    print(f"Falha ao receber sala de {addr[0]}: {e}")
+    
     def run(self):
         """Executa o servidor com tratamento de porta em uso"""
         with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
@@ -340,7 +577,7 @@ class GameServer(multiprocessing.Process):
             sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             
             # Tenta vincular à porta, se falhar tenta portas próximas
-            port = PORT
+            port = self.port
             max_attempts = 5
             for attempt in range(max_attempts):
                 try:
@@ -353,71 +590,197 @@ class GameServer(multiprocessing.Process):
                         print(f"Porta {port-1} em uso, tentando {port}...")
                         continue
                     raise e
+            self.port = port
+            self.sock = sock
+            
+            listener = room_migration.open_listener(port)
+            if listener is not None:
+                threading.Thread(target=self._migration_loop, args=(listener,), daemon=True).start()
             
             last_update = time.time()
+            last_reap = last_update
+            self.budget = MAX_PACKETS_PER_TICK
             
             while True:
-                try:
-                    data, addr = sock.recvfrom(BUFFER_SIZE)
-                    request = json.loads(data.decode())
-                    
-                    response = {'status': 'ok', 'data': None}  # Estrutura base
-                    command = request.get('command')
-                    
-                    if request.get('command') == 'get_lobby':
-                        response['data'] = self.get_lobby_state()
-                        
-                    
-                    if command == 'join':
-                        player_id = str(len(self.players) + 1)
-                        self.add_player(player_id)
-                        response = {'status': 'ok', 'player_id': player_id}
-                    
-                    elif command == 'get_lobby':
-                        response = {'status': 'ok', 'data': self.get_lobby_state()}
-                    
-                    elif command == 'get_game':
-                        response = {'status': 'ok', 'data': self.get_game_state()}
-                    
-                    elif command == 'player_action':
-                        player_id = request['player_id']
-                        action = request['action']
-                        value = request['value']
-                        self.update_player_action(player_id, action, value)
-                        response = {'status': 'ok'}
-                    
-                    elif command == 'set_ready':
-                        player_id = request['player_id']
-                        ready = request['ready']
-                        self.set_player_ready(player_id, ready)
-                        response = {'status': 'ok'}
-                    
-                    elif command == 'start_game':
-                        self.start_game()
-                        response = {'status': 'ok'}
-                    
-                    else:
-                        response = {'status': 'error', 'message': 'Comando inválido'}
-                    
-                    sock.sendto(json.dumps(response).encode(), addr)
-                    
-                    # Atualiza o jogo a 60 FPS
-                    current_time = time.time()
-                    if current_time - last_update >= 1/60:
+                tick_interval = self.timestep.dt
+                timeout = max(0.001, last_update + tick_interval - time.time())
+                readable, _, _ = select.select([sock], [], [], timeout)
+                
+                if sock in readable:
+                    try:
+                        data, addr = sock.recvfrom(BUFFER_SIZE)
+                        self._handle_packet(sock, data, addr)
+                    except OSError as e:
+                        print(f"Erro no socket do servidor: {e}")
+                
+                # Avança os ticks acumulados (a sala para aqui depois de migrada,
+                # mas o orçamento continua renovando para responder os redirects)
+                current_time = time.time()
+                if current_time - last_update >= tick_interval:
+                    if self.redirect is None:
                         self.update_game_state(current_time - last_update)
-                        last_update = current_time
+                    last_update = current_time
+                    self.budget = MAX_PACKETS_PER_TICK
                 
-                except Exception as e:
-                    print(f"Erro no servidor: {e}")
+                if current_time - last_reap >= 1:
+                    self._reap_sessions()
+                    self.address_limiter.prune()
+                    self.session_limiter.prune()
+                    self._log_drops()
+                    last_reap = current_time
+    
+    def _handle_packet(self, sock: socket.socket, data: bytes, addr):
+        """Filtra o datagrama antes de decodificar e responde ao remetente"""
+        self.stats['received'] += 1
+        
+        # Rejeições baratas: nada aqui decodifica o pacote. O limite por
+        # endereço vem antes do orçamento do tick, então um endereço que
+        # inunda o servidor não gasta o orçamento dos outros. Descartes são
+        # silenciosos: o endereço de origem pode ser forjado (reflexão)
+        if len(data) > MAX_PACKET_SIZE:
+            self.stats['oversize'] += 1
+            return
+        if not self.address_limiter.allow(addr):
+            self.stats['throttled_address'] += 1
+            return
+        if self.budget <= 0:
+            self.stats['over_budget'] += 1
+            return
+        self.budget -= 1
+        
+        # Inputs do lockstep são binários e repassados sem decodificar JSON
+        if data[:1] == lockstep.LOCKSTEP_MAGIC:
+            self.relay_inputs(data, addr)
+            return
+        
+        try:
+            request = json.loads(data.decode())
+            if not isinstance(request, dict):
+                raise ValueError("requisição não é um objeto")
+            response = self.handle_request(request, addr)
+        except (ValueError, KeyError, TypeError):
+            self.stats['malformed'] += 1
+            return
+        except Exception as e:
+            # Falha inesperada do servidor, não do pacote: continua visível no log
+            self.stats['errors'] += 1
+            print(f"Erro no servidor: {e}")
+            return
+        
+        sock.sendto(json.dumps(response).encode(), addr)
+    
+    def relay_inputs(self, packet: bytes, addr):
+        """Repassa o pacote de inputs de uma sessão aos outros jogadores da sala"""
+        token, forward = lockstep.strip_token(packet)
+        with self.request_lock:
+            session = self.sessions.by_token.get(token)
+            if session is None or not session.active or self.netcode == 'server':
+                self.stats['malformed'] += 1
+                return
+            session.input_addr = addr
+            self.sessions.touch(session)
+            targets = [other.input_addr for other in self.sessions.by_token.values()
+                       if other is not session and other.active and other.input_addr is not None]
+        
+        for target in targets:
+            if target == LOCAL_ADDRESS:
+                self.local_inputs.append(forward)
+            else:
+                self.sock.sendto(forward, target)
+    
+    def _log_drops(self):
+        """Resume os descartes do último período em vez de imprimir por pacote"""
+        dropped = {key: value for key, value in self.stats.items() if key != 'received' and value}
+        if dropped:
+            print(f"Pacotes descartados ({self.stats['received']} recebidos): {dropped}")
+            for key in self.stats:
+                self.stats[key] = 0
+    
+    def handle_request(self, request: Dict, addr) -> Dict:
+        """Ponto de entrada comum do socket UDP e do transporte local"""
+        if request.get('command') == 'migrate':
+            # A migração trava o request_lock só nas partes curtas (ver _migrate)
+            if not self._is_admin(request.get('admin_key'), addr[0]):
+                return {'status': 'error', 'message': 'Não autorizado'}
+            if not self._migrate(request['host'], int(request['port'])):
+                return {'status': 'error', 'message': 'Falha na migração'}
+            return {'status': 'ok'}
+        with self.request_lock:
+            return self._handle_request(request, addr)
+    
+    def _handle_request(self, request: Dict, addr) -> Dict:
+        """Roteia o pacote pela sessão do remetente e executa o comando"""
+        command = request.get('command')
+        
+        # Sala já migrada: o cliente retoma a sessão no novo servidor
+        if self.redirect is not None:
+            return {'status': 'redirect', 'host': self.redirect[0], 'port': self.redirect[1]}
+        
+        session = self.sessions.lookup(addr, request.get('token'))
+        if session is not None:
+            if not session.active and command != 'resume':
+                return {'status': 'error', 'message': SESSION_EXPIRED, 'resume': True}
+            if addr != LOCAL_ADDRESS and not self.session_limiter.allow(session.token):
+                self.stats['throttled_session'] += 1
+                return {'status': 'error', 'message': 'Limite de requisições excedido'}
+            self.sessions.touch(session)
+        
+        if command == 'join':
+            if len(self.sessions) >= MAX_PLAYERS:
+                self.stats['joins_rejected'] += 1
+                return {'status': 'error', 'message': 'O jogo já atingiu o número máximo de jogadores (2)'}
+            if not self.join_bucket.consume(time.monotonic()):
+                self.stats['joins_rejected'] += 1
+                return {'status': 'error', 'message': 'Servidor ocupado, tente novamente'}
+            player_id = self._free_player_id()
+            self.add_player(player_id)
+            session = self.sessions.create(player_id, addr)
+            return {'status': 'ok', 'player_id': player_id, 'token': session.token}
+        
+        if command == 'resume':
+            if session is None:
+                return {'status': 'error', 'message': SESSION_EXPIRED}
+            return self._resume_session(session, addr)
+        
+        if session is not None and session.addr != addr:
+            self.sessions.bind(session, addr)
+        
+        # Consultas de estado não exigem sessão (espectadores e relays)
+        if command == 'get_lobby':
+            return {'status': 'ok', 'data': self.get_lobby_state()}
+        
+        if command == 'get_game':
+            return {'status': 'ok', 'data': self.get_game_state()}
+        
+        if command not in ('heartbeat', 'player_action', 'set_ready', 'start_game'):
+            return {'status': 'error', 'message': 'Comando inválido'}
+        
+        if session is None or not session.active:
+            return {'status': 'error', 'message': SESSION_EXPIRED, 'resume': True}
+        
+        if command == 'player_action':
+            self.update_player_action(session.player_id, request['action'], request['value'])
+        elif command == 'set_ready':
+            self.set_player_ready(session.player_id, request['ready'])
+        elif command == 'start_game':
+            self.start_game()
+        
+        return {'status': 'ok'}
 
 class GameClient:
-    def __init__(self, is_host=False, server_ip='localhost'):
+    def __init__(self, is_host=False, server_ip='localhost', server_port=PORT, spectator=False,
+                 netcode='server'):
         self.is_host = is_host
         self.server_ip = server_ip
+        self.server_port = server_port
+        self.spectator = spectator
         self.player_id = None
+        self.token = None
         self.game_state = GameState.LOBBY
         self.local_state = {}
         self.map_seed = None
+        self.netcode = netcode
+        self.lockstep = None  # Sessão de lockstep criada no início da partida
         self.tile_size = 16
         self.screen_width = 320
         self.ground_level = 14
@@ -425,17 +788,19 @@ class GameClient:
         
         # Configurações do mapa
         self.map_width = 100  # Número de tiles horizontais no mapa
-        self.background_buffer = []  # Lista de tuplas (x, y, tile)
-        self.ground_buffer = []      # Lista de tuplas (x, y, tile)
-        self.last_tile = 0           # Último tile gerado 
+        self.background = ColumnRing(MAP_BUFFER_COLUMNS, self.ground_level + 1)  # Colunas de tiles
+        self.ground = ColumnRing(MAP_BUFFER_COLUMNS, 1)                         # Tile do chão por coluna
+        self.terrain = None          # Gerador de chunks da seed da sala
 
         
-        # Shared state between processes
-        self.shared_state = multiprocessing.Manager().dict()
+        # Shared state between processes (o host usa threads e dispensa o Manager)
+        self.shared_state = {} if self.is_host else multiprocessing.Manager().dict()
         self.shared_state['running'] = True
         self.shared_state['game_state'] = GameState.LOBBY.name
         self.shared_state['local_state'] = {}
         self.shared_state['map_seed'] = None
+        self.shared_state['netcode'] = netcode
+        self.shared_state['player_ids'] = []
 
         # Event for signaling updates
         self.update_event = multiprocessing.Event()
@@ -448,39 +813,34 @@ class GameClient:
         # Carrega assets
         pyxel.image(0).load(0, 0, "./assets/animations/player/banco_0.png")
         pyxel.image(1).load(0, 0, "./assets/animations/player/castle-tileset.png")
+        
+        # Fundo e chão já compostos numa imagem fora da tela
+        self.map_cache = BackgroundCache(1, self.ground_level + 1, self.screen_width)
 
         
         self.animation_frames = self._load_animations('knight')
         self.mage_animation_frames = self._load_animations('mage')
         
-        self._generate_initial_map()
-        
-        self.obstacle_sprites = {
-            'skeleton': [
-                (0, 96, 10, 12),  # Frame 1
-                (17, 94, 10, 14)    # Frame 2
-            ],
-            'diabrete': [
-                    (0, 114, 10, 11),  # Frame 1
-                    (17, 113, 10, 12)   # Frame 2
-                ]
-        }
-        
-        # Se for host, inicia o servidor em um processo separado
+        # Se for host, o servidor roda em uma thread deste processo e o jogador
+        # local fala com ele diretamente; os remotos continuam usando UDP
         if self.is_host:
-            self.server_process = GameServer()
-            self.server_process.start()
-            time.sleep(1)  # Espera o servidor iniciar
+            self.server = GameServer(netcode=netcode)
+            self.server_thread = threading.Thread(target=self.server.run, daemon=True)
+            self.server_thread.start()
+            self.transport = LocalTransport(self.server)
+        else:
+            self.transport = UdpTransport(self.server_ip, self.server_port, BUFFER_SIZE)
         
         # Conecta ao servidor
-        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self._join_server()
+        if not self.spectator:
+            self._connect()
         
-        # Processo para receber atualizações do servidor
-        self.update_process = multiprocessing.Process(
-            target=self._update_loop, 
-            daemon=True
-        )
+        # Processo (ou thread, no host) para receber atualizações do servidor
+        update_target = self._spectate_loop if self.spectator else self._update_loop
+        if self.is_host:
+            self.update_process = threading.Thread(target=update_target, daemon=True)
+        else:
+            self.update_process = multiprocessing.Process(target=update_target, daemon=True)
         self.update_process.start()
         
         # Inicia o loop do jogo
@@ -501,56 +861,46 @@ class GameClient:
                     tmp.append((x, y, w, h))
         return tmp
 
-    def _generate_initial_map(self):
-        """Gera o segmento inicial do mapa"""
-        visible_width = 20
-        for x in range(0, visible_width * 2):
-            # Background
-            for y in range(self.ground_level + 1):  # +1 para incluir o ground_level
-                tile = random.choice([0, 1]) if y < self.ground_level else 1
-                self.background_buffer.append((x, y, tile))
-            
-            # Chão
-            self.ground_buffer.append((x, self.ground_level, 4))
-        
-        self.last_tile = visible_width * 2 - 1
+    def _reset_map(self, first_column: int = 0):
+        """Recomeça o mapa a partir da seed da sala (igual em todos os clientes)"""
+        if self.terrain is None or self.terrain.map_seed != self.map_seed:
+            self.terrain = ChunkGenerator(self.map_seed, self.ground_level + 1, self.ground_level)
+        self.background.reset(first_column)
+        self.ground.reset(first_column)
+        self.map_cache.invalidate()
+
+    def _generate_columns(self, end: int):
+        """Gera localmente as colunas seguintes do mapa, até 'end' (exclusivo)"""
+        for _, column in self.terrain.columns(self.background.end, end):
+            self.background.append(column)
+            self.ground.append(GROUND_COLUMN)
 
     def _update_map(self, scroll_x: float):
-        """Atualiza o mapa conforme o scroll avança"""
-        if not self.local_state:
+        """Atualiza o mapa conforme o scroll avança (custo constante por frame)"""
+        if not self.local_state or self.map_seed is None:
             return
+        if self.terrain is None or self.terrain.map_seed != self.map_seed:
+            self._reset_map()
             
         tile_size = self.local_state.get('tile_size', 16)
-        current_tile = int(scroll_x / tile_size)
+        current_tile = visible_range(scroll_x, self.local_state.get('screen_width', 320), tile_size).start
+        first_column = current_tile - MAP_BEHIND_COLUMNS
+        
+        # Buffer muito atrás do scroll (ex.: entrou no meio da partida): recomeça ali
+        if self.background.end < first_column:
+            self._reset_map(first_column)
         
         # Gera novos segmentos do mapa conforme necessário
-        if current_tile > self.last_tile - 20:
-            for x in range(self.last_tile + 1, current_tile + 40):
-                # Background
-                for y in range(self.ground_level + 1):
-                    tile = random.choice([0, 1]) if y < self.ground_level else 1
-                    self.background_buffer.append((x, y, tile))
-                
-                # Chão
-                self.ground_buffer.append((x, self.ground_level, 4))
-            
-            self.last_tile = current_tile + 20
-        
-        # Remove tiles muito atrás (otimização de memória)
-        if current_tile > 50:
-            remove_threshold = current_tile - 30
-            self.background_buffer = [
-                (x, y, t) for (x, y, t) in self.background_buffer 
-                if x >= remove_threshold
-            ]
-            self.ground_buffer = [
-                (x, y, t) for (x, y, t) in self.ground_buffer 
-                if x >= remove_threshold
-            ]
+        if current_tile > self.background.end - 1 - MAP_AHEAD_COLUMNS // 2:
+            self._generate_columns(current_tile + MAP_AHEAD_COLUMNS)
+        
+        # Descarta colunas muito atrás (O(1), só move o início do buffer)
+        self.background.evict_before(first_column)
+        self.ground.evict_before(first_column)
 
     def _draw_map(self):
         """Desenha o mapa na tela"""
-        if not self.local_state:
+        if not self.local_state or self.terrain is None:
             return
             
         state = self.local_state
@@ -558,34 +908,13 @@ class GameClient:
         scroll_x = state.get('scroll_x', 0)
         screen_width = state.get('screen_width', 320)
         
-        # Desenha o background
-        for x, y, tile in self.background_buffer:
-            screen_x = x * tile_size - scroll_x
-            screen_y = y * tile_size
-            
-            # Só desenha se estiver visível ou parcialmente visível
-            if -tile_size <= screen_x <= screen_width:
-                pyxel.blt(
-                    int(screen_x), int(screen_y),
-                    1,  # Banco de imagens
-                    tile * tile_size, 0,
-                    tile_size, tile_size,
-                    pyxel.COLOR_GREEN
-                )
+        # Só as colunas que entraram na tela são compostas (uma vez cada)
+        self.map_cache.stream(visible_range(scroll_x, screen_width, tile_size),
+                              (self.background.column, 0),
+                              (self.ground.column, self.ground_level))
         
-        # Desenha o chão
-        for x, y, tile in self.ground_buffer:
-            screen_x = x * tile_size - scroll_x
-            screen_y = y * tile_size
-            
-            if -tile_size <= screen_x <= screen_width:
-                pyxel.blt(
-                    int(screen_x), int(screen_y),
-                    1,
-                    tile * tile_size, 0,
-                    tile_size, tile_size,
-                    pyxel.COLOR_GREEN
-                )
+        # Um ou dois blt largos por frame, em vez de um blt por tile
+        self.map_cache.draw(scroll_x, 0, screen_width)
         
     def _join_server(self):
         """Registra o jogador no servidor com tratamento de falhas"""
@@ -595,6 +924,8 @@ class GameClient:
             
             if response and response.get('status') == 'ok':
                 self.player_id = response['player_id']
+                self.token = response.get('token')
+                self._save_session()
                 print(f"Conectado como jogador {self.player_id}")
                 return True
             elif response and response.get('message') == 'O jogo já atingiu o número máximo de jogadores (2)':
@@ -609,38 +940,96 @@ class GameClient:
         
         print("Não foi possível conectar ao servidor")
         return False
+    
+    def _connect(self):
+        """Retoma a sessão salva deste servidor, ou entra como jogador novo"""
+        self.token = self._load_session()
+        if self.token and self._resume_session():
+            return True
+        return self._join_server()
+    
+    def _resume_session(self) -> bool:
+        """Handshake de retomada: uma ida e volta devolve o slot e um keyframe"""
+        response = self._exchange({'command': 'resume', 'token': self.token})
+        if not response or response.get('status') != 'ok':
+            self.token = None
+            return False
+        
+        self.player_id = response['player_id']
+        self._save_session()
+        if hasattr(self, 'shared_state'):
+            self.shared_state['game_state'] = response['game_state']
+            self.shared_state['local_state'] = response['data']
+        print(f"Sessão retomada como jogador {self.player_id}")
+        return True
+    
+    def _session_key(self) -> str:
+        return f"{self.server_ip}:{self.server_port}"
+    
+    def _load_session(self) -> Optional[str]:
+        """Lê o token salvo para este servidor, se houver"""
+        try:
+            with open(SESSION_FILE, "r") as f:
+                saved = json.load(f)
+            return saved.get(self._session_key()) if isinstance(saved, dict) else None
+        except (OSError, ValueError):
+            return None
+    
+    def _save_session(self):
+        """Salva o token para retomar a sessão se o cliente reiniciar.
         
+        O arquivo guarda um token por servidor: os dos outros são mantidos."""
+        try:
+            with open(SESSION_FILE, "r") as f:
+                saved = json.load(f)
+            if not isinstance(saved, dict):
+                saved = {}
+        except (OSError, ValueError):
+            saved = {}
+        saved[self._session_key()] = self.token
+        try:
+            with open(SESSION_FILE, "w") as f:
+                json.dump(saved, f)
+        except OSError as e:
+            print(f"Não foi possível salvar a sessão: {e}")
 
     def _send_request(self, request: Dict) -> Optional[Dict]:
         """Envia requisição com tratamento de timeout e reconexão"""
-        try:
-            if not isinstance(request, dict):
-                return {'status': 'error', 'message': 'Requisição inválida'}
-                
-            request['timestamp'] = time.time()
-            if hasattr(self, 'player_id') and self.player_id:
-                request['player_id'] = self.player_id
-                
-            # Tenta enviar para a porta padrão e portas próximas
-            max_port_attempts = 3
-            for port_offset in range(max_port_attempts):
-                current_port = PORT + port_offset
-                try:
-                    self.sock.sendto(json.dumps(request).encode(), (self.server_ip, current_port))
-                    self.sock.settimeout(2.0)
-                    data, _ = self.sock.recvfrom(BUFFER_SIZE)
-                    return json.loads(data.decode())
-                except socket.timeout:
-                    if port_offset == max_port_attempts - 1:
-                        return {'status': 'error', 'message': 'Timeout - servidor não respondeu'}
-                    continue
-                except ConnectionResetError:
-                    if port_offset == max_port_attempts - 1:
-                        return {'status': 'error', 'message': 'Conexão redefinida pelo servidor'}
-                    continue
-                    
-        except Exception as e:
-            return {'status': 'error', 'message': f"Erro de comunicação: {str(e)}"}
+        if not isinstance(request, dict):
+            return {'status': 'error', 'message': 'Requisição inválida'}
+            
+        request['timestamp'] = time.time()
+        if hasattr(self, 'player_id') and self.player_id:
+            request['player_id'] = self.player_id
+        if self.token:
+            request['token'] = self.token
+        
+        response = self._exchange(request)
+        
+        # Sala migrada para outro servidor: segue o redirecionamento e retoma a sessão lá
+        if response and response.get('status') == 'redirect':
+            self.server_ip, self.server_port = response['host'], response['port']
+            try:
+                self.transport.retarget(self.server_ip, self.server_port)
+            except ValueError:
+                # O host falava com o próprio servidor; o novo só é alcançável por UDP
+                self.transport.close()
+                self.transport = UdpTransport(self.server_ip, self.server_port, BUFFER_SIZE)
+            print(f"Partida migrada para {self.server_ip}:{self.server_port}")
+            if self._resume_session():
+                request['token'] = self.token
+                response = self._exchange(request)
+        
+        # Sessão suspensa (ex.: queda do Wi-Fi): retoma e repete o pedido
+        if response and response.get('resume') and not self.spectator:
+            if self._resume_session() or self._join_server():
+                request['token'] = self.token
+                response = self._exchange(request)
+        return response
+
+    def _exchange(self, request: Dict) -> Optional[Dict]:
+        """Uma ida e volta com o servidor pelo transporte atual"""
+        return self.transport.request(request)
 
     def _validate_response(self, response: Dict, required_keys: List[str]) -> bool:
         """Valida se a resposta contém todas as chaves necessárias"""
@@ -673,28 +1062,77 @@ class GameClient:
                     new_seed = lobby_response['data']['map_seed']
                     if new_seed != self.shared_state.get('map_seed'):
                         self.shared_state['map_seed'] = new_seed
+                    self.shared_state['netcode'] = lobby_response['data'].get('netcode', 'server')
+                    self.shared_state['player_ids'] = list(lobby_response['data']['players'])
 
-                if GameState[self.shared_state['game_state']] == GameState.PLAYING:
+                # Em lockstep o estado da partida é simulado localmente
+                if (GameState[self.shared_state['game_state']] == GameState.PLAYING
+                        and self.shared_state['netcode'] == 'server'):
                     game_response = self._send_request({'command': 'get_game'})
                     if self._validate_response(game_response, ['players', 'scroll_x', 'score', 'tile_size', 'ground_level']):
                         self.shared_state['local_state'] = game_response['data']
-
+                
+                # Não adianta consultar mais rápido que o tick do servidor
+                time.sleep(1/60)
                 
             except Exception as e:
                 print(f"Erro no loop: {str(e)}")
                 time.sleep(1)
 
+    def _spectate_loop(self):
+        """Recebe os snapshots repetidos pelo relay (modo espectador)"""
+        relay_addr = (self.server_ip, self.server_port)
+        sock = self.transport.sock
+        sock.settimeout(0.5)
+        last_subscribe = 0.0
+        
+        while self.shared_state['running']:
+            try:
+                # Renova a inscrição periodicamente (o relay expira inscritos silenciosos)
+                now = time.time()
+                if now - last_subscribe >= SUBSCRIBE_INTERVAL:
+                    sock.sendto(json.dumps({'command': 'subscribe'}).encode(), relay_addr)
+                    sock.sendto(json.dumps({'command': 'get_lobby'}).encode(), relay_addr)
+                    last_subscribe = now
+                
+                data, _ = sock.recvfrom(SNAPSHOT_BUFFER_SIZE)
+                response = json.loads(data.decode())
+                payload = response.get('data')
+                if response.get('status') != 'ok' or not payload:
+                    continue
+                
+                if response.get('command') == 'snapshot':
+                    self.shared_state['game_state'] = payload.get('game_state', GameState.PLAYING.name)
+                    self.shared_state['local_state'] = payload
+                elif 'map_seed' in payload:
+                    self.shared_state['game_state'] = payload['game_state']
+                    self.shared_state['map_seed'] = payload['map_seed']
+                    
+            except socket.timeout:
+                continue
+            except Exception as e:
+                print(f"Erro no loop do espectador: {str(e)}")
+                time.sleep(1)
+
     def update(self):
         """Atualiza o estado do cliente e envia inputs para o servidor"""
         # Sync with shared state
         self.game_state = GameState[self.shared_state['game_state']]
         self.local_state = self.shared_state['local_state']
         self.map_seed = self.shared_state['map_seed']
+        self.netcode = self.shared_state['netcode']
+        
+        if self.game_state == GameState.PLAYING and self.netcode != 'server' and not self.spectator:
+            self._update_lockstep()
         
         if self.game_state == GameState.PLAYING:
             scroll_x = self.local_state.get('scroll_x', 0)
             self._update_map(scroll_x)
 
+        # Espectadores apenas assistem
+        if self.spectator:
+            return
+
         if self.game_state == GameState.LOBBY:
             if pyxel.btnp(pyxel.KEY_RETURN) and self.is_host:
                 self._send_request({'command': 'start_game'})
@@ -706,7 +1144,7 @@ class GameClient:
                     'ready': True
                 })
         
-        elif self.game_state == GameState.PLAYING:
+        elif self.game_state == GameState.PLAYING and self.netcode == 'server':
             # Envia ações do jogador para o servidor
             if pyxel.btnp(pyxel.KEY_UP) or pyxel.btnp(pyxel.KEY_SPACE):
                 self._send_request({
@@ -733,6 +1171,28 @@ class GameClient:
             #         'value': False
             #     })
 
+    def _update_lockstep(self):
+        """Modos lockstep e rollback: envia só o input do tick e simula a partida localmente"""
+        if self.lockstep is None:
+            slots = [int(player_id) for player_id in self.shared_state['player_ids']]
+            simulation = LockstepSimulation(self.map_seed, slots)
+            session_type = RollbackSession if self.netcode == 'rollback' else LockstepSession
+            self.lockstep = session_type(simulation, int(self.player_id), self.token)
+        
+        mask = 0
+        if pyxel.btnp(pyxel.KEY_UP) or pyxel.btnp(pyxel.KEY_SPACE):
+            mask |= INPUT_JUMP
+            pyxel.play(0, 0)  # Toca som de pulo
+        
+        self.transport.send_inputs(self.lockstep.add_local_input(mask))
+        for packet in self.transport.receive_inputs():
+            self.lockstep.receive(packet)
+        self.lockstep.advance()
+        
+        self.local_state = self.lockstep.simulation.to_render_state()
+        if self.lockstep.game_over:
+            self.game_state = GameState.GAME_OVER
+
     def draw(self):
         """Renderiza o jogo baseado no estado local"""
         pyxel.cls(7)  # Limpa a tela
@@ -747,6 +1207,12 @@ class GameClient:
     def _draw_lobby(self):
         """Desenha a tela de lobby"""
         pyxel.text(100, 50, "LOBBY MULTIPLAYER", 0)
+        
+        if self.spectator:
+            pyxel.text(100, 70, "Modo espectador", 0)
+            pyxel.text(100, 100, "Aguardando inicio da partida...", 8)
+            return
+        
         pyxel.text(100, 70, f"Seu ID: {self.player_id}", 0)
         
         response = self._send_request({'command': 'get_lobby'})
@@ -816,27 +1282,17 @@ class GameClient:
         
         # Desenha obstáculos
         for obstacle in self.local_state.get('obstacles', []):
-            if obstacle['type'] == 'skeleton':
-                frame = self.obstacle_sprites['skeleton'][obstacle.get('current_frame', 0)]
+            obstacle_type = OBSTACLE_TYPES[obstacle['type']]
+            current_frame = obstacle.get('current_frame', 0)
+            frame = obstacle_type.animation_frames[current_frame]
+            for x, y in obstacle_type.sprite_positions(obstacle['x'], obstacle['y'], current_frame):
                 pyxel.blt(
-                    obstacle['x'],
-                    obstacle['y'] + (obstacle['height'] - frame[3]),  # Ajusta a posição Y
+                    x, y,
                     0,  # Banco de imagens
                     frame[0], frame[1],  # u, v
                     frame[2], frame[3],  # w, h
                     pyxel.COLOR_GREEN  # Cor de transparência
                 )
-            elif obstacle['type'] == 'diabrete':
-                frame = self.obstacle_sprites['diabrete'][obstacle.get('current_frame', 0)]
-                for i in range(5):
-                    pyxel.blt(
-                        obstacle['x'] + i * (frame[2]+2),  # Desloca o sprite para a direita
-                        obstacle['y'] + (obstacle['height'] - frame[3]),
-                        0,
-                        frame[0], frame[1],
-                        frame[2], frame[3],
-                        pyxel.COLOR_GREEN
-                    )
         
         # Desenha HUD
         pyxel.text(10, 10, f"SCORE: {self.local_state.get('score', 0)}", 7)
@@ -872,19 +1328,48 @@ class GameClient:
     def __del__(self):
         """Cleanup when the client is destroyed"""
         self.shared_state['running'] = False
-        if hasattr(self, 'update_process'):
+        if hasattr(self, 'update_process') and isinstance(self.update_process, multiprocessing.Process):
             self.update_process.terminate()
-        if hasattr(self, 'server_process') and self.is_host:
-            self.server_process.terminate()
+        if hasattr(self, 'transport'):
+            self.transport.close()
 
 def main():
     import sys
     
-    if len(sys.argv) > 1:
+    if len(sys.argv) > 1 and sys.argv[1] == '--server':
+        # Nó dedicado, sem janela: --server [porta] [ticks por segundo]
+        port = int(sys.argv[2]) if len(sys.argv) > 2 else PORT
+        tick_rate = int(sys.argv[3]) if len(sys.argv) > 3 else TICK_RATE
+        server = GameServer(port, tick_rate)
+        server.start()
+        server.join()
+    elif len(sys.argv) > 5 and sys.argv[1] == '--migrate':
+        # Drena a sala de um servidor para outro: --migrate ip porta ip_destino porta_destino
+        request = {
+            'command': 'migrate',
+            'host': sys.argv[4],
+            'port': int(sys.argv[5]),
+            'admin_key': os.environ.get('CASTELO_ADMIN_KEY')
+        }
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.settimeout(5.0)
+            sock.sendto(json.dumps(request).encode(), (sys.argv[2], int(sys.argv[3])))
+            print(json.loads(sock.recvfrom(BUFFER_SIZE)[0].decode()))
+    elif len(sys.argv) > 2 and sys.argv[1] == '--spectate':
+        server_ip = sys.argv[2]
+        port = int(sys.argv[3]) if len(sys.argv) > 3 else PORT
+        print(f"Assistindo a partida via {server_ip}:{port}...")
+        client = GameClient(is_host=False, server_ip=server_ip, server_port=port, spectator=True)
+    elif len(sys.argv) > 1 and sys.argv[1] in ('--lockstep', '--rollback'):
+        # Host de partida em lockstep/rollback: os clientes trocam só inputs
+        netcode = sys.argv[1][2:]
+        print(f"Iniciando como host ({netcode})...")
+        client = GameClient(is_host=True, netcode=netcode)
+    elif len(sys.argv) > 1:
         server_ip = sys.argv[1]
         port = int(sys.argv[2]) if len(sys.argv) > 2 else PORT
         print(f"Conectando ao servidor em {server_ip}:{port}...")
-        client = GameClient(is_host=False, server_ip=server_ip)
+        client = GameClient(is_host=False, server_ip=server_ip, server_port=port)
     else:
         print("Iniciando como host...")
         client = GameClient(is_host=True)
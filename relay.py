@@ -0,0 +1,183 @@
+import socket
+import select
+import json
+import time
+import multiprocessing
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+# Constantes
+PORT = 5600
+RELAY_PORT = 5700
+BUFFER_SIZE = 65507          # Snapshots completos podem passar de 4 KB
+SUBSCRIBER_TIMEOUT = 5.0     # Espectador precisa renovar o 'subscribe' nesse intervalo
+UPSTREAM_TIMEOUT = 3.0       # Sem resposta do upstream por esse tempo -> snapshot obsoleto
+
+class SpectatorRelay(multiprocessing.Process):
+    """Assina uma única vez o fluxo de snapshots de uma partida e o repete
+    para muitos espectadores.
+
+    O upstream pode ser o próprio GameServer ou outro relay, já que o relay
+    responde aos mesmos comandos 'get_lobby' e 'get_game'. Assim os relays
+    podem ser encadeados em árvore e o custo no servidor autoritativo fica
+    constante: um 'get_game' por tick, independente do número de espectadores.
+    """
+
+    def __init__(self, upstream_ip: str, upstream_port: int = PORT,
+                 port: int = RELAY_PORT, delay: float = 0.0, poll_rate: int = 60):
+        super().__init__()
+        self.upstream = (upstream_ip, upstream_port)
+        self.port = port
+        self.delay = delay
+        self.poll_interval = 1 / poll_rate
+
+        # Histórico de snapshots (timestamp, lobby, game) para o atraso de transmissão,
+        # com folga para as duas respostas (lobby e game) de cada consulta
+        history_size = int(delay * poll_rate * 2) + 4
+        self.history: deque = deque(maxlen=history_size)
+        self.latest_lobby: Optional[Dict] = None
+        self.last_upstream_reply = 0.0
+
+        # Respostas já codificadas: cada snapshot é serializado uma única vez
+        self.published_at = 0.0
+        self.encoded_lobby: Optional[bytes] = None
+        self.encoded_game: Optional[bytes] = None
+        self.encoded_push: Optional[bytes] = None
+
+        # Espectadores inscritos para receber push: addr -> último keepalive
+        self.subscribers: Dict[Tuple[str, int], float] = {}
+
+    def _poll_upstream(self, sock: socket.socket):
+        """Pede o estado atual ao upstream (respostas chegam de forma assíncrona)"""
+        sock.sendto(json.dumps({'command': 'get_lobby'}).encode(), self.upstream)
+        if self.latest_lobby and self.latest_lobby.get('game_state') == 'PLAYING':
+            sock.sendto(json.dumps({'command': 'get_game'}).encode(), self.upstream)
+
+    def _handle_upstream(self, data: bytes):
+        """Armazena um snapshot recebido do upstream"""
+        response = json.loads(data.decode())
+        if not isinstance(response, dict):
+            raise ValueError("resposta do upstream não é um objeto")
+        if response.get('status') != 'ok' or not isinstance(response.get('data'), dict) or not response['data']:
+            return
+
+        now = time.time()
+        self.last_upstream_reply = now
+        payload = response['data']
+        if 'map_seed' in payload:
+            self.latest_lobby = payload
+            self.history.append((now, payload, None))
+        else:
+            self.history.append((now, self.latest_lobby, payload))
+
+    def _publish(self, sock: socket.socket):
+        """Seleciona o snapshot atrasado e envia para os inscritos se for novo"""
+        cutoff = time.time() - self.delay
+        while len(self.history) > 1 and self.history[1][0] <= cutoff:
+            self.history.popleft()
+        if not self.history or self.history[0][0] > cutoff:
+            return
+
+        timestamp, lobby, game = self.history[0]
+        if timestamp <= self.published_at:
+            return
+        self.published_at = timestamp
+
+        if lobby is not None:
+            self.encoded_lobby = json.dumps({'status': 'ok', 'data': lobby}).encode()
+        if game is not None:
+            self.encoded_game = json.dumps({'status': 'ok', 'data': game}).encode()
+            self.encoded_push = json.dumps(
+                {'status': 'ok', 'command': 'snapshot', 'data': game}
+            ).encode()
+
+            for addr in list(self.subscribers):
+                sock.sendto(self.encoded_push, addr)
+
+    def _handle_spectator(self, sock: socket.socket, data: bytes, addr: Tuple[str, int]):
+        """Responde a um espectador (ou relay filho) usando apenas o cache"""
+        request = json.loads(data.decode())
+        if not isinstance(request, dict):
+            raise ValueError("requisição não é um objeto")
+        command = request.get('command')
+
+        if command == 'get_lobby' and self.encoded_lobby:
+            sock.sendto(self.encoded_lobby, addr)
+        elif command == 'get_game' and self.encoded_game:
+            sock.sendto(self.encoded_game, addr)
+        elif command == 'subscribe':
+            self.subscribers[addr] = time.time()
+            sock.sendto(json.dumps({'status': 'ok'}).encode(), addr)
+        elif command == 'unsubscribe':
+            self.subscribers.pop(addr, None)
+            sock.sendto(json.dumps({'status': 'ok'}).encode(), addr)
+        elif command in ('get_lobby', 'get_game'):
+            sock.sendto(json.dumps({'status': 'error', 'message': 'Aguardando upstream'}).encode(), addr)
+        else:
+            sock.sendto(json.dumps({'status': 'error', 'message': 'Relay aceita apenas espectadores'}).encode(), addr)
+
+    def _expire_subscribers(self):
+        """Remove espectadores que pararam de renovar a inscrição"""
+        cutoff = time.time() - SUBSCRIBER_TIMEOUT
+        for addr, last_seen in list(self.subscribers.items()):
+            if last_seen < cutoff:
+                del self.subscribers[addr]
+
+    def run(self):
+        """Loop do relay: um socket para o upstream e outro para os espectadores"""
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as downstream, \
+             socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as upstream:
+            downstream.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            downstream.bind(('0.0.0.0', self.port))
+            print(f"Relay iniciado na porta {self.port} (upstream {self.upstream[0]}:{self.upstream[1]}, atraso {self.delay}s)")
+
+            next_poll = time.time()
+            next_expire = time.time() + 1
+
+            while True:
+                timeout = max(0.0, next_poll - time.time())
+                readable, _, _ = select.select([downstream, upstream], [], [], timeout)
+
+                for sock in readable:
+                    try:
+                        data, addr = sock.recvfrom(BUFFER_SIZE)
+                        if sock is upstream:
+                            self._handle_upstream(data)
+                        else:
+                            self._handle_spectator(downstream, data, addr)
+                    except (ValueError, ConnectionResetError) as e:
+                        print(f"Pacote ignorado no relay: {e}")
+
+                now = time.time()
+                if now >= next_poll:
+                    self._poll_upstream(upstream)
+                    next_poll = now + self.poll_interval
+
+                    # Sem upstream, não repete snapshot velho indefinidamente
+                    if self.last_upstream_reply and now - self.last_upstream_reply > UPSTREAM_TIMEOUT:
+                        self.encoded_game = None
+
+                self._publish(downstream)
+
+                if now >= next_expire:
+                    self._expire_subscribers()
+                    next_expire = now + 1
+
+def main():
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Uso: python relay.py <ip_upstream> [porta_upstream] [porta_relay] [atraso_s]")
+        sys.exit(1)
+
+    upstream_ip = sys.argv[1]
+    upstream_port = int(sys.argv[2]) if len(sys.argv) > 2 else PORT
+    port = int(sys.argv[3]) if len(sys.argv) > 3 else RELAY_PORT
+    delay = float(sys.argv[4]) if len(sys.argv) > 4 else 0.0
+
+    relay = SpectatorRelay(upstream_ip, upstream_port, port, delay)
+    relay.start()
+    relay.join()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+import numpy as np
+from typing import Dict, List, Optional
+from ..core.game.rules import (GROUND_LEVEL, GROUND_Y, OBSTACLE_TYPES, PLAYER_DUCK_HEIGHT, PLAYER_FRAMES,
+                               PLAYER_HEIGHT, PLAYER_WIDTH, SCREEN_HEIGHT, SCREEN_WIDTH, TICK_RATE, TILE_SIZE)
+
+REFERENCE_RATE = 60
+GAME_SPEED = 2.0
+GRAVITY = 0.6
+JUMP_VELOCITY = -10.0
+SPEED_STEP = 0.05
+SPEED_RAMP_SECONDS = 10
+SPAWN_INTERVAL = 2.5
+SKELETON_CHANCE = 0.7
+PLAYER_FRAME_SECONDS = 0.1
+OBSTACLE_FRAME_SECONDS = 0.2
+CULL_X = -50
+
+# Flags do jogador (uint8)
+FLAG_JUMPING = 1
+FLAG_DUCKING = 2
+FLAG_DOUBLE_JUMP = 4
+
+OBSTACLE_WIDTHS = np.array([width for _, width, _, _ in OBSTACLE_TYPES], dtype=np.float64)
+OBSTACLE_HEIGHTS = np.array([height for _, _, height, _ in OBSTACLE_TYPES], dtype=np.float64)
+OBSTACLE_FRAMES = np.array([frames for _, _, _, frames in OBSTACLE_TYPES], dtype=np.int8)
+
+class BatchedSimulation:
+    """Simulação de todas as salas de um servidor de uma vez, para medir o passo em lote.
+
+    Jogadores e obstáculos de todas as salas ficam em arrays NumPy contíguos
+    com uma coluna de sala; cada tick é um punhado de operações vetorizadas
+    (gravidade, pouso, movimento, culling, animação, spawn e colisão), em vez
+    de um loop Python por entidade.
+
+    Movimento, velocidade, spawn e animação seguem as regras do GameServer;
+    a colisão não: aqui é uma sobreposição AABB no fim do tick com as caixas
+    fixas de cada tipo, enquanto o GameServer testa o movimento do tick
+    inteiro (swept AABB) e confirma com as máscaras de pixel. Com os mesmos
+    inputs as duas versões podem discordar em colisões rasantes ou em ticks
+    longos. Por isso a classe fica entre os benchmarks e nenhum servidor a
+    usa: o GameServer continua simulando uma sala por processo."""
+
+    def __init__(self, tick_rate: int = TICK_RATE, seed: Optional[int] = None):
+        self.tick_rate = tick_rate
+        self.scale = REFERENCE_RATE / tick_rate
+        self.rng = np.random.default_rng(seed)
+        self.tick = 0
+
+        # Uma linha por sala
+        self.room_speed = np.zeros(0, dtype=np.float64)
+        self.room_scroll = np.zeros(0, dtype=np.float64)
+        self.room_score = np.zeros(0, dtype=np.float64)
+        self.room_ramp = np.zeros(0, dtype=np.int32)
+        self.room_spawn_timer = np.zeros(0, dtype=np.float64)
+        self.room_active = np.zeros(0, dtype=bool)
+
+        # Uma linha por jogador
+        self.player_room = np.zeros(0, dtype=np.int32)
+        self.player_id = np.zeros(0, dtype=np.int32)
+        self.player_x = np.zeros(0, dtype=np.float64)
+        self.player_y = np.zeros(0, dtype=np.float64)
+        self.player_vy = np.zeros(0, dtype=np.float64)
+        self.player_flags = np.zeros(0, dtype=np.uint8)
+        self.player_frame = np.zeros(0, dtype=np.int32)
+        self.player_anim = np.zeros(0, dtype=np.int32)
+
+        # Uma linha por obstáculo
+        self.obstacle_room = np.zeros(0, dtype=np.int32)
+        self.obstacle_x = np.zeros(0, dtype=np.float64)
+        self.obstacle_type = np.zeros(0, dtype=np.int8)
+        self.obstacle_frame = np.zeros(0, dtype=np.int8)
+        self.obstacle_anim = np.zeros(0, dtype=np.float64)
+
+    @property
+    def room_count(self) -> int:
+        return len(self.room_active)
+
+    def add_room(self) -> int:
+        """Cria uma sala em andamento e retorna seu índice"""
+        self.room_speed = np.append(self.room_speed, 1.0)
+        self.room_scroll = np.append(self.room_scroll, 0.0)
+        self.room_score = np.append(self.room_score, 0.0)
+        self.room_ramp = np.append(self.room_ramp, 0)
+        self.room_spawn_timer = np.append(self.room_spawn_timer, 0.0)
+        self.room_active = np.append(self.room_active, True)
+        return self.room_count - 1
+
+    def add_player(self, room: int, player_id: int) -> int:
+        """Adiciona um jogador à sala (mesma posição inicial do GameServer)"""
+        self.player_room = np.append(self.player_room, room)
+        self.player_id = np.append(self.player_id, player_id)
+        self.player_x = np.append(self.player_x, 100 - 50 * (player_id - 1))
+        self.player_y = np.append(self.player_y, GROUND_Y - PLAYER_HEIGHT)
+        self.player_vy = np.append(self.player_vy, 0.0)
+        self.player_flags = np.append(self.player_flags, np.uint8(FLAG_DOUBLE_JUMP))
+        self.player_frame = np.append(self.player_frame, 0)
+        self.player_anim = np.append(self.player_anim, 0)
+        return len(self.player_room) - 1
+
+    def player_index(self, room: int, player_id: int) -> Optional[int]:
+        found = np.flatnonzero((self.player_room == room) & (self.player_id == player_id))
+        return int(found[0]) if len(found) else None
+
+    def jump(self, indices):
+        """Aplica o comando de pulo a vários jogadores de uma vez (índices de linha)"""
+        indices = np.asarray(indices, dtype=np.intp)
+        flags = self.player_flags[indices]
+        speed = self.room_speed[self.player_room[indices]]
+        grounded = (flags & (FLAG_JUMPING | FLAG_DUCKING)) == 0
+        double = ~grounded & ((flags & FLAG_DOUBLE_JUMP) != 0)
+        jumping = grounded | double
+        self.player_vy[indices[jumping]] = JUMP_VELOCITY * speed[jumping]
+        flags = np.where(grounded, flags | FLAG_JUMPING, flags)
+        flags = np.where(double, flags & ~np.uint8(FLAG_DOUBLE_JUMP), flags)
+        self.player_flags[indices] = flags
+
+    def step(self):
+        """Avança todas as salas ativas exatamente um tick"""
+        self.tick += 1
+        active = self.room_active
+        speed = self.room_speed
+
+        # Velocidade, pontuação e scroll
+        self.room_ramp += active
+        ramp_up = self.room_ramp >= SPEED_RAMP_SECONDS * self.tick_rate
+        speed += SPEED_STEP * ramp_up
+        self.room_ramp[ramp_up] = 0
+        self.room_score += active * (2 * speed / self.tick_rate)
+        self.room_scroll += active * (GAME_SPEED * speed * self.scale)
+
+        self._step_players()
+        self._step_obstacles()
+        self._spawn_obstacles()
+        self._check_collisions()
+
+    def _step_players(self):
+        live = self.room_active[self.player_room]
+        speed = self.room_speed[self.player_room]
+        flags = self.player_flags
+        jumping = live & ((flags & FLAG_JUMPING) != 0)
+
+        self.player_y += np.where(jumping, self.player_vy * self.scale, 0.0)
+        self.player_vy += np.where(jumping, GRAVITY * speed * self.scale, 0.0)
+
+        height = np.where((flags & FLAG_DUCKING) != 0, PLAYER_DUCK_HEIGHT, PLAYER_HEIGHT)
+        landed = jumping & (self.player_y + height >= GROUND_Y)
+        self.player_y = np.where(landed, GROUND_Y - height, self.player_y)
+        self.player_vy[landed] = 0.0
+        self.player_flags = np.where(landed, (flags & ~np.uint8(FLAG_JUMPING)) | FLAG_DOUBLE_JUMP,
+                                     flags).astype(np.uint8)
+
+        self.player_anim += live
+        advance = live & (self.player_anim >= PLAYER_FRAME_SECONDS * self.tick_rate / speed)
+        self.player_anim[advance] = 0
+        self.player_frame = np.where(advance, (self.player_frame + 1) % PLAYER_FRAMES, self.player_frame)
+
+    def _step_obstacles(self):
+        # Culling: compacta os arrays uma vez por tick
+        keep = self.obstacle_x + OBSTACLE_WIDTHS[self.obstacle_type] > CULL_X
+        keep &= self.room_active[self.obstacle_room]
+        if not keep.all():
+            self.obstacle_room = self.obstacle_room[keep]
+            self.obstacle_x = self.obstacle_x[keep]
+            self.obstacle_type = self.obstacle_type[keep]
+            self.obstacle_frame = self.obstacle_frame[keep]
+            self.obstacle_anim = self.obstacle_anim[keep]
+
+        speed = self.room_speed[self.obstacle_room]
+        self.obstacle_x -= GAME_SPEED * speed * speed * self.scale
+        self.obstacle_anim += speed
+        advance = self.obstacle_anim >= OBSTACLE_FRAME_SECONDS * self.tick_rate
+        self.obstacle_anim[advance] = 0.0
+        kinds = self.obstacle_type[advance]
+        self.obstacle_frame[advance] = (self.obstacle_frame[advance] + 1) % OBSTACLE_FRAMES[kinds]
+
+    def _spawn_obstacles(self):
+        speed = self.room_speed
+        self.room_spawn_timer += self.room_active * speed
+        due = self.room_active & (self.room_spawn_timer >= SPAWN_INTERVAL * self.tick_rate / speed ** 0.8)
+        rooms = np.flatnonzero(due)
+        if not len(rooms):
+            return
+        self.room_spawn_timer[rooms] = 0.0
+        types = (self.rng.random(len(rooms)) >= SKELETON_CHANCE).astype(np.int8)
+        self.obstacle_room = np.concatenate((self.obstacle_room, rooms.astype(np.int32)))
+        self.obstacle_x = np.concatenate((self.obstacle_x, np.full(len(rooms), float(SCREEN_WIDTH))))
+        self.obstacle_type = np.concatenate((self.obstacle_type, types))
+        self.obstacle_frame = np.concatenate((self.obstacle_frame, np.zeros(len(rooms), dtype=np.int8)))
+        self.obstacle_anim = np.concatenate((self.obstacle_anim, np.zeros(len(rooms))))
+
+    def _check_collisions(self):
+        """AABB de cada jogador contra os obstáculos da própria sala, sem loop por par"""
+        if not len(self.obstacle_room) or not len(self.player_room):
+            return
+
+        # Obstáculos agrupados por sala; cada jogador testa só o intervalo da sua sala
+        order = np.argsort(self.obstacle_room, kind='stable')
+        sorted_rooms = self.obstacle_room[order]
+        start = np.searchsorted(sorted_rooms, self.player_room, 'left')
+        counts = np.searchsorted(sorted_rooms, self.player_room, 'right') - start
+        total = int(counts.sum())
+        if not total:
+            return
+        pair_player = np.repeat(np.arange(len(self.player_room)), counts)
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        pair_obstacle = order[np.repeat(start, counts) + offsets]
+
+        ducking = (self.player_flags[pair_player] & FLAG_DUCKING) != 0
+        height = np.where(ducking, PLAYER_DUCK_HEIGHT, PLAYER_HEIGHT)
+        px = self.player_x[pair_player]
+        py = self.player_y[pair_player] + (PLAYER_HEIGHT - height)
+        kind = self.obstacle_type[pair_obstacle]
+        ox = self.obstacle_x[pair_obstacle]
+        oh = OBSTACLE_HEIGHTS[kind]
+        oy = GROUND_Y - oh
+        hit = ((px < ox + OBSTACLE_WIDTHS[kind]) & (px + PLAYER_WIDTH > ox) &
+               (py < oy + oh) & (py + height > oy))
+        self.room_active[self.player_room[pair_player[hit]]] = False
+
+    def room_state(self, room: int) -> Dict:
+        """Estado de uma sala no mesmo formato do get_game do GameServer"""
+        players = {}
+        for index in np.flatnonzero(self.player_room == room):
+            flags = int(self.player_flags[index])
+            players[str(int(self.player_id[index]))] = {
+                'x': float(self.player_x[index]),
+                'y': float(self.player_y[index]),
+                'width': PLAYER_WIDTH,
+                'height': PLAYER_HEIGHT,
+                'duck_height': PLAYER_DUCK_HEIGHT,
+                'is_ducking': bool(flags & FLAG_DUCKING),
+                'is_jumping': bool(flags & FLAG_JUMPING),
+                'color': 13,
+                'current_frame': int(self.player_frame[index])
+            }
+        obstacles: List[Dict] = []
+        for index in np.flatnonzero(self.obstacle_room == room):
+            type_id = int(self.obstacle_type[index])
+            obstacles.append({
+                'type': type_id,
+                'x': float(self.obstacle_x[index]),
+                'y': GROUND_Y - OBSTACLE_TYPES[type_id][2],
+                'current_frame': int(self.obstacle_frame[index])
+            })
+        return {
+            'players': players,
+            'obstacles': obstacles,
+            'scroll_x': float(self.room_scroll[room]),
+            'score': int(self.room_score[room]),
+            'speed_multiplier': float(self.room_speed[room]),
+            'game_state': 'PLAYING' if self.room_active[room] else 'GAME_OVER',
+            'tile_size': TILE_SIZE,
+            'ground_level': GROUND_LEVEL,
+            'screen_width': SCREEN_WIDTH,
+            'screen_height': SCREEN_HEIGHT,
+            'tick': self.tick
+        }
+
+if __name__ == "__main__":
+    # Benchmark: rodar a partir da raiz do repositório
+    #   python -m src.benchmarks.batched_sim
+    import time
+    from client import GameServer, GameState
+
+    def populated(rooms: int) -> BatchedSimulation:
+        batched = BatchedSimulation(seed=1)
+        for _ in range(rooms):
+            room = batched.add_room()
+            for player_id in (1, 2):
+                batched.add_player(room, player_id)
+        return batched
+
+    def record_rooms(rooms: int) -> List[GameServer]:
+        servers = []
+        for _ in range(rooms):
+            server = GameServer()
+            server.add_player('1')
+            server.add_player('2')
+            server.game_state = GameState.PLAYING
+            servers.append(server)
+        return servers
+
+    def warm_up_records(servers: List[GameServer], ticks: int):
+        for server in servers:
+            for _ in range(ticks):
+                server.step()
+            server.game_state = GameState.PLAYING
+
+    ticks = 300
+    for rooms in (1, 100, 1000):
+        # Sem colisão nas duas versões, para medir sempre salas em andamento
+        batched = populated(rooms)
+        batched.player_y -= 1000.0
+        for _ in range(ticks):
+            batched.step()
+        start = time.perf_counter()
+        for _ in range(ticks):
+            batched.step()
+        batched_time = (time.perf_counter() - start) / ticks
+
+        servers = record_rooms(rooms)
+        for server in servers:
+            for player in server.players.values():
+                player.y -= 1000
+        warm_up_records(servers, ticks)
+        start = time.perf_counter()
+        for _ in range(ticks):
+            for server in servers:
+                server.step()
+        record_time = (time.perf_counter() - start) / ticks
+
+        obstacles = len(batched.obstacle_room)
+        print(f"{rooms:5d} salas ({obstacles} obstáculos): registros {record_time * 1e3:8.3f} ms/tick, "
+              f"NumPy {batched_time * 1e3:7.3f} ms/tick ({record_time / batched_time:5.1f}x)")
@@ -0,0 +1,36 @@
+FP_SHIFT = 16
+FP_ONE = 1 << FP_SHIFT
+
+def to_fixed(value: float) -> int:
+    """Converte um valor real para ponto fixo Q16 (apenas para constantes)"""
+    return int(round(value * FP_ONE))
+
+def from_fixed(value: int) -> float:
+    """Converte de ponto fixo para float (apenas para renderização)"""
+    return value / FP_ONE
+
+def fp_mul(a: int, b: int) -> int:
+    """Multiplicação em ponto fixo (arredonda em direção a -infinito, igual em toda máquina)"""
+    return (a * b) >> FP_SHIFT
+
+def fp_div(a: int, b: int) -> int:
+    """Divisão em ponto fixo"""
+    return (a << FP_SHIFT) // b
+
+def iroot(value: int, n: int) -> int:
+    """Raiz n-ésima inteira (piso), por busca binária: sem float, sem libm"""
+    if value < 2:
+        return value
+    low, high = 1, 1 << (value.bit_length() // n + 1)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if mid ** n <= value:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+def fp_pow_ratio(value: int, numerator: int, denominator: int) -> int:
+    """value ** (numerator / denominator) em ponto fixo, de forma exata e portável"""
+    # (v / ONE) ** (p/q) * ONE == (v ** p * ONE ** (q - p)) ** (1/q)
+    return iroot(value ** numerator * FP_ONE ** (denominator - numerator), denominator)
@@ -0,0 +1,214 @@
+import math
+import struct
+import zlib
+from typing import List, Optional, Sequence, Tuple
+
+Frame = Tuple[int, int, int, int]  # (u, v, largura, altura) no banco de imagens
+
+# Cores de transparência usadas nos blt (paleta padrão do pyxel, em RGB)
+COLOR_KEY_GREEN = 0x19959C  # pyxel.COLOR_GREEN: obstáculos
+COLOR_KEY_GRAY = 0xA3A3A3   # pyxel.COLOR_GRAY: jogadores
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+class PixelMask:
+    """Máscara de colisão de um frame: uma linha por inteiro, bit i = coluna i.
+
+    Gerada uma vez no carregamento dos assets. O teste entre duas máscaras é
+    só deslocamento e AND linha a linha, feito depois que as caixas AABB já
+    se tocaram. (dx, dy) é a posição do sprite em relação à âncora da
+    entidade, do mesmo jeito que o blt do cliente desenha."""
+    __slots__ = ('rows', 'width', 'height', 'dx', 'dy')
+
+    def __init__(self, rows: Sequence[int], width: int, dx: int = 0, dy: int = 0):
+        self.rows = tuple(rows)
+        self.width = width
+        self.height = len(self.rows)
+        self.dx = dx
+        self.dy = dy
+
+    def __repr__(self) -> str:
+        return f"PixelMask({self.width}x{self.height}, offset=({self.dx}, {self.dy}))"
+
+    def __str__(self) -> str:
+        return "\n".join("".join('#' if row >> column & 1 else '.' for column in range(self.width))
+                         for row in self.rows)
+
+    def bounds(self) -> Tuple[int, int, int, int]:
+        """Caixa (x, y, w, h) dos pixels opacos, relativa à âncora"""
+        filled = [index for index, row in enumerate(self.rows) if row]
+        if not filled:
+            return (self.dx, self.dy, 0, 0)
+        union = 0
+        for row in self.rows:
+            union |= row
+        left = (union & -union).bit_length() - 1
+        right = union.bit_length()
+        return (self.dx + left, self.dy + filled[0], right - left, filled[-1] - filled[0] + 1)
+
+    def shifted(self, dx: int, dy: int) -> 'PixelMask':
+        """Mesma máscara com outra posição relativa à âncora"""
+        return PixelMask(self.rows, self.width, dx, dy)
+
+    def clipped(self, top: int) -> 'PixelMask':
+        """Apaga as linhas acima de 'top' (relativo à âncora), ex.: hitbox agachada"""
+        rows = [row if self.dy + index >= top else 0 for index, row in enumerate(self.rows)]
+        return PixelMask(rows, self.width, self.dx, self.dy)
+
+    def repeated(self, count: int, spacing: int) -> 'PixelMask':
+        """Máscara de 'count' cópias lado a lado, 'spacing' px entre os inícios"""
+        rows = []
+        for row in self.rows:
+            combined = 0
+            for copy in range(count):
+                combined |= row << (copy * spacing)
+            rows.append(combined)
+        return PixelMask(rows, spacing * (count - 1) + self.width, self.dx, self.dy)
+
+def masks_overlap(a: PixelMask, ax: float, ay: float, b: PixelMask, bx: float, by: float) -> bool:
+    """Se as máscaras se tocam com as âncoras em (ax, ay) e (bx, by).
+
+    As posições são arredondadas para o pixel, como no desenho."""
+    ax, ay = math.floor(ax) + a.dx, math.floor(ay) + a.dy
+    bx, by = math.floor(bx) + b.dx, math.floor(by) + b.dy
+    top = max(ay, by)
+    bottom = min(ay + a.height, by + b.height)
+    if top >= bottom:
+        return False
+    shift = bx - ax
+    if shift >= a.width or -shift >= b.width:
+        return False
+    a_rows, b_rows = a.rows, b.rows
+    a_offset, b_offset = top - ay, top - by
+    if shift >= 0:
+        for index in range(bottom - top):
+            if a_rows[a_offset + index] & (b_rows[b_offset + index] << shift):
+                return True
+    else:
+        shift = -shift
+        for index in range(bottom - top):
+            if (a_rows[a_offset + index] << shift) & b_rows[b_offset + index]:
+                return True
+    return False
+
+def _paeth(a: int, b: int, c: int) -> int:
+    p = a + b - c
+    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+    if pa <= pb and pa <= pc:
+        return a
+    return b if pb <= pc else c
+
+class SpriteSheet:
+    """Pixels RGB de um PNG (8 bits, RGB ou RGBA, sem entrelaçamento), lido só
+    com zlib para que o servidor gere as máscaras sem depender do pyxel"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            data = f.read()
+        if not data.startswith(_PNG_SIGNATURE):
+            raise ValueError(f"{path} não é um PNG")
+
+        compressed = []
+        pos = len(_PNG_SIGNATURE)
+        while pos + 8 <= len(data):
+            length, kind = struct.unpack_from('>I4s', data, pos)
+            chunk = data[pos + 8:pos + 8 + length]
+            if kind == b'IHDR':
+                width, height, depth, color_type, _, _, interlace = struct.unpack('>IIBBBBB', chunk)
+            elif kind == b'IDAT':
+                compressed.append(chunk)
+            elif kind == b'IEND':
+                break
+            pos += 12 + length
+
+        if depth != 8 or color_type not in (2, 6) or interlace:
+            raise ValueError(f"{path}: formato de PNG não suportado")
+        channels = 4 if color_type == 6 else 3
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.pixels = self._unfilter(zlib.decompress(b''.join(compressed)), width, height, channels)
+
+    @staticmethod
+    def _unfilter(raw: bytes, width: int, height: int, channels: int) -> bytearray:
+        stride = width * channels
+        pixels = bytearray(stride * height)
+        previous = bytearray(stride)
+        pos = 0
+        for y in range(height):
+            kind = raw[pos]
+            line = bytearray(raw[pos + 1:pos + 1 + stride])
+            pos += 1 + stride
+            if kind == 1:
+                for i in range(channels, stride):
+                    line[i] = (line[i] + line[i - channels]) & 0xFF
+            elif kind == 2:
+                for i in range(stride):
+                    line[i] = (line[i] + previous[i]) & 0xFF
+            elif kind == 3:
+                for i in range(stride):
+                    left = line[i - channels] if i >= channels else 0
+                    line[i] = (line[i] + ((left + previous[i]) >> 1)) & 0xFF
+            elif kind == 4:
+                for i in range(stride):
+                    left = line[i - channels] if i >= channels else 0
+                    upper_left = previous[i - channels] if i >= channels else 0
+                    line[i] = (line[i] + _paeth(left, previous[i], upper_left)) & 0xFF
+            pixels[y * stride:(y + 1) * stride] = line
+            previous = line
+        return pixels
+
+    def opaque(self, x: int, y: int, color_key: int) -> bool:
+        """Pixel visível: fora da cor de transparência (e com alfa, se houver)"""
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return False
+        pos = (y * self.width + x) * self.channels
+        r, g, b = self.pixels[pos:pos + 3]
+        if self.channels == 4 and self.pixels[pos + 3] == 0:
+            return False
+        return (r << 16 | g << 8 | b) != color_key
+
+    def mask(self, frame: Frame, color_key: int, dx: int = 0, dy: int = 0) -> PixelMask:
+        u, v, w, h = frame
+        rows = []
+        for y in range(v, v + h):
+            row = 0
+            for column in range(w):
+                if self.opaque(u + column, y, color_key):
+                    row |= 1 << column
+            rows.append(row)
+        return PixelMask(rows, w, dx, dy)
+
+def load_shape(path: str, prefix: str) -> List[Frame]:
+    """Frames (u, v, w, h) das linhas de um arquivo .shape que começam com 'prefix'"""
+    frames = []
+    with open(path, "r") as f:
+        for line in f:
+            if line.startswith(prefix):
+                parts = line.split()
+                frames.append((int(parts[1]), int(parts[2]), int(parts[3]), int(parts[4])))
+    return frames
+
+def frame_masks(sheet: SpriteSheet, frames: Sequence[Frame], color_key: int,
+                anchor_height: int, copies: int = 1, gap: int = 2) -> List[PixelMask]:
+    """Máscaras de uma animação alinhadas pela base, como o cliente desenha:
+    o sprite fica em y + (altura da entidade - altura do frame). Com 'copies'
+    o frame se repete lado a lado com 'gap' px entre as cópias (diabrete)."""
+    masks = []
+    for frame in frames:
+        mask = sheet.mask(frame, color_key, 0, anchor_height - frame[3])
+        if copies > 1:
+            mask = mask.repeated(copies, frame[2] + gap)
+        masks.append(mask)
+    return masks
+
+def union_bounds(masks: Sequence[PixelMask]) -> Optional[Tuple[int, int, int, int]]:
+    """Caixa que contém os pixels opacos de todos os frames (para a fase AABB)"""
+    boxes = [mask.bounds() for mask in masks if any(mask.rows)]
+    if not boxes:
+        return None
+    left = min(box[0] for box in boxes)
+    top = min(box[1] for box in boxes)
+    right = max(box[0] + box[2] for box in boxes)
+    bottom = max(box[1] + box[3] for box in boxes)
+    return (left, top, right - left, bottom - top)
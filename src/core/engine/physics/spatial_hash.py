@@ -0,0 +1,196 @@
+import math
+from typing import Dict, Hashable, Iterator, Optional, Tuple
+from .collision import Rect
+
+ALL_LAYERS = -1  # Máscara com todos os bits: consulta todas as camadas
+
+Span = Tuple[int, int, int, int]  # Células (x0, y0, x1, y1), inclusivas
+
+class SpatialHash:
+    """Grade uniforme de células (normalmente do tamanho do tile) para entidades.
+
+    Cada entidade é registrada com uma chave, um retângulo e uma camada
+    (um bit); ela aparece em todas as células que o retângulo cobre. Mover
+    só mexe nas células quando o retângulo muda de célula, então o custo
+    por tick é O(1) por entidade, e uma consulta visita só as células da
+    região: o trabalho cresce com a densidade local, não com o total.
+
+    As máscaras de consulta filtram por camada (ex.: monstros que colidem
+    com jogadores mas não entre si)."""
+
+    def __init__(self, cell_size: int = 16):
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], Dict[Hashable, None]] = {}  # Ordem de inserção
+        self.entries: Dict[Hashable, Tuple[Rect, int, Span]] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.entries
+
+    def cell_span(self, rect: Rect) -> Span:
+        """Células cobertas pelo retângulo (x, y, w, h)"""
+        x, y, w, h = rect
+        size = self.cell_size
+        return (math.floor(x / size), math.floor(y / size),
+                math.floor((x + w) / size), math.floor((y + h) / size))
+
+    def _link(self, key: Hashable, span: Span):
+        cells = self.cells
+        for cx in range(span[0], span[2] + 1):
+            for cy in range(span[1], span[3] + 1):
+                cell = cells.get((cx, cy))
+                if cell is None:
+                    cells[(cx, cy)] = cell = {}
+                cell[key] = None
+
+    def _unlink(self, key: Hashable, span: Span):
+        cells = self.cells
+        for cx in range(span[0], span[2] + 1):
+            for cy in range(span[1], span[3] + 1):
+                cell = cells[(cx, cy)]
+                del cell[key]
+                if not cell:
+                    del cells[(cx, cy)]
+
+    def insert(self, key: Hashable, rect: Rect, layer: int = 1):
+        """Registra a entidade (ou substitui o registro anterior da mesma chave)"""
+        if key in self.entries:
+            self.remove(key)
+        span = self.cell_span(rect)
+        self.entries[key] = (rect, layer, span)
+        self._link(key, span)
+
+    def move(self, key: Hashable, rect: Rect):
+        """Atualiza o retângulo; só troca de células quando ele cruza uma borda"""
+        _, layer, span = self.entries[key]
+        new_span = self.cell_span(rect)
+        if new_span != span:
+            self._unlink(key, span)
+            self._link(key, new_span)
+        self.entries[key] = (rect, layer, new_span)
+
+    def remove(self, key: Hashable):
+        _, _, span = self.entries.pop(key)
+        self._unlink(key, span)
+
+    def clear(self):
+        self.cells.clear()
+        self.entries.clear()
+
+    def rect(self, key: Hashable) -> Rect:
+        return self.entries[key][0]
+
+    def query(self, rect: Rect, mask: int = ALL_LAYERS) -> Iterator[Hashable]:
+        """Chaves das entidades das camadas em 'mask' que se sobrepõem ao retângulo"""
+        x, y, w, h = rect
+        x0, y0, x1, y1 = self.cell_span(rect)
+        cells, entries = self.cells, self.entries
+        single = x0 == x1 and y0 == y1
+        seen = set()
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                cell = cells.get((cx, cy))
+                if not cell:
+                    continue
+                for key in cell:
+                    if not single:
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                    (ox, oy, ow, oh), layer, _ = entries[key]
+                    if layer & mask and x < ox + ow and ox < x + w and y < oy + oh and oy < y + h:
+                        yield key
+
+    def query_point(self, x: float, y: float, mask: int = ALL_LAYERS) -> Iterator[Hashable]:
+        """Chaves das entidades cujo retângulo contém o ponto"""
+        cell = self.cells.get((math.floor(x / self.cell_size), math.floor(y / self.cell_size)))
+        if not cell:
+            return
+        entries = self.entries
+        for key in cell:
+            (ox, oy, ow, oh), layer, _ = entries[key]
+            if layer & mask and ox <= x < ox + ow and oy <= y < oy + oh:
+                yield key
+
+    def nearest(self, x: float, y: float, mask: int = ALL_LAYERS, max_distance: float = math.inf,
+                exclude: Optional[Hashable] = None) -> Optional[Hashable]:
+        """Entidade mais próxima do ponto (distância até a borda do retângulo).
+
+        Visita anéis de células em volta do ponto e para assim que nenhum
+        anel seguinte pode ter algo mais perto que o melhor encontrado."""
+        size = self.cell_size
+        cx, cy = math.floor(x / size), math.floor(y / size)
+        cells, entries = self.cells, self.entries
+        best, best_distance = None, max_distance
+        seen = set()
+        # 'exclude' não entra em 'seen' para não contar como uma entidade visitada
+        total = len(entries) - (exclude in entries)
+        ring = 0
+        # Todo ponto de um anel r está a pelo menos (r - 1) * size do ponto
+        while len(seen) < total and (ring - 1) * size <= best_distance:
+            for cell_key in self._ring(cx, cy, ring):
+                cell = cells.get(cell_key)
+                if not cell:
+                    continue
+                for key in cell:
+                    if key in seen or key == exclude:
+                        continue
+                    seen.add(key)
+                    (ox, oy, ow, oh), layer, _ = entries[key]
+                    if not layer & mask:
+                        continue
+                    dx = max(ox - x, 0.0, x - (ox + ow))
+                    dy = max(oy - y, 0.0, y - (oy + oh))
+                    distance = math.hypot(dx, dy)
+                    if distance <= best_distance:
+                        best, best_distance = key, distance
+            ring += 1
+        return best
+
+    @staticmethod
+    def _ring(cx: int, cy: int, ring: int) -> Iterator[Tuple[int, int]]:
+        """Células a distância de Chebyshev 'ring' da célula (cx, cy)"""
+        if ring == 0:
+            yield cx, cy
+            return
+        for dx in range(-ring, ring + 1):
+            yield cx + dx, cy - ring
+            yield cx + dx, cy + ring
+        for dy in range(-ring + 1, ring):
+            yield cx - ring, cy + dy
+            yield cx + ring, cy + dy
+
+if __name__ == "__main__":
+    # Benchmark: python -m src.core.engine.physics.spatial_hash
+    import random
+    import timeit
+    from .collision import rects_overlap
+
+    rng = random.Random(1)
+    WORLD = 4096
+    MONSTER = 1
+
+    for count in (200, 1000, 4000):
+        monsters = [(rng.uniform(0, WORLD), rng.uniform(0, WORLD), 12.0, 12.0) for _ in range(count)]
+        grid = SpatialHash(16)
+        for key, rect in enumerate(monsters):
+            grid.insert(key, rect, MONSTER)
+
+        def naive():
+            return sum(1 for a in range(count) for b in range(a + 1, count)
+                       if rects_overlap(monsters[a], monsters[b]))
+
+        def hashed():
+            # Move todo mundo um pouco e testa cada monstro contra os vizinhos
+            for key, (mx, my, w, h) in enumerate(monsters):
+                grid.move(key, (mx + 0.5, my, w, h))
+            return sum(1 for key, rect in enumerate(monsters) for other in grid.query(grid.rect(key), MONSTER)
+                       if other > key)
+
+        runs = 3 if count > 1000 else 10
+        naive_time = timeit.timeit(naive, number=runs) / runs
+        hash_time = timeit.timeit(hashed, number=runs) / runs
+        print(f"{count:5d} monstros: todos os pares {naive_time * 1e3:8.2f} ms, "
+              f"spatial hash (com move) {hash_time * 1e3:6.2f} ms ({naive_time / hash_time:6.1f}x)")
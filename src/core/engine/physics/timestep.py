@@ -0,0 +1,49 @@
+TICK_RATE = 60              # Ticks por segundo da simulação
+MAX_CATCH_UP_STEPS = 5      # Máximo de ticks executados por chamada quando atrasado
+REFERENCE_RATE = 60         # As constantes de física do jogo foram ajustadas a 60 Hz
+
+class FixedTimestep:
+    """Acumulador de passo fixo: converte tempo real em um número inteiro de ticks.
+
+    A simulação só avança em ticks inteiros, então as mesmas entradas geram o
+    mesmo resultado em qualquer máquina. Se o processo atrasar, no máximo
+    'max_steps' ticks são recuperados por chamada e o excesso é descartado
+    (o jogo desacelera em vez de entrar em espiral de recuperação)."""
+
+    def __init__(self, tick_rate: int = TICK_RATE, max_steps: int = MAX_CATCH_UP_STEPS):
+        self.tick_rate = tick_rate
+        self.dt = 1 / tick_rate
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.tick = 0
+        self.dropped_ticks = 0
+
+    @property
+    def scale(self) -> float:
+        """Fator que converte constantes 'por frame a 60 Hz' para um tick desta taxa"""
+        return REFERENCE_RATE / self.tick_rate
+
+    @property
+    def alpha(self) -> float:
+        """Fração do próximo tick já acumulada (para interpolar a renderização)"""
+        return self.accumulator / self.dt
+
+    def ticks(self, seconds: float) -> int:
+        """Converte uma duração em segundos para ticks (no mínimo 1)"""
+        return max(1, round(seconds * self.tick_rate))
+
+    def advance(self, elapsed: float) -> int:
+        """Acumula o tempo real decorrido e retorna quantos ticks executar agora"""
+        self.accumulator += elapsed
+        steps = int(self.accumulator * self.tick_rate)
+        self.accumulator -= steps * self.dt
+        if steps > self.max_steps:
+            self.dropped_ticks += steps - self.max_steps
+            steps = self.max_steps
+        self.tick += steps
+        return steps
+
+    def reset(self):
+        self.accumulator = 0.0
+        self.tick = 0
+        self.dropped_ticks = 0
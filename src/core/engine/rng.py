@@ -0,0 +1,34 @@
+MASK_32 = 0xFFFFFFFF
+MASK_64 = 0xFFFFFFFFFFFFFFFF
+
+def mix_seed(*parts: int) -> int:
+    """Combina seed e identificadores (stream, chunk...) em uma seed de 64 bits (splitmix64)"""
+    state = 0
+    for part in parts:
+        state = (state + (part & MASK_64) + 0x9E3779B97F4A7C15) & MASK_64
+        z = state
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK_64
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK_64
+        state = z ^ (z >> 31)
+    return state
+
+class RngStream:
+    """Gerador xorshift32: estado de um único inteiro, idêntico em qualquer máquina
+    e barato de salvar/restaurar (lockstep, rollback e replays)"""
+    __slots__ = ('state',)
+
+    def __init__(self, *seed_parts: int):
+        self.state = (mix_seed(*seed_parts) & MASK_32) or 1
+
+    def next(self) -> int:
+        """Próximo inteiro de 32 bits"""
+        x = self.state
+        x ^= (x << 13) & MASK_32
+        x ^= x >> 17
+        x ^= (x << 5) & MASK_32
+        self.state = x
+        return x
+
+    def below(self, bound: int) -> int:
+        """Inteiro em [0, bound)"""
+        return self.next() % bound
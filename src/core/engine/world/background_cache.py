@@ -0,0 +1,99 @@
+import math
+import pyxel
+from .map_view import ColumnStream
+
+CACHE_MARGIN = 4  # Colunas além das visíveis, para a borda parcial e o scroll do frame
+
+class BackgroundCache(ColumnStream):
+    """Fundo do mapa já composto em uma imagem fora da tela.
+
+    Os tiles do fundo e do chão não mudam depois de gerados, então cada
+    coluna é composta uma vez (um blt por tile, camadas na ordem de
+    stream) quando entra na tela; o frame inteiro vira um blt largo na
+    posição do scroll, dois quando a janela cruza o fim da imagem.
+
+    Os bancos de imagem do pyxel têm 256 px de largura, menos que a tela,
+    então o cache é uma pyxel.Image própria com a largura da tela mais
+    CACHE_MARGIN colunas. Pixels sem tile ficam com a cor transparente."""
+
+    def __init__(self, image_bank: int, rows: int, screen_width: int, tile_size: int = 16,
+                 colkey: int = pyxel.COLOR_GREEN, margin: int = CACHE_MARGIN):
+        super().__init__(math.ceil(screen_width / tile_size) + 1 + margin)
+        self.image_bank = image_bank  # Banco com o tileset
+        self.rows = rows
+        self.tile_size = tile_size
+        self.colkey = colkey
+        self.width = self.columns * tile_size
+        self.height = rows * tile_size
+        self.image = pyxel.Image(self.width, self.height)
+        self.image.cls(colkey)
+
+    def clear(self, x: int):
+        """Apaga a coluna antiga do slot; as camadas são compostas por cima"""
+        self.image.rect((x % self.columns) * self.tile_size, 0, self.tile_size, self.height, self.colkey)
+
+    def write(self, x: int, column: bytes, first_row: int = 0):
+        """Desenha os tiles da coluna x a partir da linha 'first_row', por cima do que já está lá"""
+        size = self.tile_size
+        image_x = (x % self.columns) * size
+        for row, tile in enumerate(column, first_row):
+            self.image.blt(image_x, row * size, self.image_bank, tile * size, 0, size, size, self.colkey)
+
+    def draw(self, scroll_x: float, screen_y: float, screen_width: int):
+        """Desenha o fundo composto rolado por scroll_x"""
+        u = math.ceil(scroll_x) % self.width  # Mesmo arredondamento do int(x - scroll_x) do blt
+        first_width = min(screen_width, self.width - u)
+        pyxel.blt(0, screen_y, self.image, u, 0, first_width, self.height, self.colkey)
+        if first_width < screen_width:
+            # A janela passou do fim da imagem: o resto vem do começo
+            pyxel.blt(first_width, screen_y, self.image, 0, 0, screen_width - first_width, self.height, self.colkey)
+
+if __name__ == "__main__":
+    # Comparação de tempo de frame: um blt por tile x blt do cache composto
+    #   python -m src.core.engine.world.background_cache   (na raiz do repositório)
+    import random
+    import time
+    from .map_view import visible_range
+
+    SCREEN_WIDTH, SCREEN_HEIGHT, TILE = 320, 240, 16
+    GROUND_LEVEL, GROUND_TILE = 14, 4
+    FRAMES = 600
+
+    pyxel.init(SCREEN_WIDTH, SCREEN_HEIGHT, title="cache benchmark", fps=1000)
+    pyxel.image(1).load(0, 0, "./assets/animations/player/castle-tileset.png")
+
+    columns = [bytes(random.choice((0, 1)) for _ in range(GROUND_LEVEL)) + b'\x01' for _ in range(200)]
+    background = (lambda x: columns[x % len(columns)], 0)
+    cache = BackgroundCache(1, GROUND_LEVEL + 1, SCREEN_WIDTH)
+
+    def draw_per_tile(scroll_x: float):
+        for x in visible_range(scroll_x, SCREEN_WIDTH, TILE):
+            screen_x = int(x * TILE - scroll_x)
+            for y, tile in enumerate(columns[x % len(columns)]):
+                pyxel.blt(screen_x, y * TILE, 1, tile * TILE, 0, TILE, TILE, pyxel.COLOR_GREEN)
+            pyxel.blt(screen_x, GROUND_LEVEL * TILE, 1, GROUND_TILE * TILE, 0, TILE, TILE, pyxel.COLOR_GREEN)
+
+    def draw_cache(scroll_x: float):
+        cache.stream(visible_range(scroll_x, SCREEN_WIDTH, TILE), background,
+                     (lambda x: bytes([GROUND_TILE]), GROUND_LEVEL))
+        cache.draw(scroll_x, 0, SCREEN_WIDTH)
+
+    modes = [("blt por tile", draw_per_tile), ("blt do cache", draw_cache)]
+    timings = {name: 0.0 for name, _ in modes}
+    frame = 0
+
+    def update():
+        if frame >= FRAMES * len(modes):
+            for name, total in timings.items():
+                print(f"{name:14s}: {total / FRAMES * 1e3:6.3f} ms por frame")
+            pyxel.quit()
+
+    def draw():
+        global frame
+        name, draw_map = modes[frame // FRAMES % len(modes)]
+        start = time.perf_counter()
+        draw_map(frame % FRAMES * 2.5)  # Mesmo trecho do mapa nos dois modos
+        timings[name] += time.perf_counter() - start
+        frame += 1
+
+    pyxel.run(update, draw)
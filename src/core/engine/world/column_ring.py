@@ -0,0 +1,60 @@
+from typing import Iterator, Tuple
+
+class ColumnRing:
+    """Buffer circular de colunas de tiles sobre um único bytearray.
+
+    A coluna x fica na posição (x % capacidade) e guarda 'height' tiles de
+    um byte cada. Acrescentar uma coluna no fim e descartar colunas do
+    começo são O(1), sem tupla por tile nem lista reconstruída por frame.
+    Só fica guardado o intervalo contínuo [start, end) de colunas."""
+
+    def __init__(self, capacity: int, height: int):
+        self.capacity = capacity
+        self.height = height
+        self.data = bytearray(capacity * height)
+        self.start = 0  # Primeira coluna guardada
+        self.end = 0    # Uma depois da última coluna guardada
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def __contains__(self, x: int) -> bool:
+        return self.start <= x < self.end
+
+    def reset(self, start: int = 0):
+        """Esvazia o buffer; a próxima coluna acrescentada será 'start'"""
+        self.start = self.end = start
+
+    def append(self, column: bytes) -> int:
+        """Acrescenta a próxima coluna (descarta a mais antiga se estiver cheio)"""
+        x = self.end
+        if x - self.start >= self.capacity:
+            self.start += 1
+        offset = (x % self.capacity) * self.height
+        self.data[offset:offset + self.height] = column
+        self.end = x + 1
+        return x
+
+    def evict_before(self, x: int):
+        """Descarta as colunas anteriores a x"""
+        self.start = min(max(self.start, x), self.end)
+
+    def column(self, x: int) -> memoryview:
+        """Tiles da coluna x (de cima para baixo), sem cópia"""
+        if not self.start <= x < self.end:
+            raise IndexError(f"Coluna {x} fora do buffer [{self.start}, {self.end})")
+        offset = (x % self.capacity) * self.height
+        return memoryview(self.data)[offset:offset + self.height]
+
+    def tile(self, x: int, y: int) -> int:
+        if not self.start <= x < self.end:
+            raise IndexError(f"Coluna {x} fora do buffer [{self.start}, {self.end})")
+        return self.data[(x % self.capacity) * self.height + y]
+
+    def view(self, first: int, last: int) -> Iterator[Tuple[int, memoryview]]:
+        """(x, coluna) das colunas guardadas em [first, last)"""
+        data = memoryview(self.data)
+        height, capacity = self.height, self.capacity
+        for x in range(max(first, self.start), min(last, self.end)):
+            offset = (x % capacity) * height
+            yield x, data[offset:offset + height]
@@ -0,0 +1,199 @@
+import numpy as np
+from collections import OrderedDict
+from typing import Sequence, Tuple
+from .tile_grid import WALKABLE, TileGrid, TileType
+
+UNREACHABLE = -1
+CACHE_FIELDS = 8  # Alvos mantidos prontos (ex.: um por jogador)
+
+# Vizinhos: 4 ortogonais e 4 diagonais (dx, dy)
+NEIGHBORS = ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1))
+
+Tile = Tuple[int, int]  # (coluna, linha)
+
+class FlowField:
+    """Campo de direções até os alvos, para qualquer número de monstros.
+
+    O campo de integração é uma BFS (4 vizinhos, custo 1 por tile) a partir
+    de todos os alvos de uma vez, sobre os tiles transitáveis. A BFS avança
+    por frentes de índices num array com borda bloqueada, então cada passo é
+    vetorizado e o total é O(tiles). Depois cada tile aponta para o vizinho
+    (diagonais só sem cortar quina de parede) com menor distância; um
+    monstro só lê a direção do tile onde está, em O(1)."""
+
+    def __init__(self, grid: TileGrid, targets: Sequence[Tile]):
+        self.grid = grid
+        self.targets = tuple(targets)
+        self.version = grid.version  # Versão dos tiles usada no cálculo
+        self.distance = self._integrate()
+        self.direction_x, self.direction_y = self._directions()
+
+    def _integrate(self) -> np.ndarray:
+        height, width = self.grid.height, self.grid.width
+        stride = width + 2
+        passable = np.zeros((height + 2, stride), dtype=bool)  # Borda de 1 tile bloqueada
+        passable[1:-1, 1:-1] = np.asarray(self.grid.tiles) == WALKABLE
+        passable = passable.ravel()
+        distance = np.full(passable.size, UNREACHABLE, dtype=np.int32)
+
+        frontier = np.array(sorted({(y + 1) * stride + x + 1 for x, y in self.targets
+                                    if 0 <= x < width and 0 <= y < height}), dtype=np.intp)
+        frontier = frontier[passable[frontier]]
+        distance[frontier] = 0
+        offsets = np.array((1, -1, stride, -stride), dtype=np.intp)
+        step = 0
+        while frontier.size:
+            step += 1
+            candidates = (frontier[:, None] + offsets).ravel()
+            candidates = candidates[passable[candidates] & (distance[candidates] == UNREACHABLE)]
+            frontier = np.unique(candidates)
+            distance[frontier] = step
+        return distance.reshape(height + 2, stride)
+
+    def _directions(self) -> Tuple[np.ndarray, np.ndarray]:
+        height, width = self.grid.height, self.grid.width
+        padded = self.distance
+        center = padded[1:-1, 1:-1]
+        # Distância de cada vizinho; inalcançável vira "infinito"
+        unreachable = np.iinfo(np.int32).max
+        best = np.where(center == UNREACHABLE, unreachable, center)
+        direction_x = np.zeros((height, width), dtype=np.int8)
+        direction_y = np.zeros((height, width), dtype=np.int8)
+
+        def neighbor(dx: int, dy: int) -> np.ndarray:
+            return padded[1 + dy:height + 1 + dy, 1 + dx:width + 1 + dx]
+
+        for dx, dy in NEIGHBORS:
+            other = neighbor(dx, dy)
+            usable = other != UNREACHABLE
+            if dx and dy:
+                # Diagonal só se os dois vizinhos ortogonais também são alcançáveis
+                usable &= (neighbor(dx, 0) != UNREACHABLE) & (neighbor(0, dy) != UNREACHABLE)
+            better = usable & (other < best)
+            best = np.where(better, other, best)
+            direction_x[better] = dx
+            direction_y[better] = dy
+        return direction_x, direction_y
+
+    @property
+    def stale(self) -> bool:
+        """Se os tiles mudaram desde o cálculo"""
+        return self.version != self.grid.version
+
+    def distance_at(self, x: float, y: float) -> int:
+        """Passos até o alvo mais próximo a partir da posição (em px); -1 se não há caminho"""
+        tile_x, tile_y = int(x // self.grid.tile_size), int(y // self.grid.tile_size)
+        if 0 <= tile_x < self.grid.width and 0 <= tile_y < self.grid.height:
+            return int(self.distance[tile_y + 1, tile_x + 1])
+        return UNREACHABLE
+
+    def direction(self, x: float, y: float) -> Tuple[int, int]:
+        """Direção (dx, dy em tiles, -1 a 1) para seguir a partir da posição (em px)"""
+        tile_x, tile_y = int(x // self.grid.tile_size), int(y // self.grid.tile_size)
+        if 0 <= tile_x < self.grid.width and 0 <= tile_y < self.grid.height:
+            return int(self.direction_x[tile_y, tile_x]), int(self.direction_y[tile_y, tile_x])
+        return 0, 0
+
+    def directions(self, xs, ys) -> Tuple[np.ndarray, np.ndarray]:
+        """direction() de vários monstros de uma vez; fora do mapa é (0, 0)"""
+        tile_x = np.floor_divide(np.asarray(xs, dtype=np.float64), self.grid.tile_size).astype(np.intp)
+        tile_y = np.floor_divide(np.asarray(ys, dtype=np.float64), self.grid.tile_size).astype(np.intp)
+        inside = (tile_x >= 0) & (tile_x < self.grid.width) & (tile_y >= 0) & (tile_y < self.grid.height)
+        tile_x = np.where(inside, tile_x, 0)
+        tile_y = np.where(inside, tile_y, 0)
+        return (np.where(inside, self.direction_x[tile_y, tile_x], 0),
+                np.where(inside, self.direction_y[tile_y, tile_x], 0))
+
+class FlowFieldCache:
+    """Flow fields por conjunto de alvos, reaproveitados entre ticks.
+
+    Um campo é recalculado só quando os tiles mudam (versão do mapa) ou
+    quando o conjunto de alvos é novo; os menos usados saem do cache."""
+
+    def __init__(self, grid: TileGrid, max_fields: int = CACHE_FIELDS):
+        self.grid = grid
+        self.max_fields = max_fields
+        self.fields: 'OrderedDict[Tuple[Tile, ...], FlowField]' = OrderedDict()
+        self.stats = {'built': 0, 'hits': 0}
+
+    def field(self, targets: Sequence[Tile]) -> FlowField:
+        """Flow field até os alvos (tiles), do cache quando ainda vale"""
+        key = tuple(sorted(set(targets)))
+        field = self.fields.get(key)
+        if field is not None and not field.stale:
+            self.fields.move_to_end(key)
+            self.stats['hits'] += 1
+            return field
+        field = FlowField(self.grid, key)
+        self.stats['built'] += 1
+        self.fields[key] = field
+        self.fields.move_to_end(key)
+        if len(self.fields) > self.max_fields:
+            self.fields.popitem(last=False)
+        return field
+
+    def field_to(self, x: float, y: float) -> FlowField:
+        """Flow field até a posição (em px), ex.: a de um jogador"""
+        size = self.grid.tile_size
+        return self.field(((int(x // size), int(y // size)),))
+
+    def clear(self):
+        self.fields.clear()
+
+if __name__ == "__main__":
+    # Benchmark: python -m src.core.engine.world.flow_field
+    import heapq
+    import time
+
+    SIZE = 256  # Tiles por lado
+    TILE = 16
+    grid = TileGrid(SIZE, SIZE, TILE)
+    grid.randomize(wall_chance=0.25, water_chance=0.0, seed=7)
+    target = (SIZE // 2, SIZE // 2)
+    grid.set_tile(*target, TileType.WALKABLE)
+    cache = FlowFieldCache(grid)
+
+    start = time.perf_counter()
+    field = cache.field((target,))
+    build = time.perf_counter() - start
+    reachable = int((field.distance >= 0).sum())
+    print(f"mapa {SIZE}x{SIZE}: flow field em {build * 1e3:6.1f} ms ({reachable} tiles alcançáveis)")
+
+    walkable = np.argwhere(field.distance[1:-1, 1:-1] > 0)
+
+    def astar(start_tile: Tile) -> int:
+        """A* de um monstro só (4 vizinhos), para comparação"""
+        tiles = grid.tiles
+        open_heap = [(0, 0, start_tile)]
+        cost = {start_tile: 0}
+        while open_heap:
+            _, g, (x, y) = heapq.heappop(open_heap)
+            if (x, y) == target:
+                return g
+            for dx, dy in NEIGHBORS[:4]:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < SIZE and 0 <= ny < SIZE and tiles[ny, nx] == WALKABLE and g + 1 < cost.get((nx, ny), 1 << 30):
+                    cost[(nx, ny)] = g + 1
+                    heapq.heappush(open_heap, (g + 1 + abs(nx - target[0]) + abs(ny - target[1]), g + 1, (nx, ny)))
+        return UNREACHABLE
+
+    rng = np.random.default_rng(1)
+    for agents in (1000, 5000, 20000):
+        picks = walkable[rng.integers(0, len(walkable), agents)]
+        xs = (picks[:, 1] + 0.5) * TILE
+        ys = (picks[:, 0] + 0.5) * TILE
+        start = time.perf_counter()
+        for _ in range(60):
+            cache.field((target,))  # Acerto no cache
+            dx, dy = field.directions(xs, ys)
+            xs = xs + dx
+            ys = ys + dy
+        tick = (time.perf_counter() - start) / 60
+        print(f"{agents:6d} monstros: {tick * 1e3:6.3f} ms por tick")
+
+    sample = walkable[rng.integers(0, len(walkable), 50)]
+    start = time.perf_counter()
+    for y, x in sample:
+        assert astar((int(x), int(y))) == field.distance[y + 1, x + 1]
+    per_agent = (time.perf_counter() - start) / len(sample)
+    print(f"A* por monstro: {per_agent * 1e3:6.2f} ms (1000 monstros = {per_agent * 1e3 * 1000:7.0f} ms por tick)")
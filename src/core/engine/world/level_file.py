@@ -0,0 +1,174 @@
+import mmap
+import struct
+import numpy as np
+from typing import Sequence
+
+# Cabeçalho: magic, versão, camadas, largura, altura (em tiles), tile_size,
+# chunk_size (0 = camadas em linhas corridas). Depois vêm as camadas, uint8.
+MAGIC = b'CDML'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIIHH')
+DEFAULT_CHUNK = 32  # Chunks de 32x32 tiles = 1 KiB por camada
+
+def _padded(size: int, chunk_size: int) -> int:
+    return -(-size // chunk_size) * chunk_size if chunk_size else size
+
+class ChunkedLayer:
+    """Camada guardada em chunks quadrados contíguos, vista como grade (y, x).
+
+    Indexar com inteiros, slices ou arrays de coordenadas lê só os chunks
+    tocados; o array de blocos é uma view do mmap, sem cópia."""
+
+    def __init__(self, blocks: np.ndarray, width: int, height: int):
+        self.blocks = blocks  # (chunks_y, chunks_x, chunk_size, chunk_size)
+        self.chunk_size = blocks.shape[2]
+        self.shape = (height, width)
+        self.dtype = blocks.dtype
+
+    def _index(self, index, axis: int) -> np.ndarray:
+        """Índice de um eixo como array de inteiros, com negativos normalizados"""
+        length = self.shape[axis]
+        if isinstance(index, slice):
+            return np.arange(*index.indices(length))
+        index = np.asarray(index)
+        if index.dtype.kind not in 'iu':
+            raise IndexError(f"Índice inválido para a camada: {index.dtype}")
+        if index.size and (index.min() < -length or index.max() >= length):
+            raise IndexError(f"Índice fora de [0, {length}) no eixo {axis}")
+        return np.where(index < 0, index + length, index)
+
+    def __getitem__(self, key):
+        y_key, x_key = key
+        y, x = self._index(y_key, 0), self._index(x_key, 1)
+        # Mesma forma que a indexação do NumPy: slices combinam em produto
+        # externo com o outro eixo; inteiros e arrays combinam ponto a ponto
+        if isinstance(y_key, slice) and isinstance(x_key, slice):
+            y, x = np.ix_(y, x)
+        elif isinstance(y_key, slice):
+            y = y.reshape((-1,) + (1,) * x.ndim)
+        elif isinstance(x_key, slice):
+            y = y[..., None]
+        size = self.chunk_size
+        return self.blocks[y // size, x // size, y % size, x % size]
+
+    def __array__(self, dtype=None, copy=None):
+        """Copia a camada inteira para uma grade comum (toca todas as páginas)"""
+        chunks_y, chunks_x, size, _ = self.blocks.shape
+        grid = self.blocks.transpose(0, 2, 1, 3).reshape(chunks_y * size, chunks_x * size)
+        grid = grid[:self.shape[0], :self.shape[1]]
+        return grid.astype(dtype) if dtype is not None else grid
+
+class LevelFile:
+    """Arquivo de nível aberto por mmap, só leitura.
+
+    Abrir lê só o cabeçalho; as camadas são views NumPy sobre o mapeamento
+    e o sistema operacional carrega apenas as páginas que forem lidas. Com
+    chunk_size, cada chunk de uma camada fica contíguo no arquivo, então
+    uma região do mapa ocupa poucas páginas mesmo em mapas muito largos."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if len(self.mmap) < HEADER.size:
+                raise ValueError(f"{path}: arquivo de nível truncado")
+            (magic, version, self.layer_count, self.width, self.height,
+             self.tile_size, self.chunk_size) = HEADER.unpack_from(self.mmap)
+            if magic != MAGIC:
+                raise ValueError(f"{path}: não é um arquivo de nível")
+            if version != VERSION:
+                raise ValueError(f"{path}: versão de nível {version} não suportada")
+            self.layer_size = _padded(self.width, self.chunk_size) * _padded(self.height, self.chunk_size)
+            if len(self.mmap) < HEADER.size + self.layer_count * self.layer_size:
+                raise ValueError(f"{path}: arquivo de nível truncado")
+        except ValueError:
+            self.mmap.close()
+            raise
+
+    def __enter__(self) -> 'LevelFile':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def layer(self, index: int = 0):
+        """Camada 'index' como grade (height, width), sem ler os tiles"""
+        if self.mmap is None:
+            raise ValueError(f"{self.path}: arquivo de nível fechado")
+        if not 0 <= index < self.layer_count:
+            raise IndexError(f"Camada {index} fora de [0, {self.layer_count})")
+        data = np.frombuffer(self.mmap, dtype=np.uint8, count=self.layer_size,
+                             offset=HEADER.size + index * self.layer_size)
+        if not self.chunk_size:
+            return data.reshape(self.height, self.width)
+        size = self.chunk_size
+        blocks = data.reshape(_padded(self.height, size) // size, _padded(self.width, size) // size, size, size)
+        return ChunkedLayer(blocks, self.width, self.height)
+
+    def close(self):
+        """Fecha o mapeamento.
+
+        Se ainda há camadas devolvidas por layer() em uso, elas seguram o
+        mapeamento: o arquivo só é desmapeado quando a última for liberada."""
+        if self.mmap is None:
+            return
+        try:
+            self.mmap.close()
+        except BufferError:
+            pass  # Views vivas; o mmap fecha sozinho quando elas forem coletadas
+        self.mmap = None
+
+def save_level(path: str, layers: Sequence, tile_size: int = 16, chunk_size: int = DEFAULT_CHUNK):
+    """Grava as camadas (grades height x width de valores 0..255) num arquivo de nível"""
+    grids = [np.asarray(layer, dtype=np.uint8) for layer in layers]
+    if not grids:
+        raise ValueError("Um nível precisa de pelo menos uma camada")
+    height, width = grids[0].shape
+    if any(grid.shape != (height, width) for grid in grids):
+        raise ValueError("Todas as camadas precisam ter o mesmo tamanho")
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(grids), width, height, tile_size, chunk_size))
+        for grid in grids:
+            if chunk_size:
+                size = chunk_size
+                padded = np.zeros((_padded(height, size), _padded(width, size)), dtype=np.uint8)
+                padded[:height, :width] = grid
+                grid = padded.reshape(padded.shape[0] // size, size, padded.shape[1] // size, size)
+                grid = grid.transpose(0, 2, 1, 3)
+            f.write(np.ascontiguousarray(grid).tobytes())
+
+if __name__ == "__main__":
+    # Benchmark: python -m src.core.engine.world.level_file
+    import os
+    import tempfile
+    import time
+
+    WIDTH = HEIGHT = 4096  # 16 Mi tiles
+    rng = np.random.default_rng(1)
+    tiles = (rng.random((HEIGHT, WIDTH)) < 0.2).astype(np.uint8)
+    queries = 10000
+    ys = rng.integers(1000, 1064, queries)
+    xs = rng.integers(2000, 2128, queries)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for chunk_size in (0, DEFAULT_CHUNK):
+            path = os.path.join(directory, f"level{chunk_size}.cdml")
+            save_level(path, [tiles], chunk_size=chunk_size)
+            start = time.perf_counter()
+            level = LevelFile(path)
+            layer = level.layer(0)
+            opened = time.perf_counter() - start
+            values = layer[ys, xs]
+            queried = time.perf_counter() - start - opened
+            assert (values == tiles[ys, xs]).all()
+            print(f"chunk_size={chunk_size:2d}: abrir {opened * 1e3:6.3f} ms, "
+                  f"{queries} consultas numa região {queried * 1e3:6.3f} ms")
+            del layer, values
+            level.close()
+
+        nested = tiles[:1024, :1024].tolist()
+        start = time.perf_counter()
+        np.asarray(nested, dtype=np.uint8)
+        print(f"lista aninhada 1024x1024: {(time.perf_counter() - start) * 1e3:7.1f} ms")
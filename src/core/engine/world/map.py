@@ -1,46 +1,46 @@
-import pyxel
-from enum import Enum
+import numpy as np
+from .level_file import DEFAULT_CHUNK, LevelFile, save_level
+from .tile_grid import TileGrid, TileType
 
-class TileType(Enum):
-    WALKABLE = 0
-    WALL = 1
-    WATER = 2
-
-class GameMap:
-    def __init__(self, width, height):
-        self.width = width
-        self.height = height
-        self.tiles = [[TileType.WALKABLE for _ in range(width)] for _ in range(height)]
-        self.tile_size = 16
+class GameMap(TileGrid):
+    def __init__(self, width, height, tiles=None):
+        super().__init__(width, height, tile_size=16, tiles=tiles)
+        self.level = None  # LevelFile de onde vêm os tiles, se aberto por load_level
         
     def load_from_tiledata(self, data):
         """Carrega o mapa a partir de dados (pode ser do Pyxel ou arquivo externo)"""
-        for y in range(self.height):
-            for x in range(self.width):
-                self.tiles[y][x] = TileType(data[y][x])
+        tiles = np.asarray(data)[:self.height, :self.width]
+        if tiles.shape != (self.height, self.width):
+            raise ValueError(f"Dados {tiles.shape} menores que o mapa {(self.height, self.width)}")
+        if tiles.size and (tiles.min() < 0 or tiles.max() > max(tile.value for tile in TileType)):
+            raise ValueError("Tile desconhecido nos dados do mapa")
+        self.tiles[:] = tiles
+        self.touch()
     
-    def is_walkable(self, x, y):
-        """Verifica se a posição é transitável"""
-        tile_x, tile_y = int(x // self.tile_size), int(y // self.tile_size)
-        if 0 <= tile_x < self.width and 0 <= tile_y < self.height:
-            return self.tiles[tile_y][tile_x] == TileType.WALKABLE
-        return False
+    @classmethod
+    def load_level(cls, path, layer=0):
+        """Abre um arquivo de nível por mmap; os tiles só são lidos quando consultados.
+
+        O mapa fica só leitura: para editar, copie os tiles para um GameMap
+        novo com load_from_tiledata e exporte de volta com save_level."""
+        level = LevelFile(path)
+        try:
+            game_map = cls(level.width, level.height, level.layer(layer))
+        except IndexError:
+            level.close()
+            raise
+        game_map.tile_size = level.tile_size
+        game_map.entities.cell_size = level.tile_size  # Ainda vazio: só as células mudam de tamanho
+        game_map.level = level
+        return game_map
     
-    def check_map_collision(self, collider):
-        """Verifica colisão com tiles não walkable"""
-        # Para um collider circular
-        radius = collider.radius
-        
-        # Verifica os 4 pontos cardeais + centro
-        points_to_check = [
-            (collider.x, collider.y),  # centro
-            (collider.x - radius, collider.y),  # esquerda
-            (collider.x + radius, collider.y),  # direita
-            (collider.x, collider.y - radius),  # topo
-            (collider.x, collider.y + radius)   # base
-        ]
-        
-        for px, py in points_to_check:
-            if not self.is_walkable(px, py):
-                return True
-        return False
\ No newline at end of file
+    def save_level(self, path, chunk_size=DEFAULT_CHUNK):
+        """Exporta os tiles do mapa (gerado ou editado) para um arquivo de nível"""
+        save_level(path, [self.tiles], self.tile_size, chunk_size)
+    
+    def close(self):
+        """Copia os tiles para a memória e fecha o arquivo aberto por load_level"""
+        if self.level is not None:
+            self.tiles = np.array(self.tiles)
+            self.level.close()
+            self.level = None
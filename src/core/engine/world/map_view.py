@@ -0,0 +1,56 @@
+import math
+from abc import ABC, abstractmethod
+from typing import Callable, Optional, Tuple
+
+ColumnSource = Callable[[int], bytes]  # x -> tiles da coluna
+
+def visible_range(offset: float, viewport: int, tile_size: int, count: Optional[int] = None) -> range:
+    """Índices dos tiles que aparecem numa janela de 'viewport' px a partir de 'offset'.
+
+    Vale para colunas (scroll_x, largura da tela) e linhas (camera_y,
+    altura da tela). Inclui o tile parcialmente visível em cada borda, e
+    com 'count' o intervalo é limitado a [0, count). Todos os caminhos de
+    desenho do mapa percorrem só este intervalo, nunca o mapa inteiro."""
+    first = math.floor(offset / tile_size)
+    last = math.ceil((offset + viewport) / tile_size)
+    if count is not None:
+        first = max(0, first)
+        last = min(count, last)
+    return range(first, max(first, last))
+
+class ColumnStream(ABC):
+    """Base das superfícies circulares que guardam colunas já desenhadas.
+
+    A coluna x fica no slot (x % columns). stream() recebe o intervalo
+    visível (visible_range) e escreve só as colunas que ainda não estão na
+    superfície, então o custo por frame depende do tamanho da tela e não
+    de quantas colunas o mapa tem. As subclasses implementam write() (e,
+    se precisarem limpar o slot antes, clear())."""
+
+    def __init__(self, columns: int):
+        self.columns = columns
+        self.start = self.end = 0  # Colunas [start, end) já escritas
+
+    def invalidate(self):
+        """Esquece as colunas escritas (ex.: outro mapa); serão reescritas"""
+        self.start = self.end = 0
+
+    def stream(self, columns: range, *layers: Tuple[ColumnSource, int]):
+        """Garante na superfície as colunas do intervalo visível.
+
+        Cada camada é (fonte das colunas, primeira linha na superfície)."""
+        if not self.start <= columns.start <= self.end:
+            self.start = self.end = columns.start  # Pulo no scroll: recomeça na tela atual
+        for x in range(self.end, columns.stop):
+            self.clear(x)
+            for source, first_row in layers:
+                self.write(x, source(x), first_row)
+        self.end = max(self.end, columns.stop)
+        self.start = max(self.start, self.end - self.columns)
+
+    def clear(self, x: int):
+        """Libera o slot da coluna x antes das camadas serem escritas nele"""
+
+    @abstractmethod
+    def write(self, x: int, column: bytes, first_row: int = 0):
+        """Escreve os tiles da coluna x na superfície a partir da linha 'first_row'"""
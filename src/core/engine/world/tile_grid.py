@@ -0,0 +1,146 @@
+import math
+import numpy as np
+from enum import Enum
+from typing import Hashable, Iterable, Iterator, Optional
+from ..physics.spatial_hash import ALL_LAYERS, SpatialHash
+
+class TileType(Enum):
+    WALKABLE = 0
+    WALL = 1
+    WATER = 2
+
+WALKABLE = TileType.WALKABLE.value
+
+# Centro + 4 pontos cardeais testados para um collider circular, em raios
+COLLIDER_OFFSETS = np.array([(0, 0), (-1, 0), (1, 0), (0, -1), (0, 1)], dtype=np.float64)
+
+class TileGrid:
+    """Grade de tiles em um array NumPy uint8 (height x width).
+
+    Cada tile é o valor de TileType (1 byte), em vez de uma lista de listas
+    de membros do Enum. As consultas em lote recebem arrays de pontos ou de
+    colliders e respondem todos com algumas operações vetorizadas; as
+    versões de um ponto só continuam existindo para o código antigo.
+
+    'entities' é um SpatialHash com células do tamanho do tile: as entidades
+    do mapa se registram com add_entity e atualizam o retângulo com
+    move_entity a cada movimento; entities_in, nearest_entity e
+    entity_collisions consultam só as células da região. rect_blocked usa
+    as mesmas células para testar o retângulo contra os tiles.
+
+    'version' aumenta a cada mudança de tiles (set_tile, fill, randomize,
+    ou touch() depois de escrever direto em 'tiles'); caches derivados do
+    mapa, como os flow fields, comparam a versão para se invalidar."""
+
+    def __init__(self, width: int, height: int, tile_size: int = 16, tiles=None):
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+        # 'tiles' permite usar uma grade já existente (ex.: camada de um LevelFile)
+        self.tiles = np.zeros((height, width), dtype=np.uint8) if tiles is None else tiles
+        self.entities = SpatialHash(tile_size)
+        self.version = 0
+
+    def tile(self, x: int, y: int) -> TileType:
+        """Tipo do tile na coluna x, linha y"""
+        return TileType(int(self.tiles[y, x]))
+
+    def touch(self):
+        """Marca os tiles como alterados (invalida caches derivados do mapa)"""
+        self.version += 1
+
+    def set_tile(self, x: int, y: int, tile_type: TileType):
+        self.tiles[y, x] = tile_type.value
+        self.touch()
+
+    def fill(self, tile_type: TileType = TileType.WALKABLE):
+        """Preenche o mapa inteiro com um tipo de tile"""
+        self.tiles.fill(tile_type.value)
+        self.touch()
+
+    def is_walkable(self, x, y) -> bool:
+        """Verifica se uma posição (em px) é transitável"""
+        tile_x, tile_y = int(x // self.tile_size), int(y // self.tile_size)
+        if 0 <= tile_x < self.width and 0 <= tile_y < self.height:
+            return bool(self.tiles[tile_y, tile_x] == WALKABLE)
+        return False
+
+    def walkable_points(self, xs, ys) -> np.ndarray:
+        """is_walkable de vários pontos (em px) de uma vez; fora do mapa é False"""
+        tile_x = np.floor_divide(np.asarray(xs, dtype=np.float64), self.tile_size).astype(np.intp)
+        tile_y = np.floor_divide(np.asarray(ys, dtype=np.float64), self.tile_size).astype(np.intp)
+        inside = (tile_x >= 0) & (tile_x < self.width) & (tile_y >= 0) & (tile_y < self.height)
+        walkable = np.zeros(inside.shape, dtype=bool)
+        walkable[inside] = self.tiles[tile_y[inside], tile_x[inside]] == WALKABLE
+        return walkable
+
+    def check_map_collision(self, collider) -> bool:
+        """Verifica colisão de um collider circular com tiles não transitáveis"""
+        x, y, radius = collider.x, collider.y, collider.radius
+        return not (self.is_walkable(x, y) and self.is_walkable(x - radius, y) and
+                    self.is_walkable(x + radius, y) and self.is_walkable(x, y - radius) and
+                    self.is_walkable(x, y + radius))
+
+    def rect_blocked(self, rect) -> bool:
+        """Se o retângulo (x, y, w, h) toca algum tile não transitável ou sai do mapa"""
+        x0, y0, x1, y1 = self.entities.cell_span(rect)
+        # A borda direita/inferior só conta se o retângulo entra na célula
+        if (rect[0] + rect[2]) % self.tile_size == 0:
+            x1 -= 1
+        if (rect[1] + rect[3]) % self.tile_size == 0:
+            y1 -= 1
+        if x0 < 0 or y0 < 0 or x1 >= self.width or y1 >= self.height:
+            return True
+        return bool((np.asarray(self.tiles[y0:y1 + 1, x0:x1 + 1]) != WALKABLE).any())
+
+    def add_entity(self, key: Hashable, rect, layer: int = 1):
+        """Registra a entidade (retângulo x, y, w, h em px) na camada 'layer' (um bit)"""
+        self.entities.insert(key, rect, layer)
+
+    def move_entity(self, key: Hashable, rect):
+        """Atualiza o retângulo da entidade; só troca de células ao cruzar uma borda"""
+        self.entities.move(key, rect)
+
+    def remove_entity(self, key: Hashable):
+        self.entities.remove(key)
+
+    def entities_in(self, rect, mask: int = ALL_LAYERS) -> Iterator[Hashable]:
+        """Entidades das camadas em 'mask' que se sobrepõem ao retângulo"""
+        return self.entities.query(rect, mask)
+
+    def nearest_entity(self, x: float, y: float, mask: int = ALL_LAYERS, max_distance: float = math.inf,
+                       exclude: Optional[Hashable] = None) -> Optional[Hashable]:
+        """Entidade das camadas em 'mask' mais próxima do ponto (em px)"""
+        return self.entities.nearest(x, y, mask, max_distance, exclude)
+
+    def entity_collisions(self, key: Hashable, mask: int = ALL_LAYERS) -> Iterator[Hashable]:
+        """Outras entidades das camadas em 'mask' que se sobrepõem à entidade 'key'"""
+        return (other for other in self.entities.query(self.entities.rect(key), mask) if other != key)
+
+    def entity_blocked(self, key: Hashable) -> bool:
+        """rect_blocked do retângulo registrado da entidade"""
+        return self.rect_blocked(self.entities.rect(key))
+
+    def collide_circles(self, xs, ys, radii) -> np.ndarray:
+        """check_map_collision de vários colliders (arrays de x, y e raio) de uma vez"""
+        xs = np.asarray(xs, dtype=np.float64)[:, None]
+        ys = np.asarray(ys, dtype=np.float64)[:, None]
+        radii = np.asarray(radii, dtype=np.float64)[:, None]
+        points_x = xs + radii * COLLIDER_OFFSETS[:, 0]
+        points_y = ys + radii * COLLIDER_OFFSETS[:, 1]
+        return ~self.walkable_points(points_x, points_y).all(axis=1)
+
+    def check_map_collisions(self, colliders: Iterable) -> np.ndarray:
+        """check_map_collision de uma lista de colliders (objetos com x, y, radius)"""
+        colliders = list(colliders)
+        return self.collide_circles([collider.x for collider in colliders],
+                                    [collider.y for collider in colliders],
+                                    [collider.radius for collider in colliders])
+
+    def randomize(self, wall_chance: float = 0.2, water_chance: float = 0.1,
+                  seed: Optional[int] = None):
+        """Sorteia paredes e água sobre o mapa atual, uma amostra por tile de uma vez"""
+        rand = np.random.default_rng(seed).random((self.height, self.width))
+        self.tiles[rand < wall_chance] = TileType.WALL.value
+        self.tiles[(rand >= wall_chance) & (rand < wall_chance + water_chance)] = TileType.WATER.value
+        self.touch()
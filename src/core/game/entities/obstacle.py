@@ -1,13 +1,19 @@
 import pyxel
+from typing import Dict, List, Tuple
+from .obstacle_types import DIABRETE, OBSTACLE_TYPES, SKELETON
 
 class Obstacle:
     def __init__(self, x, y, game_state):
-        self.x = x
-        self.y = y
         self.width = 15
         self.height = 15
         self.game_state = game_state
         self.color = pyxel.COLOR_WHITE
+        self.reset(x, y)
+    
+    def reset(self, x, y):
+        """Reposiciona o obstáculo para reutilizá-lo (pool do ObstacleController)"""
+        self.x = x
+        self.y = y
     
     def update(self, dt):
         """Atualiza posição do obstáculo com base na velocidade do jogo"""
@@ -27,27 +33,37 @@ class Obstacle:
     
 
 class SkeletonObstacle:
+    type_id = SKELETON
+    SHAPE_PATH = "../assets/animations/obstacles/skeleton.shape"
+    _frames_cache: Dict[str, List[Tuple[int, int, int, int]]] = {}  # Frames por arquivo .shape
+    
     def __init__(self, x, y, game_state):
         self.width = 10
         self.height = 14
-        self.x = x
-        self.y = y - self.height
         self.game_state = game_state
         self.color_key = pyxel.COLOR_GREEN
         
-        # Animação
-        self.animation_frames = []
+        # Animação (frames lidos uma vez e compartilhados entre os esqueletos)
+        self.animation_frames = self._load_sprites()
+        self.animation_speed = 0.2  # Velocidade da animação
+        self.reset(x, y)
+    
+    def reset(self, x, y):
+        """Reposiciona o esqueleto para reutilizá-lo (pool do ObstacleController)"""
+        self.x = x
+        self.y = y - self.height
         self.current_frame = 0
         self.animation_time = 0
-        self.animation_speed = 0.2  # Velocidade da animação
-        
-        # Carrega os sprites
-        self._load_sprites()
     
-    def _load_sprites(self):
-        """Carrega os frames de animação do arquivo .shape"""
+    @classmethod
+    def _load_sprites(cls) -> List[Tuple[int, int, int, int]]:
+        """Carrega os frames de animação do arquivo .shape (só na primeira vez)"""
+        frames = cls._frames_cache.get(cls.SHAPE_PATH)
+        if frames is not None:
+            return frames
+        frames = []
         try:
-            with open("../assets/animations/obstacles/skeleton.shape", "r") as f:
+            with open(cls.SHAPE_PATH, "r") as f:
                 for line in f:
                     if line.startswith("frame"):
                         parts = line.split()
@@ -55,14 +71,16 @@ class SkeletonObstacle:
                         y = int(parts[2])
                         w = int(parts[3])
                         h = int(parts[4])
-                        self.animation_frames.append((x, y, w, h))
+                        frames.append((x, y, w, h))
         except FileNotFoundError:
             # Fallback caso o arquivo não exista
-            self.animation_frames = [
+            frames = [
                 (0, 0, 16, 24),  # Frame 1
                 (16, 0, 16, 24)  # Frame 2
             ]
             print("Arquivo skeleton.shape não encontrado, usando frames padrão")
+        cls._frames_cache[cls.SHAPE_PATH] = frames
+        return frames
     
     def update(self, dt):
         """Atualiza a posição e animação do esqueleto"""
@@ -96,6 +114,52 @@ class SkeletonObstacle:
         return self.x + self.width < 0
     
 
+class DiabreteObstacle:
+    """Grupo de diabretes: um obstáculo só, com as cópias do sprite lado a lado
+    (tamanho, frames e cópias vêm da tabela de tipos compartilhada)"""
+    type_id = DIABRETE
+    
+    def __init__(self, x, y, game_state):
+        obstacle_type = OBSTACLE_TYPES[DIABRETE]
+        self.obstacle_type = obstacle_type
+        self.width = obstacle_type.width
+        self.height = obstacle_type.height
+        self.game_state = game_state
+        self.color_key = pyxel.COLOR_GREEN
+        self.animation_frames = obstacle_type.animation_frames
+        self.animation_speed = obstacle_type.animation_speed
+        self.reset(x, y)
+    
+    def reset(self, x, y):
+        """Reposiciona o grupo para reutilizá-lo (pool do ObstacleController)"""
+        self.x = x
+        self.y = y - self.height
+        self.current_frame = 0
+        self.animation_time = 0
+    
+    def update(self, dt):
+        """Atualiza a posição e a animação do grupo"""
+        self.x -= self.game_state.current_speed * dt * 60
+        self.animation_time += dt
+        if self.animation_time >= self.animation_speed:
+            self.animation_time = 0
+            self.current_frame = (self.current_frame + 1) % len(self.animation_frames)
+    
+    def draw(self):
+        """Desenha todas as cópias do frame atual"""
+        u, v, w, h = self.animation_frames[self.current_frame]
+        for x, y in self.obstacle_type.sprite_positions(self.x, self.y, self.current_frame):
+            pyxel.blt(x, y, 0, u, v, w, h, self.color_key)
+    
+    def get_hitbox(self):
+        """Retorna a hitbox do grupo inteiro para colisão"""
+        return (self.x, self.y, self.width, self.height)
+    
+    def is_off_screen(self, screen_width):
+        """Verifica se o grupo saiu da tela"""
+        return self.x + self.width < 0
+    
+
 class ObstacleRenderer:
     def __init__(self, image_bank: int = 1):
         self.image_bank = image_bank
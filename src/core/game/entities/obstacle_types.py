@@ -0,0 +1,61 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+from ...engine.physics.pixel_mask import COLOR_KEY_GREEN, PixelMask, SpriteSheet, frame_masks, union_bounds
+
+Frame = Tuple[int, int, int, int]  # (u, v, largura, altura) no banco de imagens 0
+
+class ObstacleType:
+    """Dados compartilhados por todos os obstáculos de um tipo (flyweight).
+
+    Tamanho, frames, velocidade da animação e máscaras existem uma vez por
+    tipo; cada obstáculo guarda só o id do tipo. Servidor, simulações e
+    cliente usam a mesma tabela, e os snapshots levam só o id inteiro."""
+    __slots__ = ('type_id', 'name', 'width', 'height', 'animation_frames', 'animation_speed',
+                 'copies', 'gap', 'masks', 'hitbox')
+
+    def __init__(self, type_id: int, name: str, width: int, height: int,
+                 animation_frames: Sequence[Frame], animation_speed: float,
+                 copies: int = 1, gap: int = 2):
+        self.type_id = type_id
+        self.name = name
+        self.width = width
+        self.height = height
+        self.animation_frames = tuple(animation_frames)
+        self.animation_speed = animation_speed  # Segundos por frame
+        self.copies = copies                    # Sprites desenhados lado a lado
+        self.gap = gap                          # Espaço entre as cópias, em px
+        self.masks: Optional[List[PixelMask]] = None
+        self.hitbox: Optional[Tuple[int, int, int, int]] = None
+
+    def __repr__(self) -> str:
+        return f"ObstacleType({self.type_id}, {self.name!r})"
+
+    def sprite_positions(self, x: float, y: float, frame: int) -> List[Tuple[float, float]]:
+        """Onde desenhar cada cópia do frame, alinhada pela base da caixa"""
+        w, h = self.animation_frames[frame][2:]
+        return [(x + copy * (w + self.gap), y + self.height - h) for copy in range(self.copies)]
+
+SKELETON = 0
+DIABRETE = 1
+
+OBSTACLE_TYPES: Tuple[ObstacleType, ...] = (
+    ObstacleType(SKELETON, 'skeleton', 10, 12, (
+        (0, 96, 10, 12),   # Frame 1
+        (17, 94, 10, 14)   # Frame 2
+    ), 0.2),
+    ObstacleType(DIABRETE, 'diabrete', 65, 12, (
+        (0, 114, 10, 11),  # Frame 1
+        (17, 113, 10, 12)  # Frame 2
+    ), 0.2, copies=5),
+)
+
+TYPE_IDS: Dict[str, int] = {obstacle_type.name: obstacle_type.type_id for obstacle_type in OBSTACLE_TYPES}
+
+def load_masks(sheet: SpriteSheet):
+    """Gera as máscaras de colisão de todos os tipos (uma vez por processo)"""
+    for obstacle_type in OBSTACLE_TYPES:
+        if obstacle_type.masks is not None:
+            continue
+        masks = frame_masks(sheet, obstacle_type.animation_frames, COLOR_KEY_GREEN,
+                            obstacle_type.height, obstacle_type.copies, obstacle_type.gap)
+        obstacle_type.masks = masks
+        obstacle_type.hitbox = union_bounds(masks)
@@ -0,0 +1,127 @@
+from typing import Dict, List, Sequence, Tuple
+from .obstacle_types import OBSTACLE_TYPES, ObstacleType
+
+# Estados booleanos do jogador, empacotados em um único inteiro
+FLAG_JUMPING = 1
+FLAG_DUCKING = 2
+FLAG_DOUBLE_JUMP = 4
+FLAG_READY = 8
+
+def _flag(bit: int, doc: str) -> property:
+    """Expõe um bit de 'flags' como atributo booleano"""
+    def getter(self) -> bool:
+        return bool(self.flags & bit)
+
+    def setter(self, value: bool):
+        if value:
+            self.flags |= bit
+        else:
+            self.flags &= ~bit
+
+    return property(getter, setter, doc=doc)
+
+class PlayerRecord:
+    """Jogador da simulação do servidor.
+
+    Atributos fixos em __slots__ (sem dicionário por instância) e os estados
+    booleanos em um único inteiro de flags. As dimensões são da classe, não
+    de cada jogador."""
+    __slots__ = ('id', 'x', 'y', 'jump_velocity', 'flags', 'current_frame',
+                 'animation_ticks', 'color', 'char_type')
+
+    width = 15
+    height = 20
+    duck_height = 10
+
+    is_jumping = _flag(FLAG_JUMPING, "Está no ar")
+    is_ducking = _flag(FLAG_DUCKING, "Está agachado")
+    has_double_jump = _flag(FLAG_DOUBLE_JUMP, "Ainda pode dar o pulo duplo")
+    ready = _flag(FLAG_READY, "Marcou pronto no lobby")
+
+    def __init__(self, player_id: int, x: float, y: float, color: int, char_type: str):
+        self.id = player_id
+        self.x = x
+        self.y = y
+        self.jump_velocity = 0.0
+        self.flags = FLAG_DOUBLE_JUMP
+        self.current_frame = 0
+        self.animation_ticks = 0
+        self.color = color
+        self.char_type = char_type
+
+    @property
+    def hitbox_height(self) -> int:
+        return self.duck_height if self.flags & FLAG_DUCKING else self.height
+
+    def to_snapshot(self, animation_frames: Sequence[Tuple[int, int, int, int]]) -> Dict:
+        """Formato enviado aos clientes no get_game (mesmas chaves de antes)"""
+        sprite_x, sprite_y, sprite_w, sprite_h = animation_frames[self.current_frame]
+        return {
+            'id': self.id,
+            'x': self.x,
+            'y': self.y,
+            'width': self.width,
+            'height': self.height,
+            'duck_height': self.duck_height,
+            'is_ducking': self.is_ducking,
+            'is_jumping': self.is_jumping,
+            'color': self.color,
+            'current_frame': self.current_frame,
+            'sprite_x': sprite_x,
+            'sprite_y': sprite_y,
+            'sprite_w': sprite_w,
+            'sprite_h': sprite_h
+        }
+
+    def to_list(self) -> List:
+        """Forma compacta para o blob de migração"""
+        return [self.id, self.x, self.y, self.jump_velocity, self.flags,
+                self.current_frame, self.animation_ticks, self.color, self.char_type]
+
+    @classmethod
+    def from_list(cls, data: List) -> 'PlayerRecord':
+        player_id, x, y, jump_velocity, flags, current_frame, animation_ticks, color, char_type = data
+        player = cls(player_id, x, y, color, char_type)
+        player.jump_velocity = jump_velocity
+        player.flags = flags
+        player.current_frame = current_frame
+        player.animation_ticks = animation_ticks
+        return player
+
+class ObstacleRecord:
+    """Obstáculo da simulação do servidor: só o estado próprio. Tamanho,
+    frames e máscaras ficam no tipo (OBSTACLE_TYPES[type_id])."""
+    __slots__ = ('id', 'type_id', 'x', 'y', 'current_frame', 'animation_ticks')
+
+    def __init__(self, obstacle_id: int, type_id: int, x: float, y: float):
+        self.id = obstacle_id
+        self.type_id = type_id
+        self.x = x
+        self.y = y
+        self.current_frame = 0
+        self.animation_ticks = 0
+
+    @property
+    def obstacle_type(self) -> ObstacleType:
+        return OBSTACLE_TYPES[self.type_id]
+
+    def to_snapshot(self) -> Dict:
+        """Formato enviado aos clientes: o tipo vai como id inteiro"""
+        return {
+            'id': self.id,
+            'type': self.type_id,
+            'x': self.x,
+            'y': self.y,
+            'current_frame': self.current_frame
+        }
+
+    def to_list(self) -> List:
+        return [self.id, self.type_id, self.x, self.y, self.current_frame, self.animation_ticks]
+
+    @classmethod
+    def from_list(cls, data: List) -> 'ObstacleRecord':
+        obstacle_id, type_id, x, y, current_frame, animation_ticks = data
+        obstacle = cls(obstacle_id, type_id, x, y)
+        obstacle.current_frame = current_frame
+        obstacle.animation_ticks = animation_ticks
+        return obstacle
@@ -1,8 +1,13 @@
-import pyxel
 import random
+from ...engine.world.column_ring import ColumnRing
+from ...engine.world.map_view import visible_range
+from ...engine.world.background_cache import BackgroundCache
+from .chunk_generator import GROUND_TILE, ChunkGenerator
+
+GROUND_COLUMN = bytes([GROUND_TILE])
 
 class MapGenerator:
-    def __init__(self, game_state):
+    def __init__(self, game_state, map_seed=None):
         self.game_state = game_state
         self.tile_size = 16
         self.tileset_img = 1
@@ -12,27 +17,37 @@ class MapGenerator:
         self.map_height = 15     # Altura em tiles
         self.ground_level = 14   # Linha do chão
         
-        # Buffer de tiles (mantém apenas o necessário)
-        self.background_buffer = []
-        self.ground_buffer = []
+        # Terreno determinístico: a mesma seed gera o mesmo mapa em qualquer peer
+        self.map_seed = random.randint(0, 999999) if map_seed is None else map_seed
+        self.terrain = ChunkGenerator(self.map_seed, self.map_height, self.ground_level)
+        
+        # Buffers circulares de colunas (mantém apenas o necessário)
+        self.buffer_columns = self.visible_width * 3 + 16
+        self.background_buffer = ColumnRing(self.buffer_columns, self.map_height)
+        self.ground_buffer = ColumnRing(self.buffer_columns, 1)
+        
+        # Fundo composto numa imagem fora da tela; criado no primeiro draw,
+        # pois a lógica também roda em processos sem o pyxel inicializado
+        self.cache = None
         
         # Controle de scroll
         self.scroll_x = 0.0
-        self.last_tile = 0
         
         # Gera o segmento inicial
         self.generate_segment(0, self.visible_width * 2)
     
     def generate_segment(self, start_x, end_x):
         """Gera um segmento do mapa entre as posições x especificadas"""
-        for x in range(start_x, end_x):
+        if start_x != self.background_buffer.end:
+            # Segmento fora de sequência: o buffer recomeça nele
+            self.background_buffer.reset(start_x)
+            self.ground_buffer.reset(start_x)
+        for _, column in self.terrain.columns(start_x, end_x):
             # Background (preenche até o chão)
-            for y in range(self.map_height):
-                tile = random.choice([0, 1]) if y < self.ground_level else 1
-                self.background_buffer.append((x, y, tile))
+            self.background_buffer.append(column)
             
             # Chão (sempre o mesmo tile)
-            self.ground_buffer.append((x, self.ground_level, 4))
+            self.ground_buffer.append(GROUND_COLUMN)
     
     def update(self, dt):
         """Atualiza a posição de scroll e gerencia o buffer"""
@@ -42,44 +57,30 @@ class MapGenerator:
         current_tile = int(self.scroll_x / self.tile_size)
         
         # Gera novos segmentos conforme necessário (mapa infinito)
-        if current_tile > self.last_tile - self.visible_width:
-            self.generate_segment(self.last_tile + 1, current_tile + self.visible_width * 2)
-            self.last_tile = current_tile + self.visible_width
+        last_tile = self.background_buffer.end - 1
+        if current_tile > last_tile - self.visible_width:
+            self.generate_segment(last_tile + 1, current_tile + self.visible_width * 2)
         
-        # Remove tiles muito atrás para economizar memória
-        if current_tile > 50:
-            remove_threshold = current_tile - 30
-            self.background_buffer = [(x, y, t) for (x, y, t) in self.background_buffer if x >= remove_threshold]
-            self.ground_buffer = [(x, y, t) for (x, y, t) in self.ground_buffer if x >= remove_threshold]
+        # Remove tiles muito atrás para economizar memória (O(1) no buffer circular)
+        remove_threshold = current_tile - 30
+        self.background_buffer.evict_before(remove_threshold)
+        self.ground_buffer.evict_before(remove_threshold)
+    
+    def visible_columns(self, screen_width):
+        """Colunas do mapa que aparecem na tela com o scroll atual"""
+        return visible_range(self.scroll_x, screen_width, self.tile_size)
     
     def draw(self, screen_width, screen_height):
-        """Renderiza o mapa visível"""
-        # Calcula os tiles visíveis atualmente
-        start_tile = int(self.scroll_x / self.tile_size)
-        end_tile = start_tile + (screen_width // self.tile_size) + 2
+        """Renderiza o mapa visível com um ou dois blt largos"""
+        if self.cache is None:
+            self.cache = BackgroundCache(self.tileset_img, self.map_height, screen_width, self.tile_size)
         
-        # Desenha background
-        self.draw_layer(self.background_buffer, start_tile, end_tile, screen_width, screen_height)
+        # Só as colunas que entraram na tela são compostas: background e chão por cima
+        self.cache.stream(self.visible_columns(screen_width),
+                          (self.background_buffer.column, 0),
+                          (self.ground_buffer.column, self.ground_level))
         
-        # Desenha chão por cima
-        self.draw_layer(self.ground_buffer, start_tile, end_tile, screen_width, screen_height)
-    
-    def draw_layer(self, layer, start_tile, end_tile, screen_width, screen_height):
-        """Desenha uma camada específica do mapa"""
-        for x, y, tile in layer:
-            if start_tile <= x <= end_tile:
-                screen_x = x * self.tile_size - self.scroll_x
-                screen_y = y * self.tile_size
-                
-                if -self.tile_size <= screen_x <= screen_width and screen_y <= screen_height:
-                    pyxel.blt(
-                        int(screen_x),  # Coordenadas inteiras para evitar tremulação
-                        int(screen_y),
-                        self.tileset_img,
-                        tile * self.tile_size, 0,
-                        self.tile_size, self.tile_size,
-                        pyxel.COLOR_GREEN
-                    )
+        self.cache.draw(self.scroll_x, 0, screen_width)
     
     def get_ground_y(self):
         """Retorna a posição Y do chão em pixels"""
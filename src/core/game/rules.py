@@ -0,0 +1,18 @@
+from .entities import obstacle_types
+
+# Regras e dimensões do jogo compartilhadas pelas simulações (GameServer,
+# lockstep/rollback e o benchmark do passo em lote), a 60 ticks/s
+TICK_RATE = 60
+SCREEN_WIDTH = 320
+SCREEN_HEIGHT = 240
+TILE_SIZE = 16
+GROUND_LEVEL = 14
+GROUND_Y = GROUND_LEVEL * TILE_SIZE
+PLAYER_WIDTH = 15
+PLAYER_HEIGHT = 20
+PLAYER_DUCK_HEIGHT = 10
+PLAYER_FRAMES = 4
+
+# Tipos de obstáculo por id inteiro, da tabela compartilhada: (nome, largura, altura, frames)
+OBSTACLE_TYPES = tuple((obstacle_type.name, obstacle_type.width, obstacle_type.height,
+                        len(obstacle_type.animation_frames)) for obstacle_type in obstacle_types.OBSTACLE_TYPES)
@@ -39,7 +39,7 @@ class GameManager:
         from core.game.entities.player import Player
         from core.game.levels.map_generator import MapGenerator
         from core.game.systems.obstacle_controller import ObstacleController
-        from core.game.entities.obstacle import SkeletonObstacle
+        from core.game.entities.obstacle_types import OBSTACLE_TYPES
         
         # Inicializa sistemas
         map_gen = MapGenerator()
@@ -73,7 +73,7 @@ class GameManager:
                 map_tiles=map_gen.get_visible_tiles(),
                 scroll_x=map_gen.scroll_x,
                 obstacles=[{
-                    'type': 'skeleton' if isinstance(o, SkeletonObstacle) else 'square',
+                    'type': OBSTACLE_TYPES[o.type_id].name,
                     'x': o.x,
                     'y': o.y,
                     'frame': o.current_frame if hasattr(o, 'current_frame') else 0
@@ -96,10 +96,8 @@ class GameManager:
                 player.duck(False)
     
     def _check_collisions(self, player, obstacles):
-        for obstacle in obstacles.obstacles:
-            if player.check_collision(obstacle):
-                return True
-        return False
+        # O controller mantém os obstáculos no spatial hash: só a célula do player é visitada
+        return obstacles.colliding(player.get_hitbox()) is not None
     
     def send_input(self, command: str):
         self.input_queue.put(command)
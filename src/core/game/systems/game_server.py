@@ -2,6 +2,7 @@ import time
 import random
 from typing import Dict, List, Tuple, Optional
 import pyxel
+from core.engine.physics.collision import SweepAndPrune
 
 class GameServer:
     def __init__(self):
@@ -27,29 +28,14 @@ class GameServer:
         self.spawn_timer = 0
         self.spawn_interval = 2.5
         
-        # Mapa
+        # Mapa: cada cliente gera os tiles a partir da seed (nada de tiles na rede)
         self.scroll_x = 0.0
-        self.last_tile = 0
-        self.background_buffer = []
-        self.ground_buffer = []
-        self._generate_initial_map()
+        self.map_seed = random.randint(0, 999999)
     
     @property
     def current_speed(self) -> float:
         return self.game_speed * self.speed_multiplier
     
-    def _generate_initial_map(self):
-        """Gera o segmento inicial do mapa"""
-        visible_width = 20
-        for x in range(0, visible_width * 2):
-            # Background
-            for y in range(15):
-                tile = random.choice([0, 1]) if y < self.ground_level else 1
-                self.background_buffer.append((x, y, tile))
-            
-            # Chão
-            self.ground_buffer.append((x, self.ground_level, 4))
-    
     def add_player(self) -> str:
         """Adiciona um novo jogador e retorna seu ID"""
         player_id = str(self.last_player_id + 1)
@@ -124,22 +110,6 @@ class GameServer:
         
         # Atualiza scroll do mapa
         self.scroll_x += self.current_speed * dt * 60
-        current_tile = int(self.scroll_x / self.tile_size)
-        
-        # Gera novos segmentos do mapa conforme necessário
-        if current_tile > self.last_tile - 20:
-            for x in range(self.last_tile + 1, current_tile + 40):
-                for y in range(15):
-                    tile = random.choice([0, 1]) if y < self.ground_level else 1
-                    self.background_buffer.append((x, y, tile))
-                self.ground_buffer.append((x, self.ground_level, 4))
-            self.last_tile = current_tile + 20
-        
-        # Remove tiles muito atrás
-        if current_tile > 50:
-            remove_threshold = current_tile - 30
-            self.background_buffer = [(x, y, t) for (x, y, t) in self.background_buffer if x >= remove_threshold]
-            self.ground_buffer = [(x, y, t) for (x, y, t) in self.ground_buffer if x >= remove_threshold]
         
         # Atualiza jogadores
         ground_y = self.ground_level * self.tile_size
@@ -195,33 +165,22 @@ class GameServer:
                 })
     
     def _check_collisions(self):
-        """Verifica colisões entre jogadores e obstáculos"""
-        for player_id, player in self.players.items():
-            player_rect = (
+        """Verifica colisões entre jogadores e obstáculos (sweep-and-prune em x)"""
+        broad = SweepAndPrune([
+            (obstacle['x'], obstacle['y'], obstacle['width'], obstacle['height'])
+            for obstacle in self.obstacles
+        ])
+        player_rects = [
+            (
                 player['x'],
                 player['y'] + (player['height'] - (player['duck_height'] if player['is_ducking'] else player['height'])),
                 player['width'],
                 player['duck_height'] if player['is_ducking'] else player['height']
             )
-            
-            for obstacle in self.obstacles:
-                obstacle_rect = (
-                    obstacle['x'],
-                    obstacle['y'],
-                    obstacle['width'],
-                    obstacle['height']
-                )
-                
-                if self._check_rect_collision(player_rect, obstacle_rect):
-                    self.is_paused = True
-                    return
-    
-    def _check_rect_collision(self, rect1: Tuple, rect2: Tuple) -> bool:
-        """Verifica colisão entre dois retângulos (x, y, w, h)"""
-        return (rect1[0] < rect2[0] + rect2[2] and
-                rect1[0] + rect1[2] > rect2[0] and
-                rect1[1] < rect2[1] + rect2[3] and
-                rect1[1] + rect1[3] > rect2[1])
+            for player in self.players.values()
+        ]
+        if broad.any_overlap(player_rects):
+            self.is_paused = True
     
     def get_game_state(self) -> Dict:
         """Retorna o estado atual do jogo para renderização"""
@@ -234,8 +193,7 @@ class GameServer:
             'is_paused': self.is_paused,
             'players': self.players,
             'obstacles': self.obstacles,
-            'background_tiles': self.background_buffer,
-            'ground_tiles': self.ground_buffer,
+            'map_seed': self.map_seed,
             'tile_size': self.tile_size,
             'ground_level': self.ground_level
         }
\ No newline at end of file
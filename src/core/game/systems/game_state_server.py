@@ -1,3 +1,4 @@
+import random
 from typing import Dict
 import pyxel
 
@@ -13,6 +14,7 @@ class GameStateServer:
         self.screen_height = 240
         self.speed_multiplier = 1.0  # Add this line
         self.next_player_id = 1
+        self.map_seed = random.randint(0, 999999)  # Tiles are generated by each client from the seed
 
     def add_player(self) -> str:
         """Add a new player and return their ID"""
@@ -70,14 +72,5 @@ class GameStateServer:
             'screen_width': self.screen_width,
             'screen_height': self.screen_height,
             'speed_multiplier': self.speed_multiplier,  # Include this
-            'background_tiles': self._get_background_tiles(),
-            'ground_tiles': self._get_ground_tiles()
+            'map_seed': self.map_seed
         }
-
-    def _get_background_tiles(self):
-        """Generate background tiles"""
-        return [(x, y, 0) for x in range(0, 100) for y in range(10, 12)]
-
-    def _get_ground_tiles(self):
-        """Generate ground tiles"""
-        return [(x, 12, 1) for x in range(0, 100)]
\ No newline at end of file
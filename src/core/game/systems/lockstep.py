@@ -0,0 +1,323 @@
+import struct
+from typing import Dict, Iterable, List, Optional, Tuple
+from ...engine.physics.fixed_point import FP_ONE, to_fixed, from_fixed, fp_mul, fp_pow_ratio
+from ...engine.rng import RngStream
+from ..entities.obstacle_types import DIABRETE, SKELETON
+from ..rules import (GROUND_LEVEL, GROUND_Y, OBSTACLE_TYPES, PLAYER_DUCK_HEIGHT, PLAYER_FRAMES,
+                     PLAYER_HEIGHT, PLAYER_WIDTH, SCREEN_HEIGHT, SCREEN_WIDTH, TICK_RATE, TILE_SIZE)
+from .state_hash import DesyncDetector, decode_hashes, encode_hashes
+
+# Bits do input de um tick (o único dado trocado entre os peers em lockstep)
+INPUT_JUMP = 1
+INPUT_DUCK = 2
+
+# Flags do jogador
+FLAG_JUMPING = 1
+FLAG_DUCKING = 2
+FLAG_DOUBLE_JUMP = 4
+
+# Índices do registro de jogador [x, y, vy, flags, frame, animation_ticks]
+P_X, P_Y, P_VY, P_FLAGS, P_FRAME, P_ANIM = range(6)
+# Índices do registro de obstáculo [x, type_id, frame, animation_ticks]
+O_X, O_TYPE, O_FRAME, O_ANIM = range(4)
+
+# Streams de RNG derivados da seed do mapa
+STREAM_SPAWN = 1
+
+# Regras do jogo em ponto fixo (mesmos valores do GameServer, a 60 ticks/s)
+GAME_SPEED = to_fixed(2.0)
+JUMP_VELOCITY = to_fixed(-10.0)
+GRAVITY = to_fixed(0.6)
+SPEED_STEP = to_fixed(0.05)
+SPEED_RAMP_TICKS = 10 * TICK_RATE
+PLAYER_FRAME_TICKS = 6 * FP_ONE         # 0.1 s a 60 ticks/s, dividido pela velocidade
+OBSTACLE_FRAME_TICKS = 12 * FP_ONE      # 0.2 s a 60 ticks/s
+SPAWN_TICKS = 150                       # 2.5 s a 60 ticks/s
+SKELETON_CHANCE = 700                   # Em 1000 (o resto é diabrete)
+CULL_X = to_fixed(-50)
+
+# Pacote de inputs: cabeçalho + últimos N inputs (redundância contra perda)
+LOCKSTEP_MAGIC = b'L'
+TOKEN_SIZE = 8
+INPUT_HEADER = struct.Struct('!BIB')   # slot, último tick, quantidade de inputs
+INPUT_DELAY = 3                        # Ticks entre o input local e sua execução
+INPUT_REDUNDANCY = 8
+MAX_CATCH_UP_STEPS = 5
+
+class LockstepSimulation:
+    """Simulação determinística da partida para o modo lockstep.
+
+    Todo o estado é inteiro (posições e velocidades em ponto fixo Q16) e o
+    único RNG é um stream derivado da map_seed, então peers que aplicam os
+    mesmos inputs nos mesmos ticks chegam ao mesmo estado, bit a bit."""
+
+    def __init__(self, map_seed: int, slots: Iterable[int]):
+        self.map_seed = map_seed
+        self.tick = 0
+        self.scroll_x = 0
+        self.speed = FP_ONE
+        self.ramp_ticks = 0
+        self.score = 0
+        self.spawn_timer = 0
+        self.game_over = False
+        self.rng = RngStream(map_seed, STREAM_SPAWN)
+        self.players: Dict[int, List[int]] = {
+            slot: [to_fixed(100 - 50 * (slot - 1)), to_fixed(GROUND_Y - PLAYER_HEIGHT), 0,
+                   FLAG_DOUBLE_JUMP, 0, 0]
+            for slot in sorted(slots)
+        }
+        self.obstacles: List[List[int]] = []
+        self._spawn_threshold = self._threshold_for(self.speed)
+
+    def save_state(self) -> Tuple:
+        """Snapshot imutável do estado completo (só inteiros: barato a cada tick)"""
+        return (self.tick, self.scroll_x, self.speed, self.ramp_ticks, self.score,
+                self.spawn_timer, self.game_over, self.rng.state, self._spawn_threshold,
+                tuple(tuple(player) for player in self.players.values()),
+                tuple(tuple(obstacle) for obstacle in self.obstacles))
+
+    def load_state(self, state: Tuple):
+        """Volta exatamente ao estado de um snapshot de save_state"""
+        (self.tick, self.scroll_x, self.speed, self.ramp_ticks, self.score,
+         self.spawn_timer, self.game_over, self.rng.state, self._spawn_threshold,
+         players, obstacles) = state
+        for player, saved in zip(self.players.values(), players):
+            player[:] = saved
+        self.obstacles = [list(obstacle) for obstacle in obstacles]
+
+    def _threshold_for(self, speed: int) -> int:
+        """Intervalo de spawn em ticks ajustados: SPAWN_TICKS / speed ** 0.8"""
+        return SPAWN_TICKS * FP_ONE * FP_ONE // fp_pow_ratio(speed, 4, 5)
+
+    def _apply_input(self, player: List[int], mask: int):
+        flags = player[P_FLAGS]
+        if mask & INPUT_JUMP:
+            if not flags & FLAG_JUMPING and not flags & FLAG_DUCKING:
+                flags |= FLAG_JUMPING
+                player[P_VY] = fp_mul(JUMP_VELOCITY, self.speed)
+            elif flags & FLAG_DOUBLE_JUMP:
+                player[P_VY] = fp_mul(JUMP_VELOCITY, self.speed)
+                flags &= ~FLAG_DOUBLE_JUMP
+
+        ducking = bool(mask & INPUT_DUCK)
+        if ducking != bool(flags & FLAG_DUCKING):
+            if not flags & FLAG_JUMPING:
+                delta = to_fixed(PLAYER_HEIGHT - PLAYER_DUCK_HEIGHT)
+                player[P_Y] += delta if ducking else -delta
+            flags ^= FLAG_DUCKING
+        player[P_FLAGS] = flags
+
+    def step(self, inputs: Dict[int, int]):
+        """Avança um tick aplicando o input de cada slot"""
+        if self.game_over:
+            return
+        self.tick += 1
+        speed = self.speed
+
+        self.ramp_ticks += 1
+        if self.ramp_ticks >= SPEED_RAMP_TICKS:
+            self.speed = speed = speed + SPEED_STEP
+            self.ramp_ticks = 0
+            self._spawn_threshold = self._threshold_for(speed)
+
+        self.score += 2 * speed // TICK_RATE
+        self.scroll_x += fp_mul(GAME_SPEED, speed)
+
+        for slot, player in self.players.items():
+            self._apply_input(player, inputs.get(slot, 0))
+            flags = player[P_FLAGS]
+            if flags & FLAG_JUMPING:
+                player[P_Y] += player[P_VY]
+                player[P_VY] += fp_mul(GRAVITY, speed)
+                height = to_fixed(PLAYER_DUCK_HEIGHT if flags & FLAG_DUCKING else PLAYER_HEIGHT)
+                if player[P_Y] + height >= to_fixed(GROUND_Y):
+                    player[P_Y] = to_fixed(GROUND_Y) - height
+                    player[P_VY] = 0
+                    player[P_FLAGS] = (flags & ~FLAG_JUMPING) | FLAG_DOUBLE_JUMP
+
+            player[P_ANIM] += 1
+            if player[P_ANIM] * speed >= PLAYER_FRAME_TICKS:
+                player[P_ANIM] = 0
+                player[P_FRAME] = (player[P_FRAME] + 1) % PLAYER_FRAMES
+
+        self._update_obstacles(speed)
+        if self._check_collisions():
+            self.game_over = True
+
+    def _update_obstacles(self, speed: int):
+        obstacles = [obs for obs in self.obstacles
+                     if obs[O_X] + to_fixed(OBSTACLE_TYPES[obs[O_TYPE]][1]) > CULL_X]
+        move = fp_mul(fp_mul(GAME_SPEED, speed), speed)
+        for obstacle in obstacles:
+            obstacle[O_X] -= move
+            obstacle[O_ANIM] += speed
+            if obstacle[O_ANIM] >= OBSTACLE_FRAME_TICKS:
+                obstacle[O_ANIM] = 0
+                obstacle[O_FRAME] = (obstacle[O_FRAME] + 1) % OBSTACLE_TYPES[obstacle[O_TYPE]][3]
+
+        self.spawn_timer += speed
+        if self.spawn_timer >= self._spawn_threshold:
+            self.spawn_timer = 0
+            type_id = SKELETON if self.rng.below(1000) < SKELETON_CHANCE else DIABRETE
+            obstacles.append([to_fixed(SCREEN_WIDTH), type_id, 0, 0])
+        self.obstacles = obstacles
+
+    def _check_collisions(self) -> bool:
+        for player in self.players.values():
+            height = PLAYER_DUCK_HEIGHT if player[P_FLAGS] & FLAG_DUCKING else PLAYER_HEIGHT
+            px, py = player[P_X], player[P_Y] + to_fixed(PLAYER_HEIGHT - height)
+            pw, ph = to_fixed(PLAYER_WIDTH), to_fixed(height)
+            for obstacle in self.obstacles:
+                _, width, obstacle_height, _ = OBSTACLE_TYPES[obstacle[O_TYPE]]
+                ox, oy = obstacle[O_X], to_fixed(GROUND_Y - obstacle_height)
+                if (px < ox + to_fixed(width) and px + pw > ox and
+                        py < oy + to_fixed(obstacle_height) and py + ph > oy):
+                    return True
+        return False
+
+    def to_render_state(self) -> Dict:
+        """Estado no mesmo formato do get_game (floats só para desenhar)"""
+        players = {}
+        for slot, player in self.players.items():
+            players[str(slot)] = {
+                'x': from_fixed(player[P_X]),
+                'y': from_fixed(player[P_Y]),
+                'width': PLAYER_WIDTH,
+                'height': PLAYER_HEIGHT,
+                'duck_height': PLAYER_DUCK_HEIGHT,
+                'is_ducking': bool(player[P_FLAGS] & FLAG_DUCKING),
+                'is_jumping': bool(player[P_FLAGS] & FLAG_JUMPING),
+                'color': 13,
+                'current_frame': player[P_FRAME]
+            }
+        obstacles = []
+        for obstacle in self.obstacles:
+            obstacles.append({
+                'type': obstacle[O_TYPE],
+                'x': from_fixed(obstacle[O_X]),
+                'y': GROUND_Y - OBSTACLE_TYPES[obstacle[O_TYPE]][2],
+                'current_frame': obstacle[O_FRAME]
+            })
+        return {
+            'players': players,
+            'obstacles': obstacles,
+            'scroll_x': from_fixed(self.scroll_x),
+            'score': self.score // FP_ONE,
+            'speed_multiplier': from_fixed(self.speed),
+            'game_state': 'GAME_OVER' if self.game_over else 'PLAYING',
+            'tile_size': TILE_SIZE,
+            'ground_level': GROUND_LEVEL,
+            'screen_width': SCREEN_WIDTH,
+            'screen_height': SCREEN_HEIGHT,
+            'tick': self.tick
+        }
+
+def encode_inputs(token: str, slot: int, last_tick: int, masks: List[int],
+                  trailer: bytes = b'') -> bytes:
+    """Pacote cliente -> servidor: magic + token da sessão + inputs (+ hashes de estado)"""
+    return (LOCKSTEP_MAGIC + bytes.fromhex(token) + INPUT_HEADER.pack(slot, last_tick, len(masks))
+            + bytes(masks) + trailer)
+
+def decode_inputs(packet: bytes) -> Optional[Tuple[int, int, bytes, bytes]]:
+    """Pacote repassado pelo servidor (sem token) -> (slot, último tick, inputs, trailer)"""
+    if len(packet) < 1 + INPUT_HEADER.size or packet[:1] != LOCKSTEP_MAGIC:
+        return None
+    slot, last_tick, count = INPUT_HEADER.unpack_from(packet, 1)
+    start = 1 + INPUT_HEADER.size
+    masks = packet[start:start + count]
+    if len(masks) != count or count > last_tick + 1:
+        return None
+    return slot, last_tick, masks, packet[start + count:]
+
+def hash_trailer(detector: DesyncDetector) -> bytes:
+    """Hashes de estado a anexar ao próximo pacote de inputs, quando for a hora"""
+    report = detector.report()
+    return encode_hashes(report) if report is not None else b''
+
+def check_trailer(detector: DesyncDetector, trailer: bytes):
+    """Confere os hashes de estado que vieram junto com os inputs do peer"""
+    if trailer:
+        report = decode_hashes(trailer)
+        if report is not None:
+            detector.check(*report)
+
+def strip_token(packet: bytes) -> Tuple[str, bytes]:
+    """Separa o token do pacote recebido pelo servidor (o token não é repassado)"""
+    return packet[1:1 + TOKEN_SIZE].hex(), LOCKSTEP_MAGIC + packet[1 + TOKEN_SIZE:]
+
+class LockstepSession:
+    """Troca de inputs do lockstep: agenda o input local com atraso fixo, envia
+    os últimos N inputs a cada frame e só avança a simulação em ticks cujos
+    inputs de todos os jogadores já chegaram."""
+
+    def __init__(self, simulation: LockstepSimulation, slot: int, token: str,
+                 input_delay: int = INPUT_DELAY):
+        self.simulation = simulation
+        self.slot = slot
+        self.token = token
+        self.input_delay = input_delay
+        self.inputs: Dict[int, Dict[int, int]] = {}
+        self.local_inputs: List[int] = []  # Input local de cada tick desde o início
+        self.pending = 0
+        self.stalls = 0
+        self.detector = DesyncDetector(slot)
+
+        # Os primeiros ticks não têm input de ninguém: começam vazios para todos
+        for tick in range(1, input_delay + 1):
+            self.inputs[tick] = {s: 0 for s in simulation.players}
+        self.local_inputs = [0] * (input_delay + 1)
+
+    @property
+    def game_over(self) -> bool:
+        """Em lockstep todo tick simulado já é definitivo"""
+        return self.simulation.game_over
+
+    def add_local_input(self, mask: int) -> bytes:
+        """Registra o input do frame e retorna o pacote a enviar.
+
+        Enquanto a simulação espera o peer, o input é acumulado (um pulo não se
+        perde) e agendado assim que houver espaço na janela de atraso."""
+        self.pending |= mask
+        next_tick = len(self.local_inputs)
+        if next_tick <= self.simulation.tick + self.input_delay + 1:
+            self.local_inputs.append(self.pending)
+            self.inputs.setdefault(next_tick, {})[self.slot] = self.pending
+            self.pending = 0
+        last_tick = len(self.local_inputs) - 1
+        recent = self.local_inputs[max(0, last_tick - INPUT_REDUNDANCY + 1):]
+        return encode_inputs(self.token, self.slot, last_tick, recent, hash_trailer(self.detector))
+
+    def receive(self, packet: bytes):
+        """Guarda os inputs remotos ainda não simulados.
+
+        Ticks além da janela que um peer legítimo pode ter agendado são
+        descartados, para um pacote forjado não encher 'inputs'."""
+        decoded = decode_inputs(packet)
+        if decoded is None:
+            return
+        slot, last_tick, masks, trailer = decoded
+        if slot == self.slot or slot not in self.simulation.players:
+            return
+        check_trailer(self.detector, trailer)
+        first_tick = last_tick - len(masks) + 1
+        horizon = self.simulation.tick + self.input_delay + INPUT_REDUNDANCY
+        for offset, mask in enumerate(masks):
+            tick = first_tick + offset
+            if self.simulation.tick < tick <= horizon:
+                self.inputs.setdefault(tick, {})[slot] = mask
+
+    def advance(self, max_steps: int = MAX_CATCH_UP_STEPS) -> int:
+        """Executa os ticks com inputs completos e retorna quantos avançou"""
+        steps = 0
+        players = self.simulation.players
+        while steps < max_steps:
+            tick_inputs = self.inputs.get(self.simulation.tick + 1)
+            if tick_inputs is None or len(tick_inputs) < len(players):
+                if steps == 0:
+                    self.stalls += 1
+                break
+            del self.inputs[self.simulation.tick + 1]
+            self.simulation.step(tick_inputs)
+            self.detector.record(self.simulation.tick, self.simulation.save_state())
+            steps += 1
+        return steps
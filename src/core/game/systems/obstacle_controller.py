@@ -1,32 +1,62 @@
+import math
 import random
 import pyxel
-from core.game.entities.obstacle import Obstacle
+from collections import deque
+from core.engine.physics.spatial_hash import SpatialHash
+from core.game.entities.obstacle import DiabreteObstacle
 from core.game.entities.obstacle import SkeletonObstacle
+from core.game.entities.obstacle_types import DIABRETE, OBSTACLE_TYPES, SKELETON
+
+POOL_SIZE = 16  # Sprites pré-alocados por tipo (a tela comporta bem menos)
+SKELETON_CHANCE = 0.7  # Mesma proporção do GameServer; o resto é diabrete
+LAYER_OBSTACLE = 1  # Camada dos obstáculos no spatial hash
 
 class ObstacleController:
-    def __init__(self, game_state, ground_y):
+    def __init__(self, game_state, ground_y, pool_size=POOL_SIZE):
         self.game_state = game_state
         self.ground_y = ground_y
-        self.obstacles = []
+        # Ordenados por x: todos nascem na borda direita e andam na mesma
+        # velocidade, então o primeiro é sempre o próximo a sair da tela
+        self.obstacles = deque()
+        # Obstáculos ativos indexados por célula de tile, para as colisões
+        self.spatial = SpatialHash(16)
         self.spawn_timer = 0
         self.spawn_interval = 2.5  # Segundos entre obstáculos
         self.obstacle_height = 24  # Altura do esqueleto
         
-        # Probabilidades de spawn
-        self.obstacle_types = [
-            (1, "skeleton") # 30% de chance de esqueleto
-        ]
+        # Tipos da tabela compartilhada que o spawn sorteia
+        self.obstacle_classes = {
+            SKELETON: SkeletonObstacle,
+            DIABRETE: DiabreteObstacle
+        }
+        
+        # Pool de obstáculos livres por tipo, reaproveitados a cada spawn. Só
+        # os tipos acima são pré-alocados, e o tamanho conta sprites: um grupo
+        # de diabretes desenha 'copies' sprites e gasta esse tanto do pool
+        self.pool = {
+            type_id: [cls(0, ground_y, game_state)
+                      for _ in range(math.ceil(pool_size / OBSTACLE_TYPES[type_id].copies))]
+            for type_id, cls in self.obstacle_classes.items()
+        }
+        self.stats = {
+            'allocated': sum(len(free) for free in self.pool.values()),
+            'reused': 0,
+            'high_water': 0
+        }
     
     def update(self, dt):
         """Atualiza obstáculos existentes e gera novos"""
         # Atualiza obstáculos
-        for obstacle in self.obstacles[:]:
+        for obstacle in self.obstacles:
             obstacle.update(dt)
-            if obstacle.is_off_screen(pyxel.width):
-                self.obstacles.remove(obstacle)
+            self.spatial.move(obstacle, obstacle.get_hitbox())
+        
+        # Os que saíram da tela estão sempre no começo da fila
+        while self.obstacles and self.obstacles[0].is_off_screen(pyxel.width):
+            self._release(self.obstacles.popleft())
         
         adjusted_spawn_interval = self.spawn_interval / (self.game_state.speed_multiplier ** 0.8)
-    
+        
         self.spawn_timer += dt
         if self.spawn_timer >= adjusted_spawn_interval:
             self.spawn_obstacle()
@@ -37,17 +67,33 @@ class ObstacleController:
         y = self.ground_y
         
         # Escolhe aleatoriamente o tipo de obstáculo
-        rand = random.random()
-        for prob, obs_type in self.obstacle_types:
-            if rand < prob:
-                if obs_type == "skeleton":
-                    new_obstacle = SkeletonObstacle(pyxel.width, y, self.game_state)
-                else:
-                    new_obstacle = Obstacle(pyxel.width, y, self.game_state)
-                break
-            rand -= prob
+        obs_type = SKELETON if random.random() < SKELETON_CHANCE else DIABRETE
         
-        self.obstacles.append(new_obstacle)
+        obstacle = self._acquire(obs_type, pyxel.width, y)
+        self.obstacles.append(obstacle)
+        self.spatial.insert(obstacle, obstacle.get_hitbox(), LAYER_OBSTACLE)
+        self.stats['high_water'] = max(self.stats['high_water'], len(self.obstacles))
+    
+    def _acquire(self, obs_type, x, y):
+        """Obstáculo livre do pool (só aloca se o pool esvaziou)"""
+        free = self.pool[obs_type]
+        if free:
+            obstacle = free.pop()
+            obstacle.reset(x, y)
+            self.stats['reused'] += 1
+        else:
+            obstacle = self.obstacle_classes[obs_type](x, y, self.game_state)
+            self.stats['allocated'] += 1
+        return obstacle
+    
+    def _release(self, obstacle):
+        """Devolve o obstáculo ao pool do seu tipo"""
+        self.spatial.remove(obstacle)
+        self.pool[obstacle.type_id].append(obstacle)
+    
+    def colliding(self, rect):
+        """Primeiro obstáculo ativo que se sobrepõe ao retângulo (x, y, w, h), ou None"""
+        return next(self.spatial.query(rect, LAYER_OBSTACLE), None)
     
     def draw(self):
         """Desenha todos os obstáculos"""
@@ -56,5 +102,6 @@ class ObstacleController:
     
     def reset(self):
         """Remove todos os obstáculos"""
-        self.obstacles = []
-        self.spawn_timer = 0
\ No newline at end of file
+        while self.obstacles:
+            self._release(self.obstacles.popleft())
+        self.spawn_timer = 0
@@ -0,0 +1,50 @@
+import time
+from typing import Dict, Hashable, Optional
+
+class TokenBucket:
+    """Balde de fichas: 'rate' fichas por segundo, acumulando até 'capacity'"""
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate: float, capacity: float, now: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic() if now is None else now
+
+    def consume(self, now: float, cost: float = 1.0) -> bool:
+        """Retira 'cost' fichas se houver saldo"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return True
+        return False
+
+class RateLimiter:
+    """Um TokenBucket por chave (endereço, sessão...), criado sob demanda"""
+
+    def __init__(self, rate: float, burst: float, idle_ttl: float = 30.0):
+        self.rate = rate
+        self.burst = burst
+        self.idle_ttl = idle_ttl
+        self.buckets: Dict[Hashable, TokenBucket] = {}
+
+    def allow(self, key: Hashable, now: Optional[float] = None) -> bool:
+        """Consome uma ficha do balde da chave; False se a chave estourou o limite"""
+        if now is None:
+            now = time.monotonic()
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(self.rate, self.burst, now)
+        return bucket.consume(now)
+
+    def forget(self, key: Hashable):
+        self.buckets.pop(key, None)
+
+    def prune(self, now: Optional[float] = None):
+        """Descarta baldes ociosos para a tabela não crescer com endereços de passagem"""
+        if now is None:
+            now = time.monotonic()
+        cutoff = now - self.idle_ttl
+        for key in [key for key, bucket in self.buckets.items() if bucket.updated < cutoff]:
+            del self.buckets[key]
@@ -0,0 +1,150 @@
+from typing import Dict, Optional, Tuple
+from .lockstep import (INPUT_DUCK, INPUT_REDUNDANCY, LockstepSimulation, check_trailer,
+                       decode_inputs, encode_inputs, hash_trailer)
+from .state_hash import DesyncDetector
+
+ROLLBACK_INPUT_DELAY = 1    # Atraso local mínimo (o resto da latência é escondido pela predição)
+MAX_ROLLBACK_TICKS = 8      # Máximo de ticks re-simulados; além disso o jogo espera o peer
+PREDICTED_BITS = INPUT_DUCK # Botões segurados se repetem; o pulo é um toque e não é previsto
+
+class RollbackSession:
+    """Netcode de rollback (estilo GGPO) sobre a LockstepSimulation.
+
+    A simulação avança todo frame sem esperar o peer: o input remoto que ainda
+    não chegou é previsto como "igual ao último". Quando o input real chega e
+    difere do previsto, o estado volta ao snapshot do tick anterior e os ticks
+    seguintes são re-simulados com os inputs corretos, tudo no mesmo frame."""
+
+    def __init__(self, simulation: LockstepSimulation, slot: int, token: str,
+                 input_delay: int = ROLLBACK_INPUT_DELAY, max_rollback: int = MAX_ROLLBACK_TICKS):
+        self.simulation = simulation
+        self.slot = slot
+        self.token = token
+        self.input_delay = input_delay
+        self.max_rollback = max_rollback
+        self.remote_slots = [other for other in simulation.players if other != slot]
+
+        self.local_inputs = [0] * (input_delay + 1)  # Input local de cada tick
+        self.pending = 0
+        self.confirmed: Dict[int, Dict[int, int]] = {}  # tick -> slot remoto -> input real
+        self.frontier = {other: 0 for other in self.remote_slots}  # Último tick confirmado sem lacunas
+        self.last_input = {other: 0 for other in self.remote_slots}
+        self.used: Dict[int, Dict[int, int]] = {}       # Inputs (reais ou previstos) de cada tick
+        self.snapshots: Dict[int, Tuple] = {}           # Estado no fim de cada tick
+        self.rollback_tick: Optional[int] = None
+        self.discarded_tick = 0
+        self.detector = DesyncDetector(slot)  # Só recebe ticks confirmados
+
+        # Estatísticas para ajuste do atraso e da janela
+        self.rollbacks = 0
+        self.resimulated_ticks = 0
+        self.stalls = 0
+
+    @property
+    def confirmed_tick(self) -> int:
+        """Último tick com inputs reais de todos os jogadores"""
+        return min(self.frontier.values(), default=self.simulation.tick)
+
+    @property
+    def game_over(self) -> bool:
+        """Fim de jogo só vale quando o tick da colisão já foi confirmado"""
+        return self.simulation.game_over and self.confirmed_tick >= self.simulation.tick
+
+    def add_local_input(self, mask: int) -> bytes:
+        """Registra o input do frame e retorna o pacote a enviar"""
+        self.pending |= mask
+        next_tick = len(self.local_inputs)
+        if next_tick <= self.simulation.tick + self.input_delay + 1:
+            self.local_inputs.append(self.pending)
+            self.pending = 0
+        last_tick = len(self.local_inputs) - 1
+        recent = self.local_inputs[max(0, last_tick - INPUT_REDUNDANCY + 1):]
+        return encode_inputs(self.token, self.slot, last_tick, recent, hash_trailer(self.detector))
+
+    def receive(self, packet: bytes):
+        """Confirma inputs remotos e marca rollback se algum previsto estava errado.
+
+        O peer não passa de max_rollback ticks à frente do que confirmou;
+        ticks além disso (mais a redundância do pacote) são descartados."""
+        decoded = decode_inputs(packet)
+        if decoded is None:
+            return
+        slot, last_tick, masks, trailer = decoded
+        if slot not in self.frontier:
+            return
+        check_trailer(self.detector, trailer)
+
+        first_tick = last_tick - len(masks) + 1
+        horizon = self.simulation.tick + self.max_rollback + INPUT_REDUNDANCY
+        for offset, mask in enumerate(masks):
+            tick = first_tick + offset
+            if tick <= self.frontier[slot] or tick > horizon:
+                continue
+            self.confirmed.setdefault(tick, {})[slot] = mask
+            used = self.used.get(tick)
+            if used is not None and used[slot] != mask:
+                if self.rollback_tick is None or tick < self.rollback_tick:
+                    self.rollback_tick = tick
+
+        frontier = self.frontier[slot]
+        while slot in self.confirmed.get(frontier + 1, ()):
+            frontier += 1
+        if frontier != self.frontier[slot]:
+            self.frontier[slot] = frontier
+            self.last_input[slot] = self.confirmed[frontier][slot]
+
+    def _inputs_for(self, tick: int) -> Dict[int, int]:
+        """Inputs do tick: reais quando já chegaram, senão previstos"""
+        inputs = {self.slot: self.local_inputs[tick]}
+        confirmed = self.confirmed.get(tick, {})
+        for other in self.remote_slots:
+            if other in confirmed:
+                inputs[other] = confirmed[other]
+            else:
+                inputs[other] = self.last_input[other] & PREDICTED_BITS
+        return inputs
+
+    def _step(self):
+        tick = self.simulation.tick + 1
+        inputs = self._inputs_for(tick)
+        self.used[tick] = inputs
+        self.simulation.step(inputs)
+        self.snapshots[tick] = self.simulation.save_state()
+
+    def _rollback(self):
+        """Volta ao último tick certo e re-simula até o tick atual"""
+        target, current = self.rollback_tick, self.simulation.tick
+        self.rollback_tick = None
+        if target > current:
+            return
+        self.simulation.load_state(self.snapshots[target - 1])
+        for _ in range(current - target + 1):
+            self._step()
+        self.rollbacks += 1
+        self.resimulated_ticks += current - target + 1
+
+    def _discard(self):
+        """Esquece snapshots e inputs anteriores ao tick confirmado (não há rollback até eles)"""
+        oldest = min(self.confirmed_tick, self.simulation.tick)
+        for tick in range(self.discarded_tick, oldest):
+            # Estado definitivo: entra no hash de dessincronização antes de ser descartado
+            self.detector.record(tick, self.snapshots.pop(tick))
+            self.used.pop(tick + 1, None)
+            self.confirmed.pop(tick + 1, None)
+        self.discarded_tick = max(self.discarded_tick, oldest)
+
+    def advance(self) -> int:
+        """Corrige predições erradas e avança um tick; retorna quantos ticks avançou"""
+        if not self.snapshots:
+            self.snapshots[self.simulation.tick] = self.simulation.save_state()
+        if self.rollback_tick is not None:
+            self._rollback()
+
+        # Longe demais do último input confirmado: espera em vez de prever mais
+        tick = self.simulation.tick + 1
+        if tick - self.confirmed_tick > self.max_rollback or tick >= len(self.local_inputs):
+            self.stalls += 1
+            return 0
+        self._step()
+        self._discard()
+        return 1
@@ -0,0 +1,106 @@
+import base64
+import hashlib
+import hmac
+import json
+import random
+import socket
+import struct
+import zlib
+from array import array
+from typing import Dict, Optional, Tuple
+
+MIGRATION_PORT_OFFSET = 100   # Porta TCP de migração = porta UDP do jogo + offset
+MIGRATION_TIMEOUT = 1.0
+BLOB_VERSION = 3  # 2: jogadores e obstáculos como listas compactas; 3: tipo do obstáculo por id
+MAX_BLOB_SIZE = 1 << 20   # Blob comprimido aceito (uma sala tem poucos KB)
+MAX_ROOM_SIZE = 8 << 20   # Limite do JSON descomprimido (contra bombas de zlib)
+MAC_SIZE = hashlib.sha256().digest_size
+
+def pack_rng_state(rng: random.Random) -> Dict:
+    """Estado do Mersenne Twister em forma compacta (625 inteiros em base64)"""
+    version, internal, gauss_next = rng.getstate()
+    return {
+        'version': version,
+        'internal': base64.b64encode(array('I', internal).tobytes()).decode(),
+        'gauss_next': gauss_next
+    }
+
+def unpack_rng_state(data: Dict) -> random.Random:
+    """Recria o gerador exatamente no ponto em que foi exportado"""
+    internal = array('I')
+    internal.frombytes(base64.b64decode(data['internal']))
+    rng = random.Random()
+    rng.setstate((data['version'], tuple(internal), data['gauss_next']))
+    return rng
+
+def encode_room(room: Dict) -> bytes:
+    """Serializa o estado completo da sala em um blob compacto"""
+    room = dict(room, blob_version=BLOB_VERSION)
+    return zlib.compress(json.dumps(room, separators=(',', ':')).encode(), 6)
+
+def sign(key: Optional[str], blob: bytes) -> bytes:
+    """HMAC-SHA256 do blob com a chave de administração (a chave nunca viaja)"""
+    return hmac.new((key or '').encode(), blob, hashlib.sha256).digest()
+
+def verify(key: Optional[str], blob: bytes, mac: bytes) -> bool:
+    return hmac.compare_digest(sign(key, blob), mac)
+
+def decode_room(blob: bytes) -> Dict:
+    """Descomprime e valida o blob; qualquer blob inválido vira ValueError"""
+    try:
+        inflater = zlib.decompressobj()
+        data = inflater.decompress(blob, MAX_ROOM_SIZE)
+        if inflater.unconsumed_tail:
+            raise ValueError("Sala migrada grande demais")
+        room = json.loads(data.decode())
+    except zlib.error as e:
+        raise ValueError(f"Blob de migração corrompido: {e}") from e
+    if not isinstance(room, dict):
+        raise ValueError("Blob de migração não é um objeto")
+    if room.get('blob_version') != BLOB_VERSION:
+        raise ValueError(f"Versão de blob incompatível: {room.get('blob_version')}")
+    return room
+
+def _recv_exact(conn: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = conn.recv(min(size - len(data), 65536))
+        if not chunk:
+            raise ConnectionError("Conexão de migração encerrada no meio do blob")
+        data += chunk
+    return bytes(data)
+
+def send_room(host: str, port: int, blob: bytes, key: Optional[str]) -> bool:
+    """Entrega o blob assinado ao servidor de destino e espera a confirmação"""
+    try:
+        with socket.create_connection((host, port + MIGRATION_PORT_OFFSET), MIGRATION_TIMEOUT) as conn:
+            conn.sendall(struct.pack('!I', len(blob)) + sign(key, blob) + blob)
+            return _recv_exact(conn, 2) == b'OK'
+    except OSError as e:
+        print(f"Falha ao migrar sala para {host}:{port}: {e}")
+        return False
+
+def receive_room(conn: socket.socket) -> Tuple[bytes, bytes]:
+    """Lê (mac, blob) enviados por send_room; recusa blobs acima de MAX_BLOB_SIZE"""
+    conn.settimeout(MIGRATION_TIMEOUT)
+    size, = struct.unpack('!I', _recv_exact(conn, 4))
+    if size > MAX_BLOB_SIZE:
+        raise ValueError(f"Blob de migração de {size} bytes excede o limite")
+    mac = _recv_exact(conn, MAC_SIZE)
+    return mac, _recv_exact(conn, size)
+
+def acknowledge(conn: socket.socket, accepted: bool):
+    conn.sendall(b'OK' if accepted else b'NO')
+
+def open_listener(port: int) -> Optional[socket.socket]:
+    """Socket TCP que recebe salas migradas de outros servidores"""
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    try:
+        listener.bind(('0.0.0.0', port + MIGRATION_PORT_OFFSET))
+    except OSError as e:
+        print(f"Migração desativada, porta {port + MIGRATION_PORT_OFFSET} indisponível: {e}")
+        listener.close()
+        return None
+    listener.listen(4)
+    return listener
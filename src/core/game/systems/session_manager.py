@@ -0,0 +1,93 @@
+import secrets
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+from ..entities.records import PlayerRecord
+
+SESSION_TIMEOUT = 3.0   # Sem pacotes por esse tempo -> sessão suspensa
+RESUME_WINDOW = 30.0    # Tempo que uma sessão suspensa pode ser retomada
+
+@dataclass
+class Session:
+    token: str
+    player_id: str
+    addr: Tuple[str, int]
+    last_seen: float
+    active: bool = True
+    player: Optional[PlayerRecord] = None  # Estado do jogador guardado enquanto suspensa
+    input_addr: Optional[Tuple[str, int]] = None  # Socket de inputs do modo lockstep
+
+class SessionTable:
+    """Tabela de sessões indexada pelo token emitido pelo servidor, com índice
+    por endereço para rotear cada pacote em O(1)"""
+
+    def __init__(self, timeout: float = SESSION_TIMEOUT, resume_window: float = RESUME_WINDOW):
+        self.timeout = timeout
+        self.resume_window = resume_window
+        self.by_token: Dict[str, Session] = {}
+        self.by_addr: Dict[Tuple[str, int], Session] = {}
+
+    def __len__(self) -> int:
+        return len(self.by_token)
+
+    def create(self, player_id: str, addr: Tuple[str, int]) -> Session:
+        """Cria uma sessão nova para o jogador no endereço informado"""
+        session = Session(secrets.token_hex(8), player_id, addr, time.time())
+        self.by_token[session.token] = session
+        self.bind(session, addr)
+        return session
+
+    def restore(self, token: str, player_id: str, addr: Tuple[str, int],
+                active: bool, player: Optional[PlayerRecord] = None) -> Session:
+        """Recria uma sessão vinda de outro servidor (migração de sala)"""
+        session = Session(token, player_id, addr, time.time(), active, player)
+        self.by_token[token] = session
+        self.bind(session, addr)
+        return session
+
+    def bind(self, session: Session, addr: Tuple[str, int]):
+        """Associa a sessão a um endereço (o IP/porta pode mudar após uma queda)"""
+        if self.by_addr.get(addr) is session:
+            return
+        if self.by_addr.get(session.addr) is session:
+            del self.by_addr[session.addr]
+        session.addr = addr
+        self.by_addr[addr] = session
+
+    def lookup(self, addr: Tuple[str, int], token: Optional[str] = None) -> Optional[Session]:
+        """Encontra a sessão do pacote: primeiro pelo endereço, depois pelo token"""
+        session = self.by_addr.get(addr)
+        if session is not None and (token is None or session.token == token):
+            return session
+        if token is not None:
+            return self.by_token.get(token)
+        return None
+
+    def touch(self, session: Session):
+        """Registra atividade (qualquer pacote conta como heartbeat)"""
+        session.last_seen = time.time()
+
+    def player_ids(self) -> Set[str]:
+        """IDs de jogador reservados por sessões ativas ou suspensas"""
+        return {session.player_id for session in self.by_token.values()}
+
+    def remove(self, session: Session):
+        """Remove a sessão e seu índice de endereço"""
+        self.by_token.pop(session.token, None)
+        if self.by_addr.get(session.addr) is session:
+            del self.by_addr[session.addr]
+
+    def reap(self) -> Tuple[List[Session], List[Session]]:
+        """Suspende sessões silenciosas e descarta as que passaram da janela de retomada.
+        Retorna (recém-suspensas, expiradas)"""
+        now = time.time()
+        suspended, expired = [], []
+        for session in list(self.by_token.values()):
+            idle = now - session.last_seen
+            if session.active and idle > self.timeout:
+                session.active = False
+                suspended.append(session)
+            elif not session.active and idle > self.timeout + self.resume_window:
+                self.remove(session)
+                expired.append(session)
+        return suspended, expired
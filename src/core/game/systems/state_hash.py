@@ -0,0 +1,159 @@
+import json
+import struct
+import zlib
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+HASH_INTERVAL = 4      # Ticks finais entre dois relatórios de hash
+HASH_WINDOW = 8        # Hashes por relatório (cobre a perda de um relatório)
+HASH_HISTORY = 240     # Ticks guardados para comparar e gerar o dump
+HASH_HORIZON = 64      # Ticks à frente do último tick local aceitos nos relatórios do peer
+HASH_TRAILER = struct.Struct('!IB')  # Último tick com hash, quantidade de hashes
+
+STATE_FIELDS = ('tick', 'scroll_x', 'speed', 'ramp_ticks', 'score', 'spawn_timer',
+                'game_over', 'rng_state', 'spawn_threshold')
+
+def pack_state(state: Tuple) -> bytes:
+    """Forma canônica de um snapshot da LockstepSimulation: todos os inteiros
+    em int64 big-endian, jogadores em ordem de slot e obstáculos em ordem de spawn"""
+    *header, players, obstacles = state
+    values = list(header)
+    values.append(len(players))
+    for player in players:
+        values.extend(player)
+    values.append(len(obstacles))
+    for obstacle in obstacles:
+        values.extend(obstacle)
+    return struct.pack(f'!{len(values)}q', *values)
+
+def describe_state(state: Tuple) -> Dict:
+    """Snapshot em forma legível para o dump de dessincronização"""
+    *header, players, obstacles = state
+    described = dict(zip(STATE_FIELDS, header))
+    described['players'] = [list(player) for player in players]
+    described['obstacles'] = [list(obstacle) for obstacle in obstacles]
+    return described
+
+class DesyncDetector:
+    """Hash incremental do estado por tick, para detectar divergência entre peers.
+
+    Cada tick final entra em um crc32 encadeado com o anterior, então o hash de
+    um tick resume toda a partida até ele e o primeiro tick com hash diferente
+    é exatamente o primeiro tick divergente. Os peers trocam periodicamente os
+    últimos hashes; na primeira diferença o tick e o estado local são
+    registrados (cada peer grava o seu dump, para comparar lado a lado)."""
+
+    def __init__(self, slot: int, dump_prefix: str = 'desync', horizon: int = HASH_HORIZON):
+        self.slot = slot
+        self.dump_prefix = dump_prefix
+        self.horizon = horizon
+        self.rolling = 0
+        self.digests: Dict[int, int] = {}
+        self.states: Dict[int, Tuple] = {}
+        self.order = deque()
+        self.remote: Dict[int, int] = {}
+        self.last_tick = -1
+        self.reported_tick = -1
+        self.desync_tick: Optional[int] = None
+
+    def record(self, tick: int, state: Tuple):
+        """Registra o estado de um tick que não muda mais (confirmado)"""
+        self.rolling = zlib.crc32(pack_state(state), self.rolling)
+        self.digests[tick] = self.rolling
+        self.states[tick] = state
+        self.order.append(tick)
+        self.last_tick = tick
+        if len(self.order) > HASH_HISTORY:
+            old = self.order.popleft()
+            del self.digests[old]
+            del self.states[old]
+        if tick in self.remote:
+            self._compare(tick)
+        # Hashes remotos de ticks já confirmados sem estado local não servem mais
+        for stale in [remote_tick for remote_tick in self.remote if remote_tick <= tick]:
+            del self.remote[stale]
+
+    def report(self) -> Optional[Tuple[int, List[int]]]:
+        """(último tick, hashes da janela) quando chega a hora de enviar, senão None"""
+        if self.last_tick < 0 or self.last_tick - self.reported_tick < HASH_INTERVAL:
+            return None
+        self.reported_tick = self.last_tick
+        first = max(self.order[0], self.last_tick - HASH_WINDOW + 1)
+        return self.last_tick, [self.digests[tick] for tick in range(first, self.last_tick + 1)]
+
+    def check(self, last_tick: int, digests: List[int]):
+        """Compara os hashes recebidos do peer com os locais.
+
+        Hashes além de 'horizon' ticks à frente do último tick local são
+        descartados, para um peer com defeito ou hostil não encher 'remote'."""
+        first = last_tick - len(digests) + 1
+        for offset, digest in enumerate(digests):
+            tick = first + offset
+            if tick > self.last_tick + self.horizon:
+                break
+            if tick > self.last_tick:
+                self.remote[tick] = digest  # O peer está à frente: compara quando chegar lá
+            elif tick in self.digests:
+                self.remote[tick] = digest
+                self._compare(tick)
+
+    def _compare(self, tick: int):
+        remote = self.remote.pop(tick)
+        if self.desync_tick is not None or remote == self.digests[tick]:
+            return
+        self.desync_tick = tick
+        path = f"{self.dump_prefix}_tick{tick}_slot{self.slot}.json"
+        dump = {
+            'tick': tick,
+            'slot': self.slot,
+            'local_hash': self.digests[tick],
+            'remote_hash': remote,
+            'state': describe_state(self.states[tick]),
+            'previous_state': describe_state(self.states[tick - 1]) if tick - 1 in self.states else None
+        }
+        try:
+            with open(path, "w") as f:
+                json.dump(dump, f, indent=1)
+        except OSError as e:
+            path = f"(não gravado: {e})"
+        print(f"DESSINCRONIZAÇÃO no tick {tick}: hash local {self.digests[tick]:08x}, "
+              f"remoto {remote:08x}. Estado salvo em {path}")
+
+def encode_hashes(report: Tuple[int, List[int]]) -> bytes:
+    """Trailer opcional do pacote de inputs com os hashes do relatório"""
+    last_tick, digests = report
+    return HASH_TRAILER.pack(last_tick, len(digests)) + struct.pack(f'!{len(digests)}I', *digests)
+
+def decode_hashes(trailer: bytes) -> Optional[Tuple[int, List[int]]]:
+    if len(trailer) < HASH_TRAILER.size:
+        return None
+    last_tick, count = HASH_TRAILER.unpack_from(trailer)
+    if len(trailer) != HASH_TRAILER.size + 4 * count or count > last_tick + 1:
+        return None
+    return last_tick, list(struct.unpack_from(f'!{count}I', trailer, HASH_TRAILER.size))
+
+if __name__ == "__main__":
+    # Benchmark: custo do hash por tick comparado ao custo do próprio tick
+    import timeit
+    from ...engine.physics.fixed_point import to_fixed
+    from .lockstep import TICK_RATE, LockstepSimulation
+
+    simulation = LockstepSimulation(1234, [1, 2])
+    for obstacle_count in (0, 8, 64):
+        simulation.obstacles = [[to_fixed(320 - i * 5), i % 2, 0, 0] for i in range(obstacle_count)]
+        simulation.game_over = False
+        state = simulation.save_state()
+        detector = DesyncDetector(1)
+        runs = 20000
+
+        def step():
+            simulation.load_state(state)
+            simulation.step({})
+
+        tick = iter(range(10 ** 9))
+        step_time = timeit.timeit(step, number=runs) / runs
+        hash_time = timeit.timeit(lambda: detector.record(next(tick), simulation.save_state()),
+                                  number=runs) / runs
+        print(f"{obstacle_count:3d} obstáculos: tick {step_time * 1e6:7.2f} us, "
+              f"save_state + hash {hash_time * 1e6:6.2f} us "
+              f"({hash_time * TICK_RATE:.2%} do orçamento de um frame a 60 Hz)")
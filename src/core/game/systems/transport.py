@@ -0,0 +1,105 @@
+import json
+import socket
+from typing import Dict, List, Optional
+
+LOCAL_ADDRESS = ('local', 0)  # Endereço lógico do jogador do host no SessionTable
+
+class UdpTransport:
+    """Transporte padrão: uma requisição JSON por datagrama, testando portas próximas"""
+
+    def __init__(self, server_ip: str, server_port: int, buffer_size: int = 4096,
+                 port_attempts: int = 3):
+        self.server_ip = server_ip
+        self.server_port = server_port
+        self.buffer_size = buffer_size
+        self.port_attempts = port_attempts
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.input_sock = None  # Criado no primeiro envio de inputs do lockstep
+
+    def retarget(self, server_ip: str, server_port: int):
+        """Passa a falar com outro servidor (ex.: após migração da sala)"""
+        self.server_ip = server_ip
+        self.server_port = server_port
+
+    def request(self, request: Dict) -> Optional[Dict]:
+        """Uma ida e volta com o servidor"""
+        try:
+            for port_offset in range(self.port_attempts):
+                current_port = self.server_port + port_offset
+                try:
+                    self.sock.sendto(json.dumps(request).encode(), (self.server_ip, current_port))
+                    self.sock.settimeout(2.0)
+                    data, _ = self.sock.recvfrom(self.buffer_size)
+                    return json.loads(data.decode())
+                except socket.timeout:
+                    if port_offset == self.port_attempts - 1:
+                        return {'status': 'error', 'message': 'Timeout - servidor não respondeu'}
+                    continue
+                except ConnectionResetError:
+                    if port_offset == self.port_attempts - 1:
+                        return {'status': 'error', 'message': 'Conexão redefinida pelo servidor'}
+                    continue
+
+        except Exception as e:
+            return {'status': 'error', 'message': f"Erro de comunicação: {str(e)}"}
+
+    def send_inputs(self, packet: bytes):
+        """Envia um pacote de inputs do lockstep (sem resposta, socket próprio
+        para não se misturar com as respostas JSON)"""
+        if self.input_sock is None:
+            self.input_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.input_sock.setblocking(False)
+        self.input_sock.sendto(packet, (self.server_ip, self.server_port))
+
+    def receive_inputs(self) -> List[bytes]:
+        """Inputs dos outros jogadores repassados pelo servidor desde a última chamada"""
+        packets = []
+        while self.input_sock is not None:
+            try:
+                data, _ = self.input_sock.recvfrom(self.buffer_size)
+            except (BlockingIOError, ConnectionResetError):
+                break
+            packets.append(data)
+        return packets
+
+    def close(self):
+        self.sock.close()
+        if self.input_sock is not None:
+            self.input_sock.close()
+
+class LocalTransport:
+    """Fast path do jogador do host: chama o servidor no mesmo processo.
+
+    Mesma interface do UdpTransport, mas sem JSON, sem syscalls e sem processo
+    intermediário: a requisição é entregue direto ao GameServer."""
+
+    def __init__(self, server):
+        self.server = server
+
+    def retarget(self, server_ip: str, server_port: int):
+        raise ValueError("O transporte local não pode ser redirecionado")
+
+    def request(self, request: Dict) -> Optional[Dict]:
+        """Uma requisição ao servidor; erros viram resposta de erro, como no UDP,
+        em vez de subir até o loop de renderização do host"""
+        try:
+            return self.server.handle_request(request, LOCAL_ADDRESS)
+        except (ValueError, KeyError, TypeError) as e:
+            self.server.stats['malformed'] += 1
+            return {'status': 'error', 'message': f"Requisição inválida: {e}"}
+        except Exception as e:
+            self.server.stats['errors'] += 1
+            print(f"Erro no servidor: {e}")
+            return {'status': 'error', 'message': f"Erro no servidor: {e}"}
+
+    def send_inputs(self, packet: bytes):
+        self.server.relay_inputs(packet, LOCAL_ADDRESS)
+
+    def receive_inputs(self) -> List[bytes]:
+        packets = []
+        while self.server.local_inputs:
+            packets.append(self.server.local_inputs.popleft())
+        return packets
+
+    def close(self):
+        pass
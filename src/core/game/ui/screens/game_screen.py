@@ -1,8 +1,15 @@
 import pyxel
+from ....engine.world.map_view import visible_range
+from ....engine.world.background_cache import BackgroundCache
+from ...levels.chunk_generator import GROUND_LEVEL, GROUND_TILE, ChunkGenerator
+
+GROUND_COLUMN = bytes([GROUND_TILE])
 
 class GameScreen:
     def __init__(self, game_client):
         self.game_client = game_client
+        self.terrain = None  # Gerador de chunks da seed da partida
+        self.map_cache = None  # Fundo composto das colunas visíveis
     
     def update(self):
         """Update game state"""
@@ -24,6 +31,17 @@ class GameScreen:
         # Update game state
         self.game_client.game_state_server.update(1/60)
 
+    def _stream_map(self, map_seed, scroll_x, tile_size, screen_width):
+        """Compõe no cache do fundo as colunas que entraram na tela"""
+        if self.map_cache is None:
+            self.map_cache = BackgroundCache(1, GROUND_LEVEL + 1, screen_width, tile_size)
+        if self.terrain is None or self.terrain.map_seed != map_seed:
+            self.terrain = ChunkGenerator(map_seed, GROUND_LEVEL + 1, GROUND_LEVEL)
+            self.map_cache.invalidate()
+        self.map_cache.stream(visible_range(scroll_x, screen_width, tile_size),
+                              (self.terrain.column, 0),
+                              (lambda x: GROUND_COLUMN, GROUND_LEVEL))
+
     def draw(self):
         """Draw game state"""
         state = self.game_client.game_state_server.get_game_state()
@@ -34,33 +52,10 @@ class GameScreen:
         
         pyxel.cls(0)  # Limpa a tela
         
-        # Desenha o mapa de fundo
-        for x, y, tile in state['background_tiles']:
-            screen_x = x * state['tile_size'] - state['scroll_x']
-            screen_y = y * state['tile_size']
-            
-            if -state['tile_size'] <= screen_x <= state['screen_width']:
-                pyxel.blt(
-                    int(screen_x), int(screen_y),
-                    1,  # Banco de imagens
-                    tile * state['tile_size'], 0,
-                    state['tile_size'], state['tile_size'],
-                    pyxel.COLOR_GREEN
-                )
-        
-        # Desenha o chão
-        for x, y, tile in state['ground_tiles']:
-            screen_x = x * state['tile_size'] - state['scroll_x']
-            screen_y = y * state['tile_size']
-            
-            if -state['tile_size'] <= screen_x <= state['screen_width']:
-                pyxel.blt(
-                    int(screen_x), int(screen_y),
-                    1,
-                    tile * state['tile_size'], 0,
-                    state['tile_size'], state['tile_size'],
-                    pyxel.COLOR_GREEN
-                )
+        # Desenha o mapa gerado localmente a partir da seed (o servidor não envia tiles)
+        tile_size = state['tile_size']
+        self._stream_map(state['map_seed'], state['scroll_x'], tile_size, state['screen_width'])
+        self.map_cache.draw(state['scroll_x'], 0, state['screen_width'])
         
         # Desenha jogadores
         for player_id, player in state['players'].items():